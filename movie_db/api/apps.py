@@ -1,6 +1,18 @@
 from django.apps import AppConfig
+from django.db.models.signals import post_migrate
 
 
 class ApiConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'api'
+
+    def ready(self):
+        from .search import ensure_triggers
+        from .caching import connect_signals
+        from .authentication import connect_signals as connect_token_signals
+        from .stats import connect_signals as connect_stats_signals
+        from . import tasks  # registrace úloh fronty (api/jobs.py)
+        post_migrate.connect(ensure_triggers, sender=self)
+        connect_signals()
+        connect_token_signals()
+        connect_stats_signals()
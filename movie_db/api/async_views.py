@@ -0,0 +1,168 @@
+# api/async_views.py
+import asyncio
+
+from asgiref.sync import sync_to_async
+from rest_framework import status
+from rest_framework.permissions import AllowAny
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from .caching import cache_response, conditional_response, movie_list_scope, movie_list_content, \
+    movie_detail_scope, movie_detail_content, person_detail_scope, people_scope, genre_list_scope, \
+    movie_detail_validators, person_detail_validators, people_validators
+from .filters import filter_movies
+from .hashers import aauthenticate
+from .models import Person, Movie, Genre
+from .pagination import KeysetPaginator, MOVIE_ORDERING, PERSON_ORDERING
+from .snapshot import catalog_snapshot, snapshot_list_validators
+from .serializers import PersonSerializer, PersonListSerializer, MovieListSerializer, LoginSerializer, parse_fields
+from .throttling import PasswordRateThrottle, PasswordEmailRateThrottle
+from .views import MOVIE_DETAIL_FIELDS, movie_detail_data, movie_detail_queryset
+
+
+# Async verze čtecích endpointů (URL s prefixem async/). Pod ASGI (uvicorn, daphne)
+# čekající požadavek nedrží vlákno. Výstup, cache i podmíněné GET jsou stejné jako
+# u synchronních view v api/views.py.
+
+class AsyncAPIView(APIView):
+    # Stejný průběh jako APIView.dispatch, jen handler se await-uje. Autentizace,
+    # oprávnění a throttling (initial) jsou synchronní kód DRF, běží přes sync_to_async.
+    async def dispatch(self, request, *args, **kwargs):
+        self.args = args
+        self.kwargs = kwargs
+        request = self.initialize_request(request, *args, **kwargs)
+        self.request = request
+        self.headers = self.default_response_headers
+
+        try:
+            await sync_to_async(self.initial)(request, *args, **kwargs)
+
+            if request.method.lower() in self.http_method_names:
+                handler = getattr(self, request.method.lower(), self.http_method_not_allowed)
+            else:
+                handler = self.http_method_not_allowed
+
+            response = handler(request, *args, **kwargs)
+            if asyncio.iscoroutine(response):
+                response = await response
+
+        except Exception as exc:
+            response = self.handle_exception(exc)
+
+        self.response = self.finalize_response(request, response, *args, **kwargs)
+        return self.response
+
+
+class AsyncMovieListView(AsyncAPIView):
+    @cache_response(movie_list_scope, movie_list_content)
+    @conditional_response(snapshot_list_validators)
+    async def get(self, request):
+        paginator = KeysetPaginator(MOVIE_ORDERING)
+        try:
+            fields = parse_fields(request.GET, MovieListSerializer.output_fields)
+            expand = parse_fields(request.GET, MovieListSerializer.expandable, 'expand')
+            snapshot = await sync_to_async(catalog_snapshot.current)()
+            if snapshot is not None:
+                movies = snapshot.movie_page(paginator, request)
+                data = MovieListSerializer(movies, fields, expand).build(movies, *snapshot.relations(movies))
+                return paginator.get_paginated_response(data, status=status.HTTP_200_OK)
+            columns = MovieListSerializer.columns(fields, paginator.fields)
+            movies = filter_movies(Movie.objects.values(*columns), request.GET)
+            movies = await paginator.apaginate_queryset(movies, request)
+        except ValueError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        data = await MovieListSerializer(movies, fields, expand).adata()
+        return paginator.get_paginated_response(data, status=status.HTTP_200_OK)
+
+
+class AsyncMovieDetailView(AsyncAPIView):
+    @cache_response(movie_detail_scope, movie_detail_content)
+    @conditional_response(movie_detail_validators)
+    async def get(self, request, movie_id):
+        try:
+            fields = parse_fields(request.GET, MOVIE_DETAIL_FIELDS)
+        except ValueError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            # Režisér JOINem, herci a žánry dávkově - prefetch proběhne uvnitř aget()
+            movie = await movie_detail_queryset(fields).aget(id=movie_id)
+        except (Movie.DoesNotExist, ValueError):
+            return Response({"detail": "Movie not found."}, status=status.HTTP_404_NOT_FOUND)
+        return Response(movie_detail_data(movie, fields), status=status.HTTP_200_OK)
+
+
+class AsyncPersonListView(AsyncAPIView):
+    role = None
+
+    async def get(self, request):
+        paginator = KeysetPaginator(PERSON_ORDERING)
+        try:
+            fields = parse_fields(request.GET, PersonListSerializer.fields)
+            people = await paginator.apaginate_queryset(
+                Person.objects.filter(role=self.role).values(*PersonListSerializer.columns(fields, paginator.fields)),
+                request,
+            )
+        except ValueError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        return paginator.get_paginated_response(PersonListSerializer(people, fields).data)
+
+
+class AsyncDirectorListView(AsyncPersonListView):
+    role = 'director'
+    get = cache_response(people_scope('director'))(conditional_response(people_validators('director'))(
+        AsyncPersonListView.get
+    ))
+
+
+class AsyncActorListView(AsyncPersonListView):
+    role = 'actor'
+    get = cache_response(people_scope('actor'))(conditional_response(people_validators('actor'))(
+        AsyncPersonListView.get
+    ))
+
+
+class AsyncPersonDetailView(AsyncAPIView):
+    @cache_response(person_detail_scope)
+    @conditional_response(person_detail_validators)
+    async def get(self, request, pk):
+        try:
+            fields = parse_fields(request.GET, PersonListSerializer.fields)
+        except ValueError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            if fields is None:
+                person = await Person.objects.aget(pk=pk)
+            else:
+                person = await Person.objects.values(*PersonListSerializer.columns(fields)).aget(pk=pk)
+        except Person.DoesNotExist:
+            return Response({"error": "Person not found."}, status=status.HTTP_404_NOT_FOUND)
+        if fields is not None:
+            return Response(PersonListSerializer([person], fields).data[0])
+        return Response(PersonSerializer(person).data)
+
+
+class AsyncGenreListView(AsyncAPIView):
+    @cache_response(genre_list_scope)
+    async def get(self, request):
+        genres = [name async for name in Genre.objects.order_by('name').values_list('name', flat=True)]
+        return Response(genres, status=status.HTTP_200_OK)
+
+
+class AsyncLoginView(AsyncAPIView):
+    # Jako LoginView, ale výpočet hashe neblokuje smyčku událostí (api/hashers.py)
+    permission_classes = [AllowAny]
+    throttle_classes = [PasswordRateThrottle, PasswordEmailRateThrottle]
+
+    async def post(self, request):
+        serializer = LoginSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        user = await aauthenticate(request, serializer.validated_data['email'], serializer.validated_data['password'])
+
+        if user is not None:
+            return Response({
+                '_id': user.id,
+                'email': user.email,
+                'isAdmin': user.is_admin,
+            })
+        return Response({'detail': 'Invalid credentials'}, status=status.HTTP_401_UNAUTHORIZED)
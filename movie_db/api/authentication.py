@@ -0,0 +1,131 @@
+# api/authentication.py
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db.models.signals import post_delete, post_save, pre_delete
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.authtoken.models import Token
+
+from .caching import get_cache
+
+
+# Token autentizace bez dotazu do databáze v ustáleném stavu.
+#
+# Dvě vrstvy: malé LRU v paměti procesu (krátké TTL) a sdílená Django cache.
+# Smazání tokenu nebo změna uživatele záznam odstraní z obou vrstev v tomto
+# procesu a ze sdílené cache; ostatní procesy ho z LRU vyhodí nejpozději po
+# API_TOKEN_LRU_TTL sekundách (0 = LRU vypnuto, odvolání platí okamžitě všude).
+
+class LRUCache:
+    def __init__(self, maxsize, ttl):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.items = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        with self.lock:
+            item = self.items.get(key)
+            if item is None:
+                return None
+            value, expires = item
+            if expires < time.monotonic():
+                del self.items[key]
+                return None
+            self.items.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        if self.ttl <= 0 or self.maxsize <= 0:
+            return
+        with self.lock:
+            self.items[key] = (value, time.monotonic() + self.ttl)
+            self.items.move_to_end(key)
+            while len(self.items) > self.maxsize:
+                self.items.popitem(last=False)
+
+    def discard(self, key):
+        with self.lock:
+            self.items.pop(key, None)
+
+    def clear(self):
+        with self.lock:
+            self.items.clear()
+
+
+token_lru = LRUCache(
+    maxsize=getattr(settings, 'API_TOKEN_LRU_SIZE', 1024),
+    ttl=getattr(settings, 'API_TOKEN_LRU_TTL', 30),
+)
+
+
+def token_cache_key(key):
+    # Samotný token jako klíč cache neukládáme
+    return 'api:token:' + hashlib.sha256(key.encode()).hexdigest()
+
+
+def evict_tokens(*keys):
+    for key in keys:
+        token_lru.discard(key)
+    get_cache().delete_many([token_cache_key(key) for key in keys])
+
+
+def cache_entry(user, token):
+    # Do cache jen sloupce uživatele bez hashe hesla a údaje tokenu, ne celé instance
+    fields = [field.attname for field in user._meta.concrete_fields if field.attname != 'password']
+    return {
+        'user': {name: getattr(user, name) for name in fields},
+        'token': (token.key, token.created),
+    }
+
+
+def from_cache_entry(entry):
+    # Heslo zůstane odložené pole: načte se až při přístupu a save() ho nepřepíše
+    user_model = get_user_model()
+    user = user_model.from_db(None, list(entry['user']), list(entry['user'].values()))
+    key, created = entry['token']
+    token = Token.from_db(None, ['key', 'user_id', 'created'], [key, user.pk, created])
+    token.user = user
+    return user, token
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    def authenticate_credentials(self, key):
+        entry = token_lru.get(key)
+        if entry is None:
+            cache_key = token_cache_key(key)
+            entry = get_cache().get(cache_key)
+            if entry is None:
+                # Neplatný token vyhodí AuthenticationFailed a nic se neuloží
+                entry = cache_entry(*super().authenticate_credentials(key))
+                get_cache().set(cache_key, entry, timeout=getattr(settings, 'API_TOKEN_CACHE_TTL', 300))
+            token_lru.set(key, entry)
+        # Každý požadavek dostane vlastní instance
+        return from_cache_entry(entry)
+
+
+# Zneplatnění ze signálů
+
+def token_deleted(sender, instance, **kwargs):
+    evict_tokens(instance.key)
+
+
+def user_changed(sender, instance, created=False, update_fields=None, **kwargs):
+    # Změna uživatele (heslo, práva) i jeho smazání - tokeny se musí načíst znovu.
+    # Nový uživatel tokeny nemá, samotné last_login (přihlášení přes session) nic nemění.
+    if created or (update_fields and set(update_fields) <= {'last_login'}):
+        return
+    keys = list(Token.objects.filter(user_id=instance.pk).values_list('key', flat=True))
+    if keys:
+        evict_tokens(*keys)
+
+
+def connect_signals():
+    from .models import User
+    post_delete.connect(token_deleted, sender=Token, dispatch_uid='api_token_cache_token_delete')
+    post_save.connect(user_changed, sender=User, dispatch_uid='api_token_cache_user_save')
+    pre_delete.connect(user_changed, sender=User, dispatch_uid='api_token_cache_user_delete')
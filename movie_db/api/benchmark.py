@@ -0,0 +1,310 @@
+# api/benchmark.py
+import json
+import statistics
+import subprocess
+import threading
+import time
+import urllib.error
+import urllib.request
+import uuid
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.test.utils import override_settings
+from django.urls import URLPattern, URLResolver, get_resolver, resolve
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from . import jobs
+from .caching import get_cache
+from .models import Person, Movie, User, Genre
+
+
+# Měření všech endpointů API (manage.py bench_api).
+#
+# In-process: požadavky jdou přes testovacího klienta uvnitř transakce, která se
+# na konci odvolá, a s vlastním prefixem cache, takže zápisy nic nezmění.
+# HTTP: jen čtecí endpointy proti běžícímu serveru (runserver/gunicorn) s více vlákny.
+# Výsledek je JSON: p50/p95/p99 latence, propustnost a počet SQL dotazů na endpoint.
+
+API_PREFIX = '/api/'
+
+# name, method, path(i), data(i), format; path a data dostávají pořadové číslo požadavku
+Route = namedtuple('Route', 'name method path data format')
+
+
+def build_routes(sample):
+    movie, person, director, actor, genre = (
+        sample['movie'], sample['person'], sample['director'], sample['actor'], sample['genre']
+    )
+    deletable_movies, deletable_people = sample['deletable_movies'], sample['deletable_people']
+    batch_movies, batch_people = sample['batch_movies'], sample['batch_people']
+
+    def new_movie(i):
+        return {"name": f"Bench {i}", "year": 2000, "director": director, "actors": [actor],
+                "genres": [genre], "isAvailable": True}
+
+    def new_person(i):
+        return {"name": f"Bench {i}", "birthDate": "1970-01-01", "country": "CZ", "biography": "Bench",
+                "role": "actor"}
+
+    def new_user(i):
+        return {"email": f"bench-{uuid.uuid4().hex[:12]}@example.com", "password": "bench-password"}
+
+    bulk_body = json.dumps({"name": "Bulk", "year": 2000, "director": director, "actors": [actor]}) + "\n"
+
+    def get(name, path):
+        return Route(name, 'GET', lambda i: path, None, None)
+
+    routes = [
+        get('router root', ''),
+        get('movies viewset list', 'movies/'),
+        get('movies viewset detail', f'movies/{movie}/'),
+        get('people viewset list', 'people/'),
+        get('people viewset detail', f'people/{person}/'),
+        get('movie list', 'api/movies/'),
+        get('movie list limit=100', 'api/movies/?limit=100'),
+        get('movie list by director', f'api/movies/?directorID={director}'),
+        get('movie list by actor', f'api/movies/?actorID={actor}'),
+        get('movie list by genre', f'api/movies/?genre={genre}'),
+        get('movie list by years', 'api/movies/?fromYear=1990&toYear=2000'),
+        get('movie detail', f'api/movies/{movie}/'),
+        get('director list', 'directors/'),
+        get('actor list', 'actors/'),
+        get('genre list', 'genres/'),
+        get('movie batch', f'movies/batch/?ids={",".join(map(str, batch_movies))}'),
+        get('person batch', f'people/batch/?ids={",".join(map(str, batch_people))}'),
+        Route('movie batch post', 'POST', lambda i: 'movies/batch/', lambda i: {"ids": batch_movies}, 'json'),
+        get('filmography', f'people/{director}/filmography/'),
+        get('related movies', f'movies/{movie}/related/'),
+        get('stats', 'stats/'),
+        get('search', 'search/?q=the'),
+        get('export movies ndjson', f'export/movies.ndjson?directorID={director}'),
+        get('export movies csv', f'export/movies.csv?directorID={director}'),
+        get('export people ndjson', 'export/people.ndjson?role=director'),
+        get('export people csv', 'export/people.csv?role=director'),
+        get('current user', 'auth/me/'),
+        get('async movie list', 'async/api/movies/'),
+        get('async movie detail', f'async/api/movies/{movie}/'),
+        get('async director list', 'async/directors/'),
+        get('async actor list', 'async/actors/'),
+        get('async person detail', f'async/people/{person}/'),
+        get('async genre list', 'async/genres/'),
+        Route('movie create', 'POST', lambda i: 'movies/', new_movie, 'json'),
+        Route('movie put', 'PUT', lambda i: f'api/movies/{movie}/', lambda i: {**new_movie(i), "actors": [actor]}, 'json'),
+        Route('movie patch', 'PATCH', lambda i: f'api/movies/{movie}/', lambda i: {"isAvailable": bool(i % 2)}, 'json'),
+        Route('movie delete', 'DELETE', lambda i: f'api/movies/{deletable_movies[i]}/', None, None),
+        Route('movie viewset patch', 'PATCH', lambda i: f'movies/{movie}/', lambda i: {"year": 2000 + i % 20}, 'json'),
+        Route('person create', 'POST', lambda i: 'people/', new_person, 'json'),
+        Route('person patch', 'PATCH', lambda i: f'people/{person}/', lambda i: {"country": "CZ"}, 'json'),
+        Route('person delete', 'DELETE', lambda i: f'people/{deletable_people[i]}/', None, None),
+        Route('bulk import', 'POST', lambda i: 'bulk/movies/', lambda i: bulk_body, 'ndjson'),
+        Route('register', 'POST', lambda i: 'user/', new_user, 'json'),
+        Route('login', 'POST', lambda i: 'auth/', lambda i: {"email": sample['email'], "password": sample['password']}, 'json'),
+        Route('async login', 'POST', lambda i: 'async/auth/',
+              lambda i: {"email": sample['email'], "password": sample['password']}, 'json'),
+        Route('token auth', 'POST', lambda i: 'api-token-auth/',
+              lambda i: {"username": sample['email'], "password": sample['password']}, 'json'),
+        Route('logout', 'DELETE', lambda i: 'auth/logout/', None, None),
+    ]
+    if 'job' in sample:
+        # Úlohy fronty jen in-process, uživatel benchmarku je jejich vlastník a administrátor
+        routes += [
+            get('job status', f"jobs/{sample['job']}/"),
+            Route('maintenance job', 'POST', lambda i: 'jobs/', lambda i: {"kind": "rebuild_stats"}, 'json'),
+        ]
+    return routes
+
+
+def all_url_routes(resolver=None, prefix=''):
+    # Všechny vzory URL v aplikaci api (včetně routeru), např. 'api/movies/<str:movie_id>/'
+    resolver = resolver or get_resolver('api.urls')
+    routes = []
+    for pattern in resolver.url_patterns:
+        if isinstance(pattern, URLResolver):
+            routes += all_url_routes(pattern, prefix + str(pattern.pattern).lstrip('^'))
+        elif isinstance(pattern, URLPattern) and 'format>' not in str(pattern.pattern):
+            # Stejný tvar jako ResolverMatch.route; varianty routeru s příponou formátu vynecháme
+            routes.append(prefix + str(pattern.pattern).lstrip('^'))
+    return list(dict.fromkeys(routes))
+
+
+def uncovered_routes(routes):
+    covered = set()
+    for route in routes:
+        match = resolve(API_PREFIX + route.path(0).split('?')[0])
+        covered.add(match.route[len(API_PREFIX.lstrip('/')):])
+    # Vzory, které zastíní dřívější vzor se stejnou cestou, se změřit nedají
+    return [route for route in all_url_routes() if route not in covered]
+
+
+def summarize(latencies, errors, queries, wall_time=None):
+    latencies = sorted(latencies)
+    if len(latencies) > 1:
+        cuts = statistics.quantiles(latencies, n=100, method='inclusive')
+        p50, p95, p99 = cuts[49], cuts[94], cuts[98]
+    else:
+        p50 = p95 = p99 = latencies[0] if latencies else None
+    total = wall_time if wall_time is not None else sum(latencies)
+    ms = lambda value: None if value is None else round(value * 1000, 3)
+    return {
+        'count': len(latencies),
+        'errors': errors,
+        'p50_ms': ms(p50),
+        'p95_ms': ms(p95),
+        'p99_ms': ms(p99),
+        'mean_ms': ms(statistics.fmean(latencies)) if latencies else None,
+        'throughput_rps': round(len(latencies) / total, 1) if total else None,
+        'queries': statistics.median(queries) if queries else None,
+    }
+
+
+@contextmanager
+def count_queries():
+    counter = [0]
+
+    def wrapper(execute, sql, params, many, context):
+        counter[0] += 1
+        return execute(sql, params, many, context)
+
+    with connection.execute_wrapper(wrapper):
+        yield counter
+
+
+@contextmanager
+def isolated_cache():
+    # Stejné backendy cache jako v nastavení, jen s vlastním prefixem klíčů
+    caches = {alias: {**config, 'KEY_PREFIX': f"bench-{uuid.uuid4().hex[:8]}"} for alias, config in settings.CACHES.items()}
+    with override_settings(CACHES=caches, ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, 'testserver']):
+        yield
+
+
+def pick_sample(requests, allow_writes=True):
+    movie = Movie.objects.order_by('id').values_list('id', flat=True).first()
+    director = Person.objects.filter(role='director').order_by('id').values_list('id', flat=True).first()
+    actor = Person.objects.filter(role='actor').order_by('id').values_list('id', flat=True).first()
+    genre = Genre.objects.order_by('id').values_list('name', flat=True).first()
+    if None in (movie, director, actor, genre):
+        raise ValueError("The catalogue is empty, run manage.py seed_catalog first.")
+    sample = {'movie': movie, 'person': actor, 'director': director, 'actor': actor, 'genre': genre,
+              'deletable_movies': [], 'deletable_people': [],
+              # Typická velikost watchlistu / obsazení
+              'batch_movies': list(Movie.objects.order_by('id').values_list('id', flat=True)[:20]),
+              'batch_people': list(Person.objects.filter(role='actor').order_by('id').values_list('id', flat=True)[:20])}
+    if allow_writes:
+        # Objekty pro DELETE (jen v odvolávané transakci)
+        sample['deletable_people'] = [
+            person.id for person in Person.objects.bulk_create([
+                Person(name=f'Bench {i}', birthDate='1970-01-01', country='CZ', biography='Bench', role='actor')
+                for i in range(requests)
+            ])
+        ]
+        sample['deletable_movies'] = [
+            movie.id for movie in Movie.objects.bulk_create([
+                Movie(name=f'Bench {i}', year=2000, director_id=director) for i in range(requests)
+            ])
+        ]
+        sample['email'], sample['password'] = f'bench-{uuid.uuid4().hex[:12]}@example.com', 'bench-password'
+        sample['user'] = User.objects.create_user(email=sample['email'], password=sample['password'], is_admin=True)
+        sample['job'] = jobs.enqueue('rebuild_stats', user=sample['user']).pk
+    return sample
+
+
+def selected(route, only=None, skip=None):
+    if only and not any(word in route.name for word in only):
+        return False
+    return not (skip and any(word in route.name for word in skip))
+
+
+def run_in_process(requests=100, warmup=5, only=None, skip=None, cold=False):
+    results = {}
+    # Bez omezení pokusů o přihlášení (api/throttling.py), jinak by login vracel 429
+    no_throttle = {**settings.REST_FRAMEWORK, 'DEFAULT_THROTTLE_RATES': {}}
+    with isolated_cache(), override_settings(REST_FRAMEWORK=no_throttle), transaction.atomic():
+        sample = pick_sample(requests + warmup)
+        routes = build_routes(sample)
+        uncovered = uncovered_routes(routes)
+
+        for route in routes:
+            if not selected(route, only, skip):
+                continue
+            client = APIClient()
+            call = getattr(client, route.method.lower())
+            latencies, queries, errors = [], [], 0
+            for i in range(warmup + requests):
+                kwargs = {}
+                if route.data:
+                    data = route.data(i)
+                    if route.format == 'ndjson':
+                        kwargs = {'data': data, 'content_type': 'application/x-ndjson'}
+                    else:
+                        kwargs = {'data': data, 'format': route.format}
+                if i == 0 or route.name == 'logout':
+                    # Odhlášení token smaže, další požadavek potřebuje nový
+                    token, _ = Token.objects.get_or_create(user=sample['user'])
+                    client.credentials(HTTP_AUTHORIZATION=f'Token {token.key}')
+                if cold:
+                    get_cache().clear()
+                with count_queries() as counter:
+                    start = time.perf_counter()
+                    response = call(API_PREFIX + route.path(i), **kwargs)
+                    if response.streaming:
+                        b''.join(response.streaming_content)
+                    elapsed = time.perf_counter() - start
+                if i < warmup:
+                    continue
+                latencies.append(elapsed)
+                queries.append(counter[0])
+                errors += response.status_code >= 400
+            results[route.name] = {'method': route.method, 'path': API_PREFIX + route.path(0),
+                                   **summarize(latencies, errors, queries)}
+        transaction.set_rollback(True)
+    return results, uncovered
+
+
+def run_http(base_url, token=None, requests=100, warmup=5, concurrency=4, only=None, skip=None):
+    # Zápisy by zůstaly v databázi serveru, přes HTTP měříme jen GET
+    routes = [route for route in build_routes(pick_sample(0, allow_writes=False)) if route.method == 'GET']
+    headers = {'Authorization': f'Token {token}'} if token else {}
+    results = {}
+    for route in routes:
+        if not selected(route, only, skip):
+            continue
+        url = base_url.rstrip('/') + API_PREFIX + route.path(0)
+        lock = threading.Lock()
+        latencies, errors = [], [0]
+
+        def fetch(i):
+            request = urllib.request.Request(url, headers=headers)
+            start = time.perf_counter()
+            try:
+                with urllib.request.urlopen(request) as response:
+                    response.read()
+                    failed = False
+            except (urllib.error.URLError, OSError):
+                failed = True
+            elapsed = time.perf_counter() - start
+            if i >= warmup:
+                with lock:
+                    latencies.append(elapsed)
+                    errors[0] += failed
+
+        with ThreadPoolExecutor(concurrency) as pool:
+            list(pool.map(fetch, range(warmup)))
+            start = time.perf_counter()
+            list(pool.map(fetch, range(warmup, warmup + requests)))
+            wall_time = time.perf_counter() - start
+        results[route.name] = {'method': 'GET', 'path': API_PREFIX + route.path(0),
+                               **summarize(latencies, errors[0], [], wall_time)}
+    return results
+
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              cwd=settings.BASE_DIR, timeout=5).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
@@ -0,0 +1,403 @@
+# api/caching.py
+import hashlib
+import uuid
+from functools import wraps
+from urllib.parse import urlencode
+
+from asgiref.sync import iscoroutinefunction, sync_to_async
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db.models import Max
+from django.db.models.signals import post_save, post_delete, pre_save, pre_delete, m2m_changed
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, parse_http_date_safe
+from rest_framework.response import Response
+
+from .filters import filter_movies, parse_ids, query_ids
+from .models import Movie, Person, Genre
+from .pagination import KeysetPaginator, MOVIE_ORDERING, PERSON_ORDERING
+from .signals import genres_changed
+
+
+# Cache odpovědí pro čtecí endpointy.
+#
+# Každý záznam si pamatuje "tagy", na kterých závisí (např. movie:5, person:3,
+# movies:director:3), a verze těchto tagů v okamžiku uložení. Zápis do databáze
+# jen změní verzi dotčených tagů, takže se zneplatní přesně ty odpovědi, které
+# daný film nebo osobu obsahují nebo obsahovat mohou, a nic jiného.
+
+def get_cache():
+    return caches[getattr(settings, 'API_CACHE_ALIAS', 'default')]
+
+
+def new_version():
+    return uuid.uuid4().hex[:12]
+
+
+def get_tag_versions(tags):
+    tags = list(dict.fromkeys(tags))
+    cache = get_cache()
+    keys = {f'api:tag:{tag}': tag for tag in tags}
+    found = cache.get_many(keys)
+    # Chybějící (nebo z cache vyhozenou) verzi založíme náhodně, nikdy ne od nuly,
+    # aby po vyhození tagu nemohl znovu platit starý záznam.
+    missing = {key: new_version() for key in keys if key not in found}
+    if missing:
+        cache.set_many(missing, timeout=None)
+        found.update(missing)
+    return {keys[key]: version for key, version in found.items()}
+
+
+def invalidate(*tags):
+    tags = [tag for tag in tags if tag]
+    if tags:
+        get_cache().set_many({f'api:tag:{tag}': new_version() for tag in tags}, timeout=None)
+
+
+def response_cache_key(request):
+    # Normalizovaná cesta a seřazené neprázdné parametry
+    params = sorted((key, value) for key, values in request.GET.lists() for value in values if value != '')
+    raw = f'{request.get_host()}{request.path}?{urlencode(params)}'
+    return 'api:response:' + hashlib.md5(raw.encode()).hexdigest()
+
+
+CACHED_HEADERS = ('Link', 'ETag', 'Last-Modified')
+
+
+def not_modified(request, headers):
+    etag = headers.get('ETag')
+    last_modified = parse_http_date_safe(headers['Last-Modified']) if 'Last-Modified' in headers else None
+    if etag is None and last_modified is None:
+        return None
+    response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if response is not None:
+        for name in ('ETag', 'Last-Modified'):
+            if name in headers:
+                response[name] = headers[name]
+    return response
+
+
+def cached_response(request):
+    # Platný záznam z cache jako odpověď (nebo 304), jinak None
+    entry = get_cache().get(response_cache_key(request))
+    if entry is None or get_tag_versions(entry['versions']) != entry['versions']:
+        return None
+    # Uložené ETag/Last-Modified platí stejně dlouho jako záznam, 304 tedy bez dotazu
+    response = not_modified(request, entry['headers']) or Response(
+        entry['data'], status=entry['status'], headers=entry['headers']
+    )
+    response['X-Cache'] = 'HIT'
+    return response
+
+
+def store_response(request, response, versions, content_tags=None):
+    if response.status_code != 200:
+        return
+    if content_tags:
+        versions.update(get_tag_versions(content_tags(request, response)))
+    headers = {name: response[name] for name in CACHED_HEADERS if response.has_header(name)}
+    get_cache().set(response_cache_key(request), {
+        'data': response.data,
+        'status': response.status_code,
+        'headers': headers,
+        'versions': versions,
+    }, timeout=getattr(settings, 'API_CACHE_TIMEOUT', 300))
+    response['X-Cache'] = 'MISS'
+
+
+def cache_response(scope_tags, content_tags=None):
+    """
+    Dekorátor pro GET metodu APIView (synchronní i async). Běží až po autentizaci a oprávněních.
+
+    scope_tags(request, **kwargs)      - tagy známé z URL, verze se čtou před výpočtem
+    content_tags(request, response)    - tagy odvozené z obsahu odpovědi (např. herci filmu)
+    """
+    def decorator(method):
+        if iscoroutinefunction(method):
+            @wraps(method)
+            async def async_wrapper(self, request, *args, **kwargs):
+                response = await sync_to_async(cached_response)(request)
+                if response is not None:
+                    return response
+                versions = await sync_to_async(get_tag_versions)(scope_tags(request, **kwargs))
+                response = await method(self, request, *args, **kwargs)
+                await sync_to_async(store_response)(request, response, versions, content_tags)
+                return response
+            return async_wrapper
+
+        @wraps(method)
+        def wrapper(self, request, *args, **kwargs):
+            response = cached_response(request)
+            if response is not None:
+                return response
+            versions = get_tag_versions(scope_tags(request, **kwargs))
+            response = method(self, request, *args, **kwargs)
+            store_response(request, response, versions, content_tags)
+            return response
+        return wrapper
+    return decorator
+
+
+def conditional_headers(validators, request, kwargs):
+    # Hlavičky ETag/Last-Modified, nebo None, když validátor nic nevrátí
+    try:
+        validator = validators(request, **kwargs)
+    except ValueError:
+        # Neplatné parametry ohlásí až samotné view (400)
+        validator = None
+    if validator is None:
+        return None
+
+    content, last_modified = validator
+    # Výběr polí mění obsah odpovědi, ne data, ze kterých vzniká
+    shape = [(name, request.GET[name]) for name in ('fields', 'expand') if request.GET.get(name)]
+    if shape:
+        content = (content, shape)
+    headers = {'ETag': 'W/"%s"' % hashlib.md5(repr(content).encode()).hexdigest()}
+    if last_modified is not None:
+        headers['Last-Modified'] = http_date(int(last_modified.timestamp()))
+    return headers
+
+
+def add_headers(response, headers):
+    if headers and response.status_code == 200:
+        for name, value in headers.items():
+            response[name] = value
+    return response
+
+
+def conditional_response(validators):
+    """
+    Dekorátor pro GET metodu (synchronní i async): podmíněné požadavky (If-None-Match / If-Modified-Since).
+
+    validators(request, **kwargs) vrací (obsah pro ETag, last_modified) nebo None, pokud
+    objekt neexistuje. Při shodě vrátí 304 dřív, než se cokoli načte nebo serializuje.
+    """
+    def decorator(method):
+        if iscoroutinefunction(method):
+            @wraps(method)
+            async def async_wrapper(self, request, *args, **kwargs):
+                headers = await sync_to_async(conditional_headers)(validators, request, kwargs)
+                response = not_modified(request, headers) if headers else None
+                if response is not None:
+                    return response
+                return add_headers(await method(self, request, *args, **kwargs), headers)
+            return async_wrapper
+
+        @wraps(method)
+        def wrapper(self, request, *args, **kwargs):
+            headers = conditional_headers(validators, request, kwargs)
+            response = not_modified(request, headers) if headers else None
+            if response is not None:
+                return response
+            return add_headers(method(self, request, *args, **kwargs), headers)
+        return wrapper
+    return decorator
+
+
+# Validátory pro podmíněné GET požadavky.
+# Detail: (id, updatedAt) objektu a u filmu i zobrazených osob. Seznam: (id, updatedAt)
+# řádků stránky včetně řádku navíc pro další stránku - jeden dotaz nad indexem stránkování.
+# If-Modified-Since samo nepozná smazaný řádek, ETag ano (mění se seznam id i počet).
+
+def page_validators(queryset, ordering, request):
+    page, limit = KeysetPaginator(ordering).get_page_queryset(queryset, request)
+    rows = list(page.values_list('id', 'updatedAt'))
+    return (len(rows), rows), max((updated for _, updated in rows), default=None)
+
+
+def movie_list_validators(request, **kwargs):
+    if request.GET.get('expand'):
+        return None  # změnu jména vložené osoby updatedAt filmů nezachytí
+    return page_validators(filter_movies(Movie.objects.all(), request.GET), MOVIE_ORDERING, request)
+
+
+def people_validators(role):
+    return lambda request, **kwargs: page_validators(
+        Person.objects.filter(role=role), PERSON_ORDERING, request
+    )
+
+
+def movie_detail_validators(request, movie_id, **kwargs):
+    row = (
+        Movie.objects.filter(id=movie_id)
+        .values_list('id', 'updatedAt', 'director__updatedAt')
+        .annotate(actors_updated=Max('actors__updatedAt'))
+        .first()
+    )
+    if row is None:
+        return None
+    return row, max(value for value in row[1:] if value is not None)
+
+
+def person_detail_validators(request, pk, **kwargs):
+    row = Person.objects.filter(pk=pk).values_list('id', 'updatedAt').first()
+    if row is None:
+        return None
+    return row, row[1]
+
+
+# Tagy jednotlivých endpointů
+
+def movie_list_scope(request, **kwargs):
+    # Tag za každý použitý filtr: změna herců nebo žánrů filmu zvýší jen tagy herců
+    # a žánrů, seznam s directorID&actorID by tedy s tagem režiséra zůstal neplatný.
+    tags = []
+    if request.GET.get('directorID'):
+        tags.append(f'movies:director:{request.GET["directorID"]}')
+    if request.GET.get('actorID'):
+        tags.append(f'movies:actor:{request.GET["actorID"]}')
+    if request.GET.get('genre'):
+        tags.append(f'movies:genre:{request.GET["genre"]}')
+    return tags or ['movies:all']
+
+
+def embedded_people(movie, key):
+    # Id osob vložených do filmu jako objekty (detail, expand u seznamu), nejsou-li vybrané, nic
+    director = movie.get('director')
+    people = [director] if isinstance(director, dict) else []
+    people += [actor for actor in movie.get('actors', ()) if isinstance(actor, dict)]
+    return [person[key] for person in people]
+
+
+def movie_list_content(request, response):
+    tags = [f'movie:{movie["id"]}' for movie in response.data]
+    return tags + [f'person:{pk}' for movie in response.data for pk in embedded_people(movie, 'id')]
+
+
+def movie_detail_scope(request, movie_id, **kwargs):
+    return [f'movie:{movie_id}']
+
+
+def movie_detail_content(request, response):
+    return [f'person:{pk}' for pk in embedded_people(response.data, '_id')]
+
+
+def person_detail_scope(request, pk, **kwargs):
+    return [f'person:{pk}']
+
+
+def people_scope(role):
+    return lambda request, **kwargs: [f'people:{role}']
+
+
+def genre_list_scope(request, **kwargs):
+    return ['genres']
+
+
+def batch_scope(prefix):
+    # Tagy všech požadovaných id, i chybějících: jejich pozdější vytvoření záznam zneplatní
+    def scope(request, **kwargs):
+        try:
+            ids = parse_ids(query_ids(request.GET), getattr(settings, 'API_BATCH_MAX_IDS', 100))
+        except ValueError:
+            return []  # view vrátí 400, nic se neuloží
+        return [f'{prefix}:{pk}' for pk in ids]
+    return scope
+
+
+def movie_batch_content(request, response):
+    return [f'person:{pk}' for movie in response.data['results'] for pk in embedded_people(movie, '_id')]
+
+
+def related_scope(request, pk, **kwargs):
+    # Sousedy mění jen build_similarity (tag similarity), jména filmů jejich úpravy
+    return ['similarity']
+
+
+def related_content(request, response):
+    return [f'movie:{movie["_id"]}' for movie in response.data['results']]
+
+
+def filmography_scope(request, pk, **kwargs):
+    return [f'person:{pk}', f'movies:director:{pk}', f'movies:actor:{pk}']
+
+
+def stats_scope(request, **kwargs):
+    # Tag stats zneplatňuje api/stats.py při každé změně souhrnných počtů
+    return ['stats', 'genres']
+
+
+def stats_content(request, response):
+    people = response.data['topDirectors'] + response.data['topActors']
+    return [f'person:{person["_id"]}' for person in people]
+
+
+# Zneplatnění ze signálů modelů
+# Tag catalog nese verzi snímku katalogu v paměti (api/snapshot.py), mění ho každý zápis.
+
+def movie_pre_save(sender, instance, **kwargs):
+    instance._old_director_id = None
+    if not instance._state.adding:
+        instance._old_director_id = (
+            Movie.objects.filter(pk=instance.pk).values_list('director_id', flat=True).first()
+        )
+
+
+def movie_changed(sender, instance, created=False, **kwargs):
+    old_director_id = getattr(instance, '_old_director_id', None)
+    tags = [
+        f'movie:{instance.pk}',
+        'movies:all',
+        'catalog',
+        f'movies:director:{instance.director_id}',
+        old_director_id and f'movies:director:{old_director_id}',
+    ]
+    if kwargs.get('signal') is post_save and not created:
+        # Změna roku může film přesunout do/z seznamů filtrovaných podle herce nebo žánru
+        tags += [f'movies:actor:{pk}' for pk in instance.actors.values_list('id', flat=True)]
+        tags += [f'movies:genre:{name}' for name in instance.genre_links.values_list('genre__name', flat=True)]
+    invalidate(*tags)
+
+
+def movie_actors_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    if action not in ('post_add', 'post_remove', 'pre_clear'):
+        return
+    if reverse:
+        # person.acted_movies.add(...) - instance je herec, pk_set filmy
+        movie_ids = pk_set if action != 'pre_clear' else instance.acted_movies.values_list('id', flat=True)
+        invalidate('catalog', f'movies:actor:{instance.pk}', *(f'movie:{pk}' for pk in movie_ids))
+    else:
+        actor_ids = pk_set if action != 'pre_clear' else instance.actors.values_list('id', flat=True)
+        invalidate('catalog', f'movie:{instance.pk}', *(f'movies:actor:{pk}' for pk in actor_ids))
+
+
+def movie_genres_changed(sender, instance, names, **kwargs):
+    invalidate(f'movie:{instance.pk}', 'genres', 'catalog', *(f'movies:genre:{name}' for name in names))
+
+
+def person_pre_save(sender, instance, **kwargs):
+    instance._old_role = None
+    if not instance._state.adding:
+        instance._old_role = Person.objects.filter(pk=instance.pk).values_list('role', flat=True).first()
+
+
+def person_changed(sender, instance, **kwargs):
+    old_role = getattr(instance, '_old_role', None)
+    invalidate(f'person:{instance.pk}', f'people:{instance.role}', old_role and f'people:{old_role}', 'catalog')
+
+
+def person_pre_delete(sender, instance, **kwargs):
+    # Kaskáda smaže vazby na filmy bez m2m_changed, filmy, kde osoba hrála, zneplatníme předem.
+    # Filmy, které režírovala, se smažou samy a pošlou vlastní post_delete.
+    movie_ids = instance.acted_movies.values_list('id', flat=True)
+    invalidate('catalog', f'movies:actor:{instance.pk}', *(f'movie:{pk}' for pk in movie_ids))
+
+
+def genre_changed(sender, instance, **kwargs):
+    invalidate('genres', 'catalog')
+
+
+def connect_signals():
+    pre_save.connect(movie_pre_save, sender=Movie, dispatch_uid='api_cache_movie_pre_save')
+    post_save.connect(movie_changed, sender=Movie, dispatch_uid='api_cache_movie_save')
+    post_delete.connect(movie_changed, sender=Movie, dispatch_uid='api_cache_movie_delete')
+    m2m_changed.connect(movie_actors_changed, sender=Movie.actors.through, dispatch_uid='api_cache_movie_actors')
+    genres_changed.connect(movie_genres_changed, sender=Movie, dispatch_uid='api_cache_movie_genres')
+    pre_save.connect(person_pre_save, sender=Person, dispatch_uid='api_cache_person_pre_save')
+    post_save.connect(person_changed, sender=Person, dispatch_uid='api_cache_person_save')
+    pre_delete.connect(person_pre_delete, sender=Person, dispatch_uid='api_cache_person_pre_delete')
+    post_delete.connect(person_changed, sender=Person, dispatch_uid='api_cache_person_delete')
+    post_save.connect(genre_changed, sender=Genre, dispatch_uid='api_cache_genre_save')
+    post_delete.connect(genre_changed, sender=Genre, dispatch_uid='api_cache_genre_delete')
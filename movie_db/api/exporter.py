@@ -0,0 +1,100 @@
+# api/exporter.py
+import csv
+import io
+import json
+from itertools import islice
+
+from .importer import CSV_LIST_SEPARATOR
+from .models import Person, Movie, MovieGenre, group_by_movie
+
+# Export katalogu po dávkách: řádky se čtou přes iterator(), herce a žánry
+# dotahujeme jedním dotazem na dávku a nic se nedrží v paměti déle než dávku.
+# Formát odpovídá importu (api/importer.py), export jde zpátky naimportovat.
+
+CHUNK_SIZE = 2000
+
+MOVIE_COLUMNS = ['type', '_id', 'name', 'year', 'directorID', 'actorIDs', 'genres', 'isAvailable', 'dateAdded']
+PERSON_COLUMNS = ['type', '_id', 'name', 'birthDate', 'country', 'biography', 'role']
+
+
+def chunked(iterable, size):
+    iterator = iter(iterable)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def iter_movie_records(movies, chunk_size=CHUNK_SIZE):
+    rows = movies.order_by('id').values_list('id', 'name', 'year', 'director_id', 'isAvailable', 'dateAdded')
+    for chunk in chunked(rows.iterator(chunk_size=chunk_size), chunk_size):
+        ids = [row[0] for row in chunk]
+        actors = group_by_movie(Movie.actors.through.objects.order_by('movie_id', 'person_id'), ids, 'person_id')
+        genres = group_by_movie(MovieGenre.objects.order_by('movie_id', 'id'), ids, 'genre__name')
+
+        for movie_id, name, year, director_id, is_available, date_added in chunk:
+            yield {
+                "type": "movie",
+                "_id": str(movie_id),
+                "name": name,
+                "year": year,
+                "directorID": str(director_id),
+                "actorIDs": [str(pk) for pk in actors.get(movie_id, [])],
+                "genres": genres.get(movie_id, []),
+                "isAvailable": is_available,
+                "dateAdded": date_added.isoformat(),
+            }
+
+
+def iter_person_records(people, chunk_size=CHUNK_SIZE):
+    rows = people.order_by('id').values_list('id', 'name', 'birthDate', 'country', 'biography', 'role')
+    for person_id, name, birth_date, country, biography, role in rows.iterator(chunk_size=chunk_size):
+        yield {
+            "type": "person",
+            "_id": str(person_id),
+            "name": name,
+            "birthDate": birth_date.isoformat(),
+            "country": country,
+            "biography": biography,
+            "role": role,
+        }
+
+
+def ndjson_lines(records):
+    for record in records:
+        yield json.dumps(record, ensure_ascii=False) + '\n'
+
+
+def csv_lines(records, columns):
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=columns, extrasaction='ignore')
+    writer.writeheader()
+    for record in records:
+        for key in ('actorIDs', 'genres'):
+            if key in record:
+                record[key] = CSV_LIST_SEPARATOR.join(record[key])
+        if 'isAvailable' in record:
+            record['isAvailable'] = 'true' if record['isAvailable'] else 'false'
+        writer.writerow(record)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    yield buffer.getvalue()
+
+
+def export_lines(kind, fmt, movies=None, people=None, chunk_size=CHUNK_SIZE):
+    # kind: 'movies', 'people' nebo 'all' (jen NDJSON - CSV má pro každý typ jiné sloupce)
+    records = []
+    if kind in ('people', 'all'):
+        records.append(iter_person_records(people if people is not None else Person.objects.all(), chunk_size))
+    if kind in ('movies', 'all'):
+        records.append(iter_movie_records(movies if movies is not None else Movie.objects.all(), chunk_size))
+
+    def chained():
+        for source in records:
+            yield from source
+
+    if fmt == 'csv':
+        return csv_lines(chained(), MOVIE_COLUMNS if kind == 'movies' else PERSON_COLUMNS)
+    return ndjson_lines(chained())
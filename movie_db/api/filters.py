@@ -0,0 +1,51 @@
+# api/filters.py
+
+
+# Filtry seznamu filmů (directorID, actorID, genre, fromYear, toYear).
+# Sdílí je MovieListView a validátory podmíněných GET požadavků.
+def filter_movies(movies, params):
+    director_id = params.get('directorID')
+    actor_id = params.get('actorID')
+    genre = params.get('genre')
+    from_year = params.get('fromYear')
+    to_year = params.get('toYear')
+
+    if director_id:
+        movies = movies.filter(director_id=to_int(director_id, 'directorID'))
+    if actor_id:
+        movies = movies.filter(actors__id=to_int(actor_id, 'actorID'))  # ManyToManyField
+    if genre:
+        movies = movies.filter(genres__name=genre)  # ManyToManyField přes tabulku žánrů
+    if from_year:
+        movies = movies.filter(year__gte=to_int(from_year, 'fromYear'))
+    if to_year:
+        movies = movies.filter(year__lte=to_int(to_year, 'toYear'))
+    return movies
+
+
+def to_int(value, name):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        # TypeError: seznam, objekt nebo null z těla JSON požadavku
+        raise ValueError(f"{name} must be an integer.")
+
+
+def parse_ids(values, max_ids):
+    # Seznam id (čísla nebo řetězce) bez duplicit, v pořadí požadavku
+    if not isinstance(values, (list, tuple)) or not values:
+        raise ValueError("ids must be a non-empty list of IDs.")
+    try:
+        if not all(isinstance(value, (int, str)) and not isinstance(value, bool) for value in values):
+            raise TypeError
+        ids = list(dict.fromkeys(int(value) for value in values))
+    except (TypeError, ValueError):
+        raise ValueError("ids must be a list of integer IDs.")
+    if len(ids) > max_ids:
+        raise ValueError(f"At most {max_ids} IDs are allowed per request.")
+    return ids
+
+
+def query_ids(params):
+    # ?ids=1,2,3
+    return [value.strip() for value in params.get('ids', '').split(',') if value.strip()]
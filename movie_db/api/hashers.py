@@ -0,0 +1,75 @@
+# api/hashers.py
+import asyncio
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth import get_user_model, hashers
+from django.contrib.auth.signals import user_login_failed
+
+
+# Hashery s cenou nastavitelnou v settings (API_PBKDF2_ITERATIONS, API_SCRYPT_*, API_ARGON2_*).
+# Hash s jinou cenou nebo jiným algoritmem než první v PASSWORD_HASHERS se při
+# úspěšném přihlášení přepočítá (must_update), stačí tedy změnit nastavení.
+
+class PBKDF2PasswordHasher(hashers.PBKDF2PasswordHasher):
+    @property
+    def iterations(self):
+        return getattr(settings, 'API_PBKDF2_ITERATIONS', hashers.PBKDF2PasswordHasher.iterations)
+
+
+class ScryptPasswordHasher(hashers.ScryptPasswordHasher):
+    @property
+    def work_factor(self):
+        return getattr(settings, 'API_SCRYPT_WORK_FACTOR', hashers.ScryptPasswordHasher.work_factor)
+
+    @property
+    def block_size(self):
+        return getattr(settings, 'API_SCRYPT_BLOCK_SIZE', hashers.ScryptPasswordHasher.block_size)
+
+
+class Argon2PasswordHasher(hashers.Argon2PasswordHasher):
+    @property
+    def time_cost(self):
+        return getattr(settings, 'API_ARGON2_TIME_COST', hashers.Argon2PasswordHasher.time_cost)
+
+    @property
+    def memory_cost(self):
+        return getattr(settings, 'API_ARGON2_MEMORY_COST', hashers.Argon2PasswordHasher.memory_cost)
+
+    @property
+    def parallelism(self):
+        return getattr(settings, 'API_ARGON2_PARALLELISM', hashers.Argon2PasswordHasher.parallelism)
+
+
+# Hashování v async view běží v tomto poolu: neblokuje smyčku událostí ani sdílené
+# vlákno sync_to_async. PBKDF2, scrypt i argon2 uvolňují GIL, pool tedy využije všechna jádra.
+hash_executor = ThreadPoolExecutor(
+    max_workers=getattr(settings, 'API_PASSWORD_HASH_WORKERS', None) or os.cpu_count(),
+    thread_name_prefix='password-hash',
+)
+
+
+async def run_hasher(func, *args):
+    return await asyncio.get_running_loop().run_in_executor(hash_executor, func, *args)
+
+
+async def aauthenticate(request, email, password):
+    # Async obdoba authenticate() s ModelBackend, včetně přepočtu zastaralého hashe
+    User = get_user_model()
+    try:
+        user = await User.objects.aget(**{User.USERNAME_FIELD: email})
+    except User.DoesNotExist:
+        # Stejně dlouhá odpověď jako u existujícího uživatele (viz ModelBackend)
+        await run_hasher(hashers.make_password, password)
+        user = None
+    else:
+        outdated = []
+        if await run_hasher(hashers.check_password, password, user.password, outdated.append) and user.is_active:
+            if outdated:
+                user.password = await run_hasher(hashers.make_password, password)
+                await user.asave(update_fields=['password'])
+            return user
+
+    await user_login_failed.asend(sender=__name__, credentials={'email': email}, request=request)
+    return None
@@ -0,0 +1,251 @@
+# api/importer.py
+import csv
+import json
+from itertools import islice
+
+from django.core.exceptions import ValidationError
+from django.core.management.color import no_style
+from django.db import DatabaseError, connection, transaction
+
+from . import stats
+from .caching import invalidate
+from .models import Person, Movie, Genre, MovieGenre
+
+
+# Hromadný import katalogu (NDJSON / CSV) po dávkách.
+#
+# Každý řádek je osoba nebo film ("type": "person" / "movie"). Dávka se ověří
+# najednou, osoby, filmy i vazby na herce a žánry se vloží přes bulk_create
+# v jedné transakci na dávku. Chybné řádky se nahlásí a přeskočí, import pokračuje.
+# V paměti je vždy jen jedna dávka, takže spotřeba nezávisí na velikosti souboru.
+
+CSV_LIST_SEPARATOR = '|'
+PERSON_FIELDS = ('name', 'birthDate', 'country', 'biography', 'role')
+MAX_IDS_PER_QUERY = 900
+
+
+def iter_ndjson(lines):
+    for line_no, line in enumerate(lines, start=1):
+        if isinstance(line, bytes):
+            line = line.decode('utf-8')
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+            if not isinstance(record, dict):
+                raise ValueError("Record must be a JSON object.")
+        except ValueError as e:
+            yield line_no, e
+        else:
+            yield line_no, record
+
+
+def iter_csv(lines):
+    # Seznamy (actors, genres) jsou v jednom sloupci oddělené znakem |
+    lines = (line.decode('utf-8') if isinstance(line, bytes) else line for line in lines)
+    reader = csv.DictReader(lines)
+    for row in reader:
+        record = {key: value for key, value in row.items() if key and value not in (None, '')}
+        for key in ('actors', 'actorIDs', 'genres'):
+            if key in record:
+                record[key] = record[key].split(CSV_LIST_SEPARATOR)
+        if 'isAvailable' in record:
+            record['isAvailable'] = record['isAvailable'].lower() in ('1', 'true', 'yes')
+        yield reader.line_num, record
+
+
+def insert_links(model, left, right, rows):
+    if not rows:
+        return
+    opts = model._meta
+    quote = connection.ops.quote_name
+    sql = 'INSERT INTO %s (%s, %s) VALUES (%%s, %%s)' % (
+        quote(opts.db_table), quote(opts.get_field(left[:-3]).column), quote(opts.get_field(right[:-3]).column)
+    )
+    with connection.cursor() as cursor:
+        cursor.executemany(sql, rows)
+
+
+def reset_sequences():
+    # PostgreSQL: po vložení záznamů s vlastním id je potřeba posunout sekvence,
+    # jinak by další INSERT bez id narazil na obsazený klíč. SQLite to nepotřebuje.
+    if connection.vendor != 'postgresql':
+        return
+    with connection.cursor() as cursor:
+        for sql in connection.ops.sequence_reset_sql(no_style(), [Person, Movie]):
+            cursor.execute(sql)
+
+
+def to_id(value):
+    if isinstance(value, bool):
+        raise ValueError
+    return int(value)
+
+
+class CatalogImporter:
+    def __init__(self, chunk_size=2000, default_type='movie', max_errors=1000):
+        self.chunk_size = chunk_size
+        self.default_type = default_type
+        self.max_errors = max_errors
+        self.created = {'people': 0, 'movies': 0, 'actorLinks': 0}
+        self.errors = []
+        self.error_count = 0
+        self.genres = {}  # název -> id, žánrů je málo
+
+    def run(self, records):
+        records = iter(records)
+        while True:
+            chunk = list(islice(records, self.chunk_size))
+            if not chunk:
+                break
+            self.import_chunk(chunk)
+        if self.created['people'] or self.created['movies']:
+            reset_sequences()
+        return self.result()
+
+    def result(self):
+        return {'created': self.created, 'errorCount': self.error_count, 'errors': self.errors}
+
+    def add_error(self, line_no, error):
+        self.error_count += 1
+        if len(self.errors) < self.max_errors:
+            if isinstance(error, ValidationError):
+                error = error.message_dict if hasattr(error, 'error_dict') else error.messages
+            elif not isinstance(error, dict):
+                error = str(error)
+            self.errors.append({'line': line_no, 'error': error})
+
+    # Ověření řádků
+
+    def build_person(self, record):
+        person = Person(**{field: record.get(field) for field in PERSON_FIELDS})
+        pk = record.get('id', record.get('_id'))
+        if pk is not None:
+            person.id = to_id(pk)
+        person.full_clean(validate_unique=False, validate_constraints=False)
+        return person
+
+    def build_movie(self, record):
+        movie = Movie(
+            name=record.get('name'),
+            year=record.get('year'),
+            isAvailable=record.get('isAvailable', True),
+        )
+        pk = record.get('id', record.get('_id'))
+        if pk is not None:
+            movie.id = to_id(pk)
+        errors = {}
+        try:
+            movie.full_clean(exclude=['director'], validate_unique=False, validate_constraints=False)
+        except ValidationError as e:
+            errors.update(e.message_dict)
+
+        director = record.get('director', record.get('directorID'))
+        actors = record.get('actors', record.get('actorIDs', []))
+        genres = record.get('genres', [])
+        try:
+            movie.director_id = to_id(director)
+        except (TypeError, ValueError):
+            errors['director'] = ["A valid director ID is required."]
+        try:
+            actor_ids = list(dict.fromkeys(to_id(pk) for pk in actors))
+        except (TypeError, ValueError):
+            errors['actors'] = ["Actors must be a list of person IDs."]
+            actor_ids = []
+        if not isinstance(genres, list) or not all(isinstance(name, str) and 0 < len(name) <= 100 for name in genres):
+            errors['genres'] = ["Genres must be a list of names."]
+        if errors:
+            raise ValidationError(errors)
+        return movie, actor_ids, list(dict.fromkeys(genres))
+
+    def person_roles(self, ids):
+        roles = {}
+        ids = list(ids)
+        for start in range(0, len(ids), MAX_IDS_PER_QUERY):
+            batch = ids[start:start + MAX_IDS_PER_QUERY]
+            roles.update(Person.objects.filter(id__in=batch).values_list('id', 'role'))
+        return roles
+
+    def genre_ids(self, names):
+        missing = [name for name in names if name not in self.genres]
+        if missing:
+            self.genres.update((genre.name, genre.id) for genre in Genre.objects.resolve(missing))
+        return [self.genres[name] for name in names]
+
+    # Vložení dávky
+
+    def import_chunk(self, chunk):
+        people, movies = [], []
+        for line_no, record in chunk:
+            if isinstance(record, Exception):
+                self.add_error(line_no, record)
+                continue
+            kind = record.get('type', self.default_type)
+            try:
+                if kind == 'person':
+                    people.append((line_no, self.build_person(record)))
+                elif kind == 'movie':
+                    movies.append((line_no, *self.build_movie(record)))
+                else:
+                    raise ValidationError({'type': ["Type must be 'person' or 'movie'."]})
+            except (ValidationError, TypeError, ValueError) as e:
+                self.add_error(line_no, e)
+
+        try:
+            with transaction.atomic():
+                created, tags = self.insert_chunk(people, movies)
+        except DatabaseError as e:
+            # Chyba databáze (např. duplicitní id) shodí jen tuto dávku
+            first, last = chunk[0][0], chunk[-1][0]
+            self.genres.clear()  # žánry založené v odvolané transakci neexistují
+            self.add_error(first, f"Lines {first}-{last} were not imported: {e}")
+            return
+        for key, count in created.items():
+            self.created[key] += count
+        invalidate('catalog', *tags)
+
+    def insert_chunk(self, people, movies):
+        created = dict.fromkeys(self.created, 0)
+        tags = set()
+        if people:
+            Person.objects.bulk_create([person for _, person in people])
+            created['people'] = len(people)
+            tags.update(f'people:{person.role}' for _, person in people)
+
+        # Režiséři a herci musí existovat a mít správnou roli (stejně jako v MovieSerializer)
+        roles = self.person_roles({pk for _, movie, actor_ids, _ in movies for pk in [movie.director_id, *actor_ids]})
+        valid = []
+        for line_no, movie, actor_ids, genres in movies:
+            errors = {}
+            if roles.get(movie.director_id) != 'director':
+                errors['director'] = [f"Invalid pk \"{movie.director_id}\" - object does not exist."]
+            bad_actors = [pk for pk in actor_ids if roles.get(pk) != 'actor']
+            if bad_actors:
+                errors['actors'] = [f"Invalid pk \"{pk}\" - object does not exist." for pk in bad_actors]
+            if errors:
+                self.add_error(line_no, errors)
+            else:
+                valid.append((movie, actor_ids, genres))
+        if not valid:
+            return created, tags
+
+        Movie.objects.bulk_create([movie for movie, _, _ in valid], batch_size=500)
+        created['movies'] = len(valid)
+
+        # Vazeb je řádově víc než filmů, vkládáme je bez vytváření instancí modelů
+        actor_links = [(movie.id, pk) for movie, actor_ids, _ in valid for pk in actor_ids]
+        insert_links(Movie.actors.through, 'movie_id', 'person_id', actor_links)
+        created['actorLinks'] = len(actor_links)
+
+        genre_links = [
+            (movie.id, genre_id) for movie, _, genres in valid for genre_id in self.genre_ids(genres)
+        ]
+        insert_links(MovieGenre, 'movie_id', 'genre_id', genre_links)
+        stats.record_movies([movie.id for movie, _, _ in valid])
+
+        # bulk_create neposílá signály, cache zneplatníme za celou dávku
+        tags.update(('movies:all', 'genres'))
+        tags.update(f'movies:director:{movie.director_id}' for movie, _, _ in valid)
+        tags.update(f'movies:actor:{pk}' for _, actor_ids, _ in valid for pk in actor_ids)
+        tags.update(f'movies:genre:{name}' for _, _, genres in valid for name in genres)
+        return created, tags
@@ -0,0 +1,156 @@
+# api/jobs.py
+import logging
+import os
+import random
+import socket
+import threading
+import time
+import traceback
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import close_old_connections, connections
+from django.db.models import F
+from django.utils import timezone
+
+from .models import Job
+
+logger = logging.getLogger('api.jobs')
+
+
+# Fronta úloh na pozadí nad tabulkou Job, bez externího brokeru.
+#
+# View úlohu jen založí (enqueue) a vrátí 202 s jejím id, práci udělá proces
+# manage.py run_worker. Worker si úlohu zabere podmíněným UPDATE (status queued ->
+# running), takže se o jednu úlohu nepoperou ani workery v různých procesech.
+# Chybná úloha se zopakuje s exponenciálním odkladem, po maxAttempts pokusech
+# skončí jako failed. Úlohy workeru, který spadl, vrátí do fronty requeue_stale().
+
+TASKS = {}
+
+
+def task(name, max_attempts=None):
+    # Registrace funkce jako úlohy; parametry dostane z Job.payload, výsledek musí jít do JSON
+    def decorator(func):
+        TASKS[name] = (func, max_attempts)
+        return func
+    return decorator
+
+
+def enqueue(kind, payload=None, user=None, max_attempts=None):
+    if kind not in TASKS:
+        raise ValueError(f"Unknown job kind: {kind}.")
+    default_attempts = TASKS[kind][1]
+    return Job.objects.create(
+        kind=kind,
+        payload=payload or {},
+        user=user if user is not None and user.is_authenticated else None,
+        maxAttempts=max_attempts or default_attempts or getattr(settings, 'API_JOB_MAX_ATTEMPTS', 3),
+    )
+
+
+def claim(worker):
+    now = timezone.now()
+    pending = Job.objects.filter(status='queued', runAt__lte=now).order_by('runAt', 'id')
+    for pk in pending.values_list('id', flat=True)[:10]:
+        # Úlohu mezitím mohl zabrat jiný worker, pak zkusíme další
+        claimed = Job.objects.filter(pk=pk, status='queued').update(
+            status='running', worker=worker, startedAt=now, attempts=F('attempts') + 1,
+        )
+        if claimed:
+            return Job.objects.get(pk=pk)
+    return None
+
+
+def retry_delay(attempt):
+    # Exponenciální odklad s náhodným rozptylem, aby se opakované úlohy nespouštěly naráz
+    base = getattr(settings, 'API_JOB_RETRY_DELAY', 10)
+    delay = min(getattr(settings, 'API_JOB_RETRY_MAX_DELAY', 600), base * 2 ** (attempt - 1))
+    return timedelta(seconds=delay * random.uniform(0.5, 1.0))
+
+
+def run(job):
+    func = TASKS.get(job.kind, (None, None))[0]
+    try:
+        if func is None:
+            raise LookupError(f"Unknown job kind: {job.kind}.")
+        result = func(**job.payload)
+    except Exception:
+        error = traceback.format_exc()
+        now = timezone.now()
+        if func is not None and job.attempts < job.maxAttempts:
+            logger.warning("Job %s (%s) failed, attempt %d of %d", job.pk, job.kind, job.attempts, job.maxAttempts)
+            Job.objects.filter(pk=job.pk).update(
+                status='queued', runAt=now + retry_delay(job.attempts), error=error, worker='',
+            )
+        else:
+            logger.error("Job %s (%s) failed permanently", job.pk, job.kind)
+            Job.objects.filter(pk=job.pk).update(status='failed', error=error, finishedAt=now)
+        return False
+    Job.objects.filter(pk=job.pk).update(status='done', result=result, error='', finishedAt=timezone.now())
+    return True
+
+
+def requeue_stale(timeout=None):
+    # Úlohy, které běží déle než API_JOB_TIMEOUT, patří workeru, který skončil uprostřed práce
+    timeout = timeout or getattr(settings, 'API_JOB_TIMEOUT', 3600)
+    now = timezone.now()
+    stale = Job.objects.filter(status='running', startedAt__lt=now - timedelta(seconds=timeout))
+    requeued = stale.filter(attempts__lt=F('maxAttempts')).update(status='queued', runAt=now, worker='')
+    failed = stale.update(status='failed', error="The worker did not finish the job in time.", finishedAt=now)
+    return requeued + failed
+
+
+class Worker:
+    def __init__(self, concurrency=1, poll_interval=1.0, name=None):
+        self.concurrency = concurrency
+        self.poll_interval = poll_interval
+        self.name = name or f'{socket.gethostname()}:{os.getpid()}'
+        self.stopping = threading.Event()
+        self.processed = 0
+        self.lock = threading.Lock()
+
+    def stop(self):
+        # Rozpracované úlohy se dokončí, nové se už nezabírají
+        self.stopping.set()
+
+    def run(self, burst=False):
+        # burst: zpracuje, co je ve frontě, a skončí (cron, testy)
+        requeue_stale()
+        if self.concurrency == 1:
+            self.loop(self.name, burst)
+            return self.processed
+        threads = [
+            threading.Thread(target=self.loop, args=(f'{self.name}/{n}', burst), name=f'job-worker-{n}')
+            for n in range(self.concurrency)
+        ]
+        for thread in threads:
+            thread.start()
+        last_check = time.monotonic()
+        while any(thread.is_alive() for thread in threads):
+            for thread in threads:
+                thread.join(timeout=self.poll_interval)
+            if time.monotonic() - last_check > 60:
+                requeue_stale()
+                last_check = time.monotonic()
+        return self.processed
+
+    def loop(self, name, burst):
+        try:
+            while not self.stopping.is_set():
+                if not burst:
+                    # Dlouho běžící proces: vadné nebo staré spojení (CONN_MAX_AGE) zavřeme jako po požadavku
+                    close_old_connections()
+                job = claim(name)
+                if job is None:
+                    if burst:
+                        break
+                    self.stopping.wait(self.poll_interval)
+                    continue
+                logger.info("Job %s (%s) started by %s", job.pk, job.kind, name)
+                run(job)
+                with self.lock:
+                    self.processed += 1
+        finally:
+            if self.concurrency > 1:
+                connections.close_all()
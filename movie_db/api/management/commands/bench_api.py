@@ -0,0 +1,54 @@
+# api/management/commands/bench_api.py
+import json
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from api import benchmark
+from api.models import Person, Movie
+
+
+class Command(BaseCommand):
+    help = ("Změří všechny endpointy API (p50/p95/p99, propustnost, počet SQL dotazů) a vypíše JSON. "
+            "Bez --url běží in-process a zápisy se na konci odvolají.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=100, help="Měřených požadavků na endpoint")
+        parser.add_argument('--warmup', type=int, default=5)
+        parser.add_argument('--only', nargs='+', help="Jen endpointy, jejichž název obsahuje některé ze slov")
+        parser.add_argument('--skip', nargs='+', help="Vynechat endpointy, jejichž název obsahuje některé ze slov")
+        parser.add_argument('--cold', action='store_true', help="Před každým požadavkem vyprázdnit cache odpovědí")
+        parser.add_argument('--url', help="Měřit běžící server (např. http://127.0.0.1:8000), jen GET")
+        parser.add_argument('--token', help="Token pro --url (hlavička Authorization: Token ...)")
+        parser.add_argument('--concurrency', type=int, default=4, help="Souběžných požadavků pro --url")
+        parser.add_argument('--output', help="Soubor pro JSON, jinak standardní výstup")
+
+    def handle(self, requests=100, warmup=5, only=None, skip=None, cold=False, url=None, token=None,
+               concurrency=4, output=None, **options):
+        if requests < 1:
+            raise CommandError("--requests must be at least 1.")
+        report = {
+            'commit': benchmark.git_commit(),
+            'timestamp': int(time.time()),
+            'mode': 'http' if url else 'in-process',
+            'requests': requests,
+            'catalogue': {'movies': Movie.objects.count(), 'people': Person.objects.count()},
+        }
+        try:
+            if url:
+                report['concurrency'] = concurrency
+                report['endpoints'] = benchmark.run_http(url, token, requests, warmup, concurrency, only, skip)
+            else:
+                report['cold'] = cold
+                report['endpoints'], report['uncovered'] = benchmark.run_in_process(
+                    requests, warmup, only, skip, cold
+                )
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        data = json.dumps(report, indent=2, ensure_ascii=False)
+        if output:
+            with open(output, 'w', encoding='utf-8') as f:
+                f.write(data + '\n')
+        else:
+            self.stdout.write(data)
@@ -0,0 +1,28 @@
+# api/management/commands/build_similarity.py
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from api import similarity
+
+
+class Command(BaseCommand):
+    help = ("Přepočítá tabulku podobných filmů (/api/movies/<id>/related/) ze společných herců, "
+            "režisérů a žánrů. S --changed jen filmy změněné od posledního výpočtu.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--changed', action='store_true',
+                            help="Recompute only movies changed since the last build and their neighbours.")
+        parser.add_argument('--top-k', type=int, default=getattr(settings, 'API_SIMILARITY_TOP_K', 10),
+                            help="Number of related movies stored per movie.")
+
+    def handle(self, **options):
+        if options['changed']:
+            result = similarity.refresh(options['top_k'])
+            self.stdout.write(self.style.SUCCESS(
+                f"Refreshed {result['movies']} movies ({result['changed']} changed)."
+            ))
+        else:
+            result = similarity.rebuild(options['top_k'])
+            self.stdout.write(self.style.SUCCESS(
+                f"Built {result['rows']} related-movie rows for {result['movies']} movies."
+            ))
@@ -0,0 +1,23 @@
+# api/management/commands/catalog_snapshot.py
+import time
+
+from django.core.management.base import BaseCommand
+
+from api.snapshot import CatalogSnapshot
+
+
+class Command(BaseCommand):
+    help = "Načte snímek katalogu v paměti (API_CATALOG_SNAPSHOT) a vypíše dobu načtení a spotřebu paměti."
+
+    def handle(self, **options):
+        start = time.perf_counter()
+        snapshot = CatalogSnapshot.load(version=None)
+        elapsed = time.perf_counter() - start
+        movies, size = len(snapshot), snapshot.nbytes()
+        self.stdout.write(f"Movies: {movies}, people: {len(snapshot.person_ids)}, "
+                          f"actor links: {len(snapshot.actor_ids)}, genre links: {len(snapshot.genre_codes)}")
+        self.stdout.write(f"Loaded in {elapsed:.2f} s, {size / 2 ** 20:.1f} MiB")
+        if movies:
+            self.stdout.write(self.style.SUCCESS(
+                f"{size / movies:.0f} bytes per movie, ~{size / movies * 10 ** 6 / 2 ** 20:.0f} MiB per million movies"
+            ))
@@ -0,0 +1,48 @@
+# api/management/commands/export_catalog.py
+from django.core.management.base import BaseCommand, CommandError
+
+from api.exporter import CHUNK_SIZE, export_lines
+from api.filters import filter_movies
+from api.models import Movie
+
+
+class Command(BaseCommand):
+    help = "Export osob a filmů do NDJSON nebo CSV (formát, který umí import_catalog)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', nargs='?', default='-', help="Výstupní soubor, nebo - pro standardní výstup")
+        parser.add_argument('--format', choices=['ndjson', 'csv'], help="Výchozí podle přípony souboru")
+        parser.add_argument('--type', dest='kind', choices=['all', 'movies', 'people'], default='all',
+                            help="CSV umí jen movies nebo people")
+        parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE)
+        # Stejné filtry jako /api/api/movies/
+        parser.add_argument('--director', dest='directorID')
+        parser.add_argument('--actor', dest='actorID')
+        parser.add_argument('--genre')
+        parser.add_argument('--from-year', dest='fromYear')
+        parser.add_argument('--to-year', dest='toYear')
+
+    def handle(self, path='-', format=None, kind='all', chunk_size=CHUNK_SIZE, **options):
+        if format is None:
+            format = 'csv' if path.endswith('.csv') else 'ndjson'
+        if format == 'csv' and kind == 'all':
+            raise CommandError("CSV export needs --type movies or --type people.")
+
+        params = {key: options[key] for key in ('directorID', 'actorID', 'genre', 'fromYear', 'toYear') if options[key]}
+        if params and kind != 'movies':
+            raise CommandError("Filters apply only to --type movies.")
+        try:
+            movies = filter_movies(Movie.objects.all(), params)
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        lines = export_lines(kind, format, movies=movies, chunk_size=chunk_size)
+        if path == '-':
+            for line in lines:
+                self.stdout.write(line, ending='')
+            return
+        try:
+            with open(path, 'w', encoding='utf-8', newline='') as stream:
+                stream.writelines(lines)
+        except OSError as e:
+            raise CommandError(str(e))
@@ -0,0 +1,39 @@
+# api/management/commands/import_catalog.py
+import json
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from api.importer import CatalogImporter, iter_csv, iter_ndjson
+
+
+class Command(BaseCommand):
+    help = "Hromadný import osob a filmů z NDJSON nebo CSV (po dávkách přes bulk_create)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="Soubor NDJSON/CSV, nebo - pro standardní vstup")
+        parser.add_argument('--format', choices=['ndjson', 'csv'], help="Výchozí podle přípony souboru")
+        parser.add_argument('--type', dest='default_type', choices=['movie', 'person'], default='movie',
+                            help="Typ řádků bez sloupce type")
+        parser.add_argument('--chunk-size', type=int, default=2000)
+
+    def handle(self, path, format=None, default_type='movie', chunk_size=2000, **options):
+        if format is None:
+            format = 'csv' if path.endswith('.csv') else 'ndjson'
+        try:
+            stream = sys.stdin if path == '-' else open(path, encoding='utf-8', newline='')
+        except OSError as e:
+            raise CommandError(str(e))
+
+        importer = CatalogImporter(chunk_size=chunk_size, default_type=default_type)
+        with stream:
+            records = iter_csv(stream) if format == 'csv' else iter_ndjson(stream)
+            result = importer.run(records)
+
+        for error in result['errors']:
+            self.stderr.write(f"line {error['line']}: {json.dumps(error['error'], ensure_ascii=False)}")
+        created = result['created']
+        self.stdout.write(self.style.SUCCESS(
+            f"Imported {created['people']} people, {created['movies']} movies, "
+            f"{created['actorLinks']} actor links; {result['errorCount']} rows failed."
+        ))
@@ -0,0 +1,15 @@
+# api/management/commands/rebuild_stats.py
+from django.core.management.base import BaseCommand
+
+from api import stats
+
+
+class Command(BaseCommand):
+    help = ("Přepočítá souhrnné počty pro filmografie a /api/stats/ z tabulek filmů a vazeb "
+            "(po hromadných změnách mimo signály, např. QuerySet.update() nebo SQL).")
+
+    def handle(self, **options):
+        result = stats.rebuild()
+        self.stdout.write(self.style.SUCCESS(
+            f"Rebuilt stats for {result['people']} people, {result['genres']} genres, {result['years']} years."
+        ))
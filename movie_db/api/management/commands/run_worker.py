@@ -0,0 +1,34 @@
+# api/management/commands/run_worker.py
+import signal
+
+from django.core.management.base import BaseCommand
+
+from api.jobs import Worker
+
+
+class Command(BaseCommand):
+    help = ("Spustí worker fronty úloh (api/jobs.py): mazání osob, zakládání filmů a importy "
+            "odeslané s Prefer: respond-async a údržbové úlohy z /api/jobs/.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--concurrency', type=int, default=1,
+                            help="Number of jobs processed in parallel (threads).")
+        parser.add_argument('--poll-interval', type=float, default=1.0,
+                            help="Seconds to wait before polling an empty queue again.")
+        parser.add_argument('--burst', action='store_true',
+                            help="Process the jobs that are due and exit.")
+
+    def handle(self, **options):
+        worker = Worker(concurrency=options['concurrency'], poll_interval=options['poll_interval'])
+
+        # Rozpracované úlohy se při ukončení dokončí
+        def stop(signum, frame):
+            self.stdout.write("Stopping after the running jobs finish...")
+            worker.stop()
+
+        signal.signal(signal.SIGTERM, stop)
+        signal.signal(signal.SIGINT, stop)
+
+        self.stdout.write(f"Worker {worker.name} started, concurrency {worker.concurrency}.")
+        processed = worker.run(burst=options['burst'])
+        self.stdout.write(self.style.SUCCESS(f"Processed {processed} jobs."))
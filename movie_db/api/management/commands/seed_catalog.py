@@ -0,0 +1,25 @@
+# api/management/commands/seed_catalog.py
+from django.core.management.base import BaseCommand, CommandError
+
+from api.seeding import CatalogSeeder
+
+
+class Command(BaseCommand):
+    help = "Naplní databázi syntetickým katalogem osob a filmů (pro vývoj a měření výkonu)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--movies', type=int, default=10000)
+        parser.add_argument('--people', type=int, default=5000, help="Z toho 10 % režisérů")
+        parser.add_argument('--seed', type=int, help="Stejný seed = stejná data")
+        parser.add_argument('--chunk-size', type=int, default=2000)
+
+    def handle(self, movies=10000, people=5000, seed=None, chunk_size=2000, **options):
+        if movies < 0 or people < 0:
+            raise CommandError("Counts must not be negative.")
+        try:
+            result = CatalogSeeder(seed=seed, chunk_size=chunk_size).run(movies, people)
+        except ValueError as e:
+            raise CommandError(str(e))
+        self.stdout.write(self.style.SUCCESS(
+            f"Seeded {result['people']} people, {result['movies']} movies, {result['actorLinks']} actor links."
+        ))
@@ -0,0 +1,291 @@
+# api/middleware.py
+import importlib.util
+import json
+import logging
+import random
+import re
+import time
+import zlib
+from collections import Counter
+from contextlib import ExitStack
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.utils.cache import patch_vary_headers
+
+from .routers import READ_ALIAS, read_only_request
+from .snapshot import catalog_snapshot
+
+logger = logging.getLogger('api.timing')
+
+
+# Měření požadavků: počet SQL dotazů, čas v databázi, ve view a při serializaci
+# odpovědi (render DRF). Výsledek jde do hlavičky Server-Timing a do logu api.timing.
+# Opakované dotazy se stejným tvarem (typicky N+1) se nahlásí jako varování.
+#
+# Zapíná se nastavením API_TIMING_SAMPLE_RATE (0 = vypnuto, 1 = každý požadavek),
+# neměřené požadavky stojí jen jedno volání random().
+
+IN_LIST_RE = re.compile(r'IN \((?:%s, )*%s\)')
+WHITESPACE_RE = re.compile(r'\s+')
+
+
+def fingerprint(sql):
+    # Parametry jsou v SQL jako %s, stačí sjednotit délku seznamů IN (...)
+    return WHITESPACE_RE.sub(' ', IN_LIST_RE.sub('IN (...)', sql)).strip()
+
+
+class RequestTimer:
+    def __init__(self):
+        self.queries = Counter()
+        self.query_count = 0
+        self.db_time = 0.0
+        self.view_start = self.view_end = None
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.db_time += time.perf_counter() - start
+            self.query_count += 1
+            self.queries[sql] += 1
+
+    def duplicates(self, threshold):
+        by_fingerprint = Counter()
+        for sql, count in self.queries.items():
+            by_fingerprint[fingerprint(sql)] += count
+        return [(sql, count) for sql, count in by_fingerprint.most_common() if count >= threshold]
+
+
+class QueryTimingMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.sample_rate = getattr(settings, 'API_TIMING_SAMPLE_RATE', 0)
+        self.duplicate_threshold = getattr(settings, 'API_TIMING_DUPLICATE_THRESHOLD', 5)
+        if not self.sample_rate:
+            raise MiddlewareNotUsed
+
+    def __call__(self, request):
+        if self.sample_rate < 1 and random.random() >= self.sample_rate:
+            return self.get_response(request)
+
+        timer = request._api_timer = RequestTimer()
+        start = time.perf_counter()
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(timer))
+            response = self.get_response(request)
+        end = time.perf_counter()
+        self.report(request, response, timer, start, end)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        timer = getattr(request, '_api_timer', None)
+        if timer is not None:
+            timer.view_start = time.perf_counter()
+
+    def process_template_response(self, request, response):
+        # Volá se po návratu z view a před renderem (DRF Response), zbytek je serializace odpovědi
+        timer = getattr(request, '_api_timer', None)
+        if timer is not None:
+            timer.view_end = time.perf_counter()
+        return response
+
+    def report(self, request, response, timer, start, end):
+        total = end - start
+        view = serialize = None
+        if timer.view_start is not None:
+            view = (timer.view_end or end) - timer.view_start
+            if timer.view_end is not None:
+                serialize = end - timer.view_end
+
+        metrics = [f'db;dur={timer.db_time * 1000:.2f};desc="{timer.query_count} queries"']
+        if view is not None:
+            metrics.append(f'view;dur={view * 1000:.2f}')
+        if serialize is not None:
+            metrics.append(f'serialize;dur={serialize * 1000:.2f}')
+        metrics.append(f'total;dur={total * 1000:.2f}')
+        response['Server-Timing'] = ', '.join(metrics)
+
+        duplicates = timer.duplicates(self.duplicate_threshold)
+        record = {
+            'method': request.method,
+            'path': request.path,
+            'status': response.status_code,
+            'queries': timer.query_count,
+            'db_ms': round(timer.db_time * 1000, 2),
+            'view_ms': None if view is None else round(view * 1000, 2),
+            'serialize_ms': None if serialize is None else round(serialize * 1000, 2),
+            'total_ms': round(total * 1000, 2),
+        }
+        if duplicates:
+            record['duplicates'] = [{'sql': sql[:500], 'count': count} for sql, count in duplicates]
+            logger.warning('N+1 %s', json.dumps(record, ensure_ascii=False))
+        else:
+            logger.info('%s', json.dumps(record, ensure_ascii=False))
+
+
+class ReadOnlyRequestMiddleware:
+    # Požadavky bez zápisu čtou přes spojení READ_ALIAS (api/routers.py).
+    # Bez tohoto spojení v DATABASES se middleware vypne.
+    SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if READ_ALIAS not in settings.DATABASES:
+            raise MiddlewareNotUsed
+
+    def __call__(self, request):
+        if request.method not in self.SAFE_METHODS:
+            return self.get_response(request)
+        token = read_only_request.set(True)
+        try:
+            return self.get_response(request)
+        finally:
+            read_only_request.reset(token)
+
+
+class CatalogSnapshotMiddleware:
+    # Načte snímek katalogu (api/snapshot.py) při startu workeru, ne až při prvním požadavku.
+    # Bez API_CATALOG_SNAPSHOT se middleware vypne.
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if not getattr(settings, 'API_CATALOG_SNAPSHOT', False):
+            raise MiddlewareNotUsed
+        catalog_snapshot.start()
+
+    def __call__(self, request):
+        return self.get_response(request)
+
+
+# Komprese odpovědí podle Accept-Encoding: zstd (balíček zstandard), br (balíček brotli)
+# a gzip (vždy). Při shodě q-hodnot rozhoduje pořadí v API_COMPRESSION_ENCODINGS.
+# Odpovědi menší než API_COMPRESSION_MIN_SIZE se posílají beze změny, streamované
+# odpovědi (export) se komprimují průběžně. Vypíná se API_COMPRESSION=0, např. když
+# komprimuje reverzní proxy.
+
+def gzip_compressor(level):
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    return compressor.compress, compressor.flush
+
+
+def brotli_compressor(level):
+    import brotli
+    compressor = brotli.Compressor(quality=level)
+    return compressor.process, compressor.finish
+
+
+def zstd_compressor(level):
+    import zstandard
+    compressor = zstandard.ZstdCompressor(level=level).compressobj()
+    return compressor.compress, compressor.flush
+
+
+COMPRESSORS = {'gzip': gzip_compressor}
+if importlib.util.find_spec('brotli') is not None:
+    COMPRESSORS['br'] = brotli_compressor
+if importlib.util.find_spec('zstandard') is not None:
+    COMPRESSORS['zstd'] = zstd_compressor
+
+
+def accepted_encodings(header):
+    # {kódování: q} z hlavičky Accept-Encoding
+    accepted = {}
+    for item in header.split(','):
+        name, _, params = item.strip().partition(';')
+        quality = 1.0
+        for param in params.split(';'):
+            key, _, value = param.strip().partition('=')
+            if key == 'q':
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        if name:
+            accepted[name.strip().lower()] = quality
+    return accepted
+
+
+def negotiate_encoding(header, encodings):
+    accepted = accepted_encodings(header)
+    best, best_quality = None, 0.0
+    for encoding in encodings:
+        quality = accepted.get(encoding, accepted.get('*', 0.0))
+        if quality > best_quality:
+            best, best_quality = encoding, quality
+    return best
+
+
+class CompressionMiddleware:
+    # Pod ASGI běží async, jinak by Django celý řetězec obalil sync_to_async (jedno vlákno)
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+        if not getattr(settings, 'API_COMPRESSION', True):
+            raise MiddlewareNotUsed
+        self.min_size = getattr(settings, 'API_COMPRESSION_MIN_SIZE', 1024)
+        self.levels = getattr(settings, 'API_COMPRESSION_LEVELS', {})
+        preferred = getattr(settings, 'API_COMPRESSION_ENCODINGS', ['zstd', 'br', 'gzip'])
+        self.encodings = [encoding for encoding in preferred if encoding in COMPRESSORS]
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        return self.compress(request, self.get_response(request))
+
+    async def __acall__(self, request):
+        return self.compress(request, await self.get_response(request))
+
+    def compress(self, request, response):
+        if response.has_header('Content-Encoding') or response.status_code in (204, 304):
+            return response
+        patch_vary_headers(response, ('Accept-Encoding',))
+        if 'no-transform' in response.get('Cache-Control', ''):
+            return response
+        if not response.streaming and len(response.content) < self.min_size:
+            return response
+        encoding = negotiate_encoding(request.META.get('HTTP_ACCEPT_ENCODING', ''), self.encodings)
+        if encoding is None:
+            return response
+
+        compress, flush = COMPRESSORS[encoding](self.levels.get(encoding, 6))
+        if response.streaming:
+            stream = self.acompress_stream if response.is_async else self.compress_stream
+            response.streaming_content = stream(response.streaming_content, compress, flush)
+            del response['Content-Length']
+        else:
+            content = compress(response.content) + flush()
+            if len(content) >= len(response.content):
+                return response
+            response.content = content
+            response['Content-Length'] = str(len(content))
+        # Silný ETag by po kompresi neodpovídal bajtům odpovědi
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response['ETag'] = 'W/' + etag
+        response['Content-Encoding'] = encoding
+        return response
+
+    @staticmethod
+    def compress_stream(chunks, compress, flush):
+        for chunk in chunks:
+            data = compress(chunk)
+            if data:
+                yield data
+        yield flush()
+
+    @staticmethod
+    async def acompress_stream(chunks, compress, flush):
+        async for chunk in chunks:
+            data = compress(chunk)
+            if data:
+                yield data
+        yield flush()
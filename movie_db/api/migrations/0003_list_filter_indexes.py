@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-18 06:41
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0002_keyset_pagination_indexes'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='movie',
+            index=models.Index(fields=['year', 'id'], name='movie_year_id_idx'),
+        ),
+        # Automaticky vytvořená M2M tabulka nemá Meta.indexes, index přidáme ručně.
+        # Pořadí (person_id, movie_id) pokrývá filtr actorID bez čtení tabulky.
+        migrations.RunSQL(
+            'CREATE INDEX api_movie_actors_person_movie_idx ON api_movie_actors (person_id, movie_id)',
+            reverse_sql='DROP INDEX api_movie_actors_person_movie_idx',
+        ),
+    ]
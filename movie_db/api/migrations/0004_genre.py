@@ -0,0 +1,96 @@
+# Generated by Django 5.2.18 on 2026-10-18 06:42
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+# Žánry, které dříve vracel GenreListView natvrdo
+DEFAULT_GENRES = ["sci-fi", "adventure", "action", "romantic", "animated", "comedy"]
+
+
+def copy_genres(apps, schema_editor):
+    Genre = apps.get_model('api', 'Genre')
+    Movie = apps.get_model('api', 'Movie')
+    MovieGenre = apps.get_model('api', 'MovieGenre')
+
+    genres = {}
+
+    def genre_id(name):
+        if name not in genres:
+            genres[name] = Genre.objects.create(name=name).id
+        return genres[name]
+
+    for name in DEFAULT_GENRES:
+        genre_id(name)
+
+    links = []
+    for movie_id, names in Movie.objects.values_list('id', 'genres_json').iterator(chunk_size=2000):
+        for name in dict.fromkeys(names or []):
+            links.append(MovieGenre(movie_id=movie_id, genre_id=genre_id(str(name))))
+        if len(links) >= 2000:
+            MovieGenre.objects.bulk_create(links)
+            links = []
+    MovieGenre.objects.bulk_create(links)
+
+
+def restore_genres(apps, schema_editor):
+    Movie = apps.get_model('api', 'Movie')
+    MovieGenre = apps.get_model('api', 'MovieGenre')
+
+    names = {}
+    for movie_id, name in MovieGenre.objects.order_by('id').values_list('movie_id', 'genre__name'):
+        names.setdefault(movie_id, []).append(name)
+    for movie in Movie.objects.only('id').iterator():
+        movie.genres_json = names.get(movie.id, [])
+        movie.save(update_fields=['genres_json'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0003_list_filter_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Genre',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100, unique=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='MovieGenre',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('genre', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='movie_links', to='api.genre')),
+                ('movie', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='genre_links', to='api.movie')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['genre', 'movie'], name='moviegenre_genre_movie_idx')],
+                'constraints': [models.UniqueConstraint(fields=('movie', 'genre'), name='moviegenre_movie_genre_uniq')],
+            },
+        ),
+        # Původní JSON pole dočasně přejmenujeme, aby se jméno uvolnilo pro M2M vazbu
+        migrations.RenameField(
+            model_name='movie',
+            old_name='genres',
+            new_name='genres_json',
+        ),
+        migrations.RunPython(copy_genres, restore_genres),
+        # Výchozí hodnota jen kvůli zpětné migraci (znovupřidání sloupce k existujícím řádkům)
+        migrations.AlterField(
+            model_name='movie',
+            name='genres_json',
+            field=models.JSONField(default=list),
+        ),
+        migrations.RemoveField(
+            model_name='movie',
+            name='genres_json',
+        ),
+        migrations.AddField(
+            model_name='movie',
+            name='genres',
+            field=models.ManyToManyField(related_name='movies', through='api.MovieGenre', to='api.genre'),
+        ),
+    ]
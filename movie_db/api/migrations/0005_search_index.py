@@ -0,0 +1,88 @@
+# Generated by Django 5.2.18 on 2026-10-18 07:05
+
+from django.db import migrations
+
+# SQL je v migraci opsané: pozdější změny api/search.py nesmí změnit, co tato migrace dělá
+
+CREATE_TABLE_SQL = """
+CREATE VIRTUAL TABLE IF NOT EXISTS api_search USING fts5(
+    name, biography, kind UNINDEXED,
+    tokenize = 'unicode61 remove_diacritics 2',
+    prefix = '2 3'
+)
+"""
+
+RANK_SQL = "INSERT INTO api_search(api_search, rank) VALUES ('rank', 'bm25(10.0, 1.0)')"
+
+POPULATE_SQL = [
+    "INSERT INTO api_search(rowid, name, biography, kind) SELECT id * 2, name, '', 'movie' FROM api_movie",
+    "INSERT INTO api_search(rowid, name, biography, kind) SELECT id * 2 + 1, name, biography, role FROM api_person",
+]
+
+TRIGGERS_SQL = [
+    """
+    CREATE TRIGGER IF NOT EXISTS api_movie_search_insert AFTER INSERT ON api_movie BEGIN
+        INSERT INTO api_search(rowid, name, biography, kind) VALUES (new.id * 2, new.name, '', 'movie');
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS api_movie_search_update AFTER UPDATE OF name ON api_movie BEGIN
+        UPDATE api_search SET name = new.name WHERE rowid = new.id * 2;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS api_movie_search_delete AFTER DELETE ON api_movie BEGIN
+        DELETE FROM api_search WHERE rowid = old.id * 2;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS api_person_search_insert AFTER INSERT ON api_person BEGIN
+        INSERT INTO api_search(rowid, name, biography, kind) VALUES (new.id * 2 + 1, new.name, new.biography, new.role);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS api_person_search_update AFTER UPDATE OF name, biography, role ON api_person BEGIN
+        UPDATE api_search SET name = new.name, biography = new.biography, kind = new.role
+        WHERE rowid = new.id * 2 + 1;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS api_person_search_delete AFTER DELETE ON api_person BEGIN
+        DELETE FROM api_search WHERE rowid = old.id * 2 + 1;
+    END
+    """,
+]
+
+TRIGGERS = ('api_movie_search_insert', 'api_movie_search_update', 'api_movie_search_delete',
+            'api_person_search_insert', 'api_person_search_update', 'api_person_search_delete')
+
+
+def create_search_index(apps, schema_editor):
+    # FTS5 je jen v SQLite, na ostatních databázích index nevytváříme
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    schema_editor.execute(CREATE_TABLE_SQL)
+    schema_editor.execute(RANK_SQL)
+    for sql in POPULATE_SQL:
+        schema_editor.execute(sql)
+    for sql in TRIGGERS_SQL:
+        schema_editor.execute(sql)
+
+
+def drop_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    for trigger in TRIGGERS:
+        schema_editor.execute(f'DROP TRIGGER IF EXISTS {trigger}')
+    schema_editor.execute('DROP TABLE IF EXISTS api_search')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0004_genre'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -0,0 +1,53 @@
+# Generated by Django 5.2.18 on 2026-10-18 07:25
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+POPULATE_SQL = [
+    'INSERT INTO api_yearstats (year, "movieCount") SELECT year, COUNT(*) FROM api_movie GROUP BY year',
+    'INSERT INTO api_genrestats (genre_id, "movieCount") SELECT genre_id, COUNT(*) FROM api_moviegenre GROUP BY genre_id',
+    """
+    INSERT INTO api_personstats (person_id, "directedCount", "actedCount")
+    SELECT p.id,
+           (SELECT COUNT(*) FROM api_movie m WHERE m.director_id = p.id),
+           (SELECT COUNT(*) FROM api_movie_actors a WHERE a.person_id = p.id)
+    FROM api_person p
+    """,
+]
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0006_updated_at'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='GenreStats',
+            fields=[
+                ('genre', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='stats', serialize=False, to='api.genre')),
+                ('movieCount', models.IntegerField(db_default=0, default=0)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='YearStats',
+            fields=[
+                ('year', models.IntegerField(primary_key=True, serialize=False)),
+                ('movieCount', models.IntegerField(db_default=0, default=0)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='PersonStats',
+            fields=[
+                ('person', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='stats', serialize=False, to='api.person')),
+                ('directedCount', models.IntegerField(db_default=0, default=0)),
+                ('actedCount', models.IntegerField(db_default=0, default=0)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['directedCount', 'person'], name='personstats_directed_idx'), models.Index(fields=['actedCount', 'person'], name='personstats_acted_idx')],
+            },
+        ),
+        migrations.RunSQL(POPULATE_SQL, migrations.RunSQL.noop),
+    ]
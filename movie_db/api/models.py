@@ -1,7 +1,12 @@
 # api/models.py
 from django.db import models
+from django.db.models.signals import m2m_changed, pre_delete
+from django.dispatch import receiver
+from django.utils import timezone
 from django.contrib.auth.models import AbstractBaseUser, BaseUserManager
 
+from .signals import genres_changed
+
 # Uživatelský model
 class UserManager(BaseUserManager):
     def create_user(self, email, password=None, is_admin=False):
@@ -35,6 +40,42 @@ class Person(models.Model):
     country = models.CharField(max_length=100)
     biography = models.TextField()
     role = models.CharField(max_length=10, choices=ROLE_CHOICES)
+    updatedAt = models.DateTimeField(auto_now=True)  # Čas poslední změny (ETag / Last-Modified)
+
+    class Meta:
+        indexes = [
+            # Stránkování režisérů/herců: WHERE role = ? ORDER BY name, id
+            models.Index(fields=['role', 'name', 'id'], name='person_role_name_id_idx'),
+        ]
+
+# Žánr filmu
+class GenreQuerySet(models.QuerySet):
+    def resolve(self, names):
+        # Najde nebo založí žánry podle jmen, pořadí i bez duplicit zachová
+        names = list(dict.fromkeys(names))
+        genres = {genre.name: genre for genre in self.filter(name__in=names)}
+        missing = [name for name in names if name not in genres]
+        if missing:
+            self.bulk_create([Genre(name=name) for name in missing], ignore_conflicts=True)
+            genres.update({genre.name: genre for genre in self.filter(name__in=missing)})
+        return [genres[name] for name in names]
+
+class Genre(models.Model):
+    name = models.CharField(max_length=100, unique=True)
+
+    objects = GenreQuerySet.as_manager()
+
+# Queryset pro filmy
+class MovieQuerySet(models.QuerySet):
+    def for_api(self, director=True, actors=True, genres=True):
+        # Režisér přes JOIN, herci a žánry vždy jedním dotazem navíc (jen sloupce, které API potřebuje)
+        queryset = self.select_related('director') if director else self
+        lookups = []
+        if actors:
+            lookups.append(models.Prefetch('actors', queryset=Person.objects.only('id', 'name').order_by('id')))
+        if genres:
+            lookups.append(models.Prefetch('genre_links', queryset=MovieGenre.objects.select_related('genre').order_by('id')))
+        return queryset.prefetch_related(*lookups)
 
 # Model pro film
 class Movie(models.Model):
@@ -43,5 +84,157 @@ class Movie(models.Model):
     director = models.ForeignKey(Person, on_delete=models.CASCADE, related_name='directed_movies')  # Odkaz na režiséra
     actors = models.ManyToManyField(Person, related_name='acted_movies')  # Odkaz na herce
     isAvailable = models.BooleanField(default=True)
-    genres = models.JSONField()  # Předpokládám, že toto je JSONField
-    dateAdded = models.DateTimeField(auto_now_add=True)
\ No newline at end of file
+    genres = models.ManyToManyField(Genre, through='MovieGenre', related_name='movies')  # Žánry přes indexovanou vazbu
+    dateAdded = models.DateTimeField(auto_now_add=True)
+    updatedAt = models.DateTimeField(auto_now=True)  # Mění se i při změně herců nebo žánrů
+
+    objects = MovieQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            # Stránkování filmů: ORDER BY dateAdded DESC, id DESC
+            models.Index(fields=['dateAdded', 'id'], name='movie_dateadded_id_idx'),
+            # Filtry fromYear/toYear (samotný year pokrývá levý prefix)
+            models.Index(fields=['year', 'id'], name='movie_year_id_idx'),
+        ]
+
+    # API pracuje se žánry jako se seznamem řetězců v pořadí, v jakém byly zadány
+    @property
+    def genre_names(self):
+        if 'genre_links' in getattr(self, '_prefetched_objects_cache', {}):
+            return [link.genre.name for link in self.genre_links.all()]
+        return list(self.genre_links.order_by('id').values_list('genre__name', flat=True))
+
+    def set_genres(self, names):
+        old = dict(self.genre_links.values_list('genre_id', 'genre__name'))
+        genres = Genre.objects.resolve(names)
+        self.genre_links.all().delete()
+        MovieGenre.objects.bulk_create([MovieGenre(movie=self, genre=genre) for genre in genres])
+        getattr(self, '_prefetched_objects_cache', {}).pop('genre_links', None)
+        touch_movies([self.pk])
+        new = {genre.id: genre.name for genre in genres}
+        genres_changed.send(
+            sender=Movie, instance=self, names=set(old.values()) | set(new.values()),
+            added=new.keys() - old.keys(), removed=old.keys() - new.keys(),
+        )
+
+# Vazba film-žánr
+class MovieGenre(models.Model):
+    # Samostatné indexy cizích klíčů nejsou potřeba, pokrývají je složené indexy níže
+    movie = models.ForeignKey(Movie, on_delete=models.CASCADE, related_name='genre_links', db_index=False)
+    genre = models.ForeignKey(Genre, on_delete=models.CASCADE, related_name='movie_links', db_index=False)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['movie', 'genre'], name='moviegenre_movie_genre_uniq'),
+        ]
+        indexes = [
+            # Filtr genre: WHERE genre_id = ? -> movie_id přímo z indexu
+            models.Index(fields=['genre', 'movie'], name='moviegenre_genre_movie_idx'),
+        ]
+
+# Souhrnné počty pro filmografie a statistiky, udržované průběžně (api/stats.py).
+# Výchozí hodnoty jsou i v databázi, přičítání jde přes INSERT ... ON CONFLICT.
+class PersonStats(models.Model):
+    person = models.OneToOneField(Person, on_delete=models.CASCADE, primary_key=True, related_name='stats')
+    directedCount = models.IntegerField(default=0, db_default=0)
+    actedCount = models.IntegerField(default=0, db_default=0)
+
+    class Meta:
+        indexes = [
+            # Nejčastější režiséři/herci: ORDER BY count DESC (index se čte pozpátku)
+            models.Index(fields=['directedCount', 'person'], name='personstats_directed_idx'),
+            models.Index(fields=['actedCount', 'person'], name='personstats_acted_idx'),
+        ]
+
+class GenreStats(models.Model):
+    genre = models.OneToOneField(Genre, on_delete=models.CASCADE, primary_key=True, related_name='stats')
+    movieCount = models.IntegerField(default=0, db_default=0)
+
+class YearStats(models.Model):
+    year = models.IntegerField(primary_key=True)
+    movieCount = models.IntegerField(default=0, db_default=0)
+
+# Podobné filmy: TOP_K sousedů každého filmu, předpočítané v api/similarity.py
+class MovieSimilarity(models.Model):
+    movie = models.ForeignKey(Movie, on_delete=models.CASCADE, related_name='similar', db_index=False)
+    related = models.ForeignKey(Movie, on_delete=models.CASCADE, related_name='+')
+    score = models.FloatField()
+
+    class Meta:
+        indexes = [
+            # Podobné filmy: WHERE movie_id = ? ORDER BY score DESC, related_id
+            models.Index(fields=['movie', '-score', 'related'], name='moviesimilarity_movie_idx'),
+        ]
+
+class MovieSimilarityState(models.Model):
+    # Kdy se sousedé filmu naposledy počítali; film s pozdějším updatedAt se přepočítá
+    movie = models.OneToOneField(Movie, on_delete=models.CASCADE, primary_key=True, related_name='similarity_state')
+    builtAt = models.DateTimeField()
+
+# Úloha na pozadí (api/jobs.py), zpracovává ji manage.py run_worker
+class Job(models.Model):
+    STATUS_CHOICES = [
+        ('queued', 'Queued'),
+        ('running', 'Running'),
+        ('done', 'Done'),
+        ('failed', 'Failed'),
+    ]
+    kind = models.CharField(max_length=50)
+    payload = models.JSONField(default=dict)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='queued')
+    attempts = models.IntegerField(default=0)
+    maxAttempts = models.IntegerField(default=3)
+    runAt = models.DateTimeField(default=timezone.now)  # Nejdřív kdy se smí spustit (odklad po chybě)
+    result = models.JSONField(null=True, blank=True)
+    error = models.TextField(blank=True, default='')
+    user = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name='jobs')
+    worker = models.CharField(max_length=100, blank=True, default='')
+    createdAt = models.DateTimeField(auto_now_add=True)
+    startedAt = models.DateTimeField(null=True, blank=True)
+    finishedAt = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            # Další úloha pro worker: WHERE status = 'queued' AND runAt <= ? ORDER BY runAt, id
+            models.Index(fields=['status', 'runAt', 'id'], name='job_status_runat_idx'),
+        ]
+
+
+# Změny vazeb (herci, žánry) se do řádku filmu samy nepropíší, updatedAt proto
+# posouváme ručně, aby ETag/Last-Modified seznamů i detailu odpovídaly obsahu.
+def group_by_movie(queryset, movie_ids, field, batch_size=900):
+    # Vazby filmů jedním dotazem na dávku: movie_id -> seznam hodnot v pořadí řazení querysetu
+    result = {}
+    movie_ids = list(movie_ids)
+    for start in range(0, len(movie_ids), batch_size):
+        batch = movie_ids[start:start + batch_size]
+        for movie_id, value in queryset.filter(movie_id__in=batch).values_list('movie_id', field):
+            result.setdefault(movie_id, []).append(value)
+    return result
+
+async def agroup_by_movie(queryset, movie_ids, field, batch_size=900):
+    result = {}
+    movie_ids = list(movie_ids)
+    for start in range(0, len(movie_ids), batch_size):
+        batch = movie_ids[start:start + batch_size]
+        async for movie_id, value in queryset.filter(movie_id__in=batch).values_list('movie_id', field):
+            result.setdefault(movie_id, []).append(value)
+    return result
+
+def touch_movies(movie_ids):
+    Movie.objects.filter(pk__in=list(movie_ids)).update(updatedAt=timezone.now())
+
+@receiver(m2m_changed, sender=Movie.actors.through)
+def movie_actors_touched(sender, instance, action, reverse, pk_set, **kwargs):
+    if action in ('post_add', 'post_remove'):
+        touch_movies(pk_set if reverse else [instance.pk])
+    elif action == 'pre_clear' and reverse:
+        touch_movies(instance.acted_movies.values_list('id', flat=True))
+    elif action == 'post_clear' and not reverse:
+        touch_movies([instance.pk])
+
+@receiver(pre_delete, sender=Person)
+def person_deleted_touch(sender, instance, **kwargs):
+    # Kaskáda odebere herce z filmů bez m2m_changed
+    touch_movies(instance.acted_movies.values_list('id', flat=True))
@@ -0,0 +1,143 @@
+# api/pagination.py
+import base64
+import json
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+# Společný základ: parametr limit s horní hranicí a odkaz na další stránku v hlavičce Link
+class BasePaginator:
+    limit_query_param = 'limit'
+
+    def __init__(self, default_limit=None, max_limit=None):
+        self.default_limit = default_limit or getattr(settings, 'API_PAGE_SIZE', 10)
+        self.max_limit = max_limit or getattr(settings, 'API_MAX_PAGE_SIZE', 100)
+        self.next_params = None
+        self.request = None
+
+    def get_limit(self, request):
+        limit = request.GET.get(self.limit_query_param)
+        if not limit:
+            return self.default_limit
+        try:
+            limit = int(limit)
+        except ValueError:
+            raise ValueError("Limit must be an integer.")
+        # Limit omezíme na serveru, klient nesmí stáhnout celou databázi
+        return max(1, min(limit, self.max_limit))
+
+    def get_next_link(self):
+        if self.next_params is None:
+            return None
+        url = self.request.build_absolute_uri()
+        for key, value in self.next_params.items():
+            url = replace_query_param(url, key, value)
+        return url
+
+    def get_paginated_response(self, data, **kwargs):
+        # Tělo odpovědi zůstává seznam, odkaz na další stránku je v hlavičce Link
+        response = Response(data, **kwargs)
+        next_link = self.get_next_link()
+        if next_link:
+            response['Link'] = f'<{next_link}>; rel="next"'
+        return response
+
+
+# Řazení seznamů; odpovídají jim složené indexy v api/models.py
+MOVIE_ORDERING = ('-dateAdded', '-id')
+PERSON_ORDERING = ('name', 'id')
+
+
+# Keyset (cursor) stránkování: další stránka se hledá podle hodnot posledního
+# řádku, ne přes OFFSET, takže stránka 10 000 stojí stejně jako stránka 1.
+class KeysetPaginator(BasePaginator):
+    cursor_query_param = 'cursor'
+
+    def __init__(self, ordering, default_limit=None, max_limit=None):
+        super().__init__(default_limit, max_limit)
+        # ordering = (klíč, 'id'), např. ('-dateAdded', '-id')
+        self.ordering = ordering
+        self.descending = ordering[0].startswith('-')
+        self.fields = [field.lstrip('-') for field in ordering]
+
+    def encode_cursor(self, row):
+        values = []
+        for field in self.fields:
+            value = row[field] if isinstance(row, dict) else getattr(row, field)
+            values.append(value.isoformat() if hasattr(value, 'isoformat') else value)
+        return base64.urlsafe_b64encode(json.dumps(values).encode()).decode().rstrip('=')
+
+    def decode_cursor(self, queryset, cursor):
+        try:
+            padded = cursor + '=' * (-len(cursor) % 4)
+            values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+            if not isinstance(values, list) or len(values) != len(self.fields):
+                raise ValueError
+            return [
+                queryset.model._meta.get_field(field).to_python(value)
+                for field, value in zip(self.fields, values)
+            ]
+        except (ValueError, TypeError, ValidationError):
+            raise ValueError("Invalid cursor.")
+
+    def apply_cursor(self, queryset, values):
+        key, pk = self.fields
+        key_value, pk_value = values
+        op = 'lt' if self.descending else 'gt'
+        # (key, id) < (k, i)  ==  key <= k AND (key < k OR id < i)
+        # První podmínka je rozsah nad indexem, druhá už jen dofiltruje shody.
+        return queryset.filter(**{f'{key}__{op}e': key_value}).filter(
+            Q(**{f'{key}__{op}': key_value}) | Q(**{f'{pk}__{op}': pk_value})
+        )
+
+    def get_page_queryset(self, queryset, request):
+        limit = self.get_limit(request)
+        queryset = queryset.order_by(*self.ordering)
+
+        cursor = request.GET.get(self.cursor_query_param)
+        if cursor:
+            queryset = self.apply_cursor(queryset, self.decode_cursor(queryset, cursor))
+
+        # O jeden řádek navíc, abychom věděli, jestli existuje další stránka
+        return queryset[:limit + 1], limit
+
+    def paginate_queryset(self, queryset, request):
+        queryset, limit = self.get_page_queryset(queryset, request)
+        return self.get_page(list(queryset), limit, request)
+
+    async def apaginate_queryset(self, queryset, request):
+        queryset, limit = self.get_page_queryset(queryset, request)
+        return self.get_page([row async for row in queryset], limit, request)
+
+    def get_page(self, rows, limit, request):
+        if len(rows) > limit:
+            rows = rows[:limit]
+            self.next_params = {self.cursor_query_param: self.encode_cursor(rows[-1])}
+        self.request = request
+        return rows
+
+
+# Stránkování přes offset, jen tam, kde keyset nedává smysl (řazení podle relevance)
+class OffsetPaginator(BasePaginator):
+    offset_query_param = 'offset'
+
+    def get_offset(self, request):
+        try:
+            return max(0, int(request.GET.get(self.offset_query_param) or 0))
+        except ValueError:
+            raise ValueError("Offset must be an integer.")
+
+    def paginate(self, fetch, request):
+        # fetch(limit, offset) vrací seznam řádků
+        limit = self.get_limit(request)
+        offset = self.get_offset(request)
+        rows = fetch(limit + 1, offset)
+        if len(rows) > limit:
+            rows = rows[:limit]
+            self.next_params = {self.offset_query_param: offset + limit}
+        self.request = request
+        return rows
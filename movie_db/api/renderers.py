@@ -0,0 +1,35 @@
+# api/renderers.py
+import importlib.util
+
+from rest_framework import renderers
+from rest_framework.utils import encoders
+
+# JSON odpovědí přes orjson (o řád rychlejší než json ze standardní knihovny), bez něj
+# stdlib jako v rest_framework.renderers.JSONRenderer. Výstup je v obou případech stejný:
+# kompaktní UTF-8, časy přes DRF JSONEncoder (ISO 8601 s 'Z', milisekundy).
+# Odsazený výstup (prohlížecí API, Accept: application/json; indent=4) jde vždy přes stdlib.
+
+if importlib.util.find_spec('orjson') is not None:
+    import orjson
+else:
+    orjson = None
+
+
+class FastJSONRenderer(renderers.JSONRenderer):
+    options = 0 if orjson is None else orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS
+    default = encoders.JSONEncoder().default
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if orjson is None or self.get_indent(accepted_media_type, renderer_context or {}):
+            return super().render(data, accepted_media_type, renderer_context)
+        if data is None:
+            return b''
+        try:
+            ret = orjson.dumps(data, default=self.default, option=self.options)
+        except TypeError:
+            # Hodnoty mimo rozsah orjson (např. celá čísla nad 64 bitů)
+            return super().render(data, accepted_media_type, renderer_context)
+        # Jako JSONRenderer: U+2028/U+2029 escapovat kvůli JavaScriptu (JSONP, <script>)
+        if b'\xe2\x80\xa8' in ret or b'\xe2\x80\xa9' in ret:
+            ret = ret.replace(b'\xe2\x80\xa8', b'\\u2028').replace(b'\xe2\x80\xa9', b'\\u2029')
+        return ret
@@ -0,0 +1,29 @@
+# api/routers.py
+from contextvars import ContextVar
+
+READ_ALIAS = 'read'
+
+# Nastavuje ReadOnlyRequestMiddleware pro GET/HEAD/OPTIONS požadavky
+read_only_request = ContextVar('api_read_only_request', default=False)
+
+
+class ReadWriteRouter:
+    """
+    Čtení v požadavcích, které nic nezapisují, jde přes samostatné spojení READ_ALIAS.
+
+    Ostatní čtení zůstává na 'default', aby zápis a následné čtení v téže transakci
+    viděly stejná data. Spojení READ_ALIAS míří na stejnou databázi, proto jsou
+    vazby mezi objekty z obou spojení povolené.
+    """
+
+    def db_for_read(self, model, **hints):
+        return READ_ALIAS if read_only_request.get() else None
+
+    def db_for_write(self, model, **hints):
+        return None
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return False if db == READ_ALIAS else None
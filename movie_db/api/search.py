@@ -0,0 +1,144 @@
+# api/search.py
+import re
+
+from django.db import connection, connections, transaction
+
+
+# Fulltextový index nad názvy filmů a jmény/biografiemi osob (SQLite FTS5).
+# Filmy a osoby sdílí jednu tabulku, rowid rozlišuje typ: film = id * 2, osoba = id * 2 + 1.
+SEARCH_TABLE = 'api_search'
+
+CREATE_TABLE_SQL = f"""
+CREATE VIRTUAL TABLE IF NOT EXISTS {SEARCH_TABLE} USING fts5(
+    name, biography, kind UNINDEXED,
+    tokenize = 'unicode61 remove_diacritics 2',
+    prefix = '2 3'
+)
+"""
+
+# Název má při řazení větší váhu než biografie
+RANK_SQL = f"INSERT INTO {SEARCH_TABLE}({SEARCH_TABLE}, rank) VALUES ('rank', 'bm25(10.0, 1.0)')"
+
+POPULATE_SQL = [
+    f"INSERT INTO {SEARCH_TABLE}(rowid, name, biography, kind) SELECT id * 2, name, '', 'movie' FROM api_movie",
+    f"INSERT INTO {SEARCH_TABLE}(rowid, name, biography, kind) SELECT id * 2 + 1, name, biography, role FROM api_person",
+]
+
+# Triggery drží index v synchronu i při bulk_create, QuerySet.update() a kaskádovém mazání
+TRIGGERS_SQL = [
+    f"""
+    CREATE TRIGGER IF NOT EXISTS api_movie_search_insert AFTER INSERT ON api_movie BEGIN
+        INSERT INTO {SEARCH_TABLE}(rowid, name, biography, kind) VALUES (new.id * 2, new.name, '', 'movie');
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS api_movie_search_update AFTER UPDATE OF name ON api_movie BEGIN
+        UPDATE {SEARCH_TABLE} SET name = new.name WHERE rowid = new.id * 2;
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS api_movie_search_delete AFTER DELETE ON api_movie BEGIN
+        DELETE FROM {SEARCH_TABLE} WHERE rowid = old.id * 2;
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS api_person_search_insert AFTER INSERT ON api_person BEGIN
+        INSERT INTO {SEARCH_TABLE}(rowid, name, biography, kind) VALUES (new.id * 2 + 1, new.name, new.biography, new.role);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS api_person_search_update AFTER UPDATE OF name, biography, role ON api_person BEGIN
+        UPDATE {SEARCH_TABLE} SET name = new.name, biography = new.biography, kind = new.role
+        WHERE rowid = new.id * 2 + 1;
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS api_person_search_delete AFTER DELETE ON api_person BEGIN
+        DELETE FROM {SEARCH_TABLE} WHERE rowid = old.id * 2 + 1;
+    END
+    """,
+]
+
+SEARCH_SQL = f"""
+SELECT rowid, name, kind, snippet({SEARCH_TABLE}, -1, '<mark>', '</mark>', '…', 12), rank
+FROM {SEARCH_TABLE}
+WHERE {SEARCH_TABLE} MATCH %s {{kind_filter}}
+ORDER BY rank
+LIMIT %s OFFSET %s
+"""
+
+TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+
+
+def is_supported():
+    return connection.vendor == 'sqlite'
+
+
+def install_triggers(cursor):
+    for sql in TRIGGERS_SQL:
+        cursor.execute(sql)
+
+
+def ensure_triggers(sender=None, using='default', **kwargs):
+    # SQLite při některých migracích tabulku přestaví (nová tabulka + kopie dat)
+    # a triggery tím zmizí, proto je po každé migraci obnovíme.
+    conn = connections[using]
+    if conn.vendor != 'sqlite':
+        return
+    with conn.cursor() as cursor:
+        tables = conn.introspection.table_names(cursor)
+        if SEARCH_TABLE in tables:
+            install_triggers(cursor)
+
+
+def rebuild_index():
+    # Index znovu z tabulek filmů a osob (po zápisech mimo triggery, např. obnově zálohy)
+    if not is_supported():
+        return False
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {SEARCH_TABLE}")
+        for sql in POPULATE_SQL:
+            cursor.execute(sql)
+    return True
+
+
+def build_match_query(text):
+    # Uživatelský vstup nepouštíme do syntaxe FTS5: každé slovo dáme do uvozovek,
+    # poslední slovo hledáme jako prefix (našeptávání).
+    tokens = TOKEN_RE.findall(text)
+    if not tokens:
+        return None
+    terms = [f'"{token}"' for token in tokens]
+    terms[-1] += '*'
+    return ' '.join(terms)
+
+
+def search(text, kind=None, limit=10, offset=0):
+    match = build_match_query(text)
+    if match is None:
+        return []
+
+    params = [match]
+    kind_filter = ''
+    if kind == 'person':
+        kind_filter = "AND kind != 'movie'"
+    elif kind:
+        kind_filter = 'AND kind = %s'
+        params.append(kind)
+    params += [limit, offset]
+
+    with connection.cursor() as cursor:
+        cursor.execute(SEARCH_SQL.format(kind_filter=kind_filter), params)
+        rows = cursor.fetchall()
+
+    return [
+        {
+            "_id": str(rowid // 2),
+            "type": "movie" if row_kind == 'movie' else "person",
+            "role": None if row_kind == 'movie' else row_kind,
+            "name": name,
+            "snippet": snippet,
+            "score": -rank,
+        }
+        for rowid, name, row_kind, snippet, rank in rows
+    ]
@@ -0,0 +1,138 @@
+# api/seeding.py
+import datetime
+import math
+import random
+from itertools import accumulate
+
+from django.db import transaction
+
+from . import stats
+from .caching import get_cache
+from .importer import insert_links
+from .models import Person, Movie, Genre, MovieGenre
+
+
+# Syntetický katalog pro vývoj a měření výkonu (manage.py seed_catalog).
+#
+# Rozdělení se blíží skutečné databázi: několik režisérů a herců točí hodně
+# filmů (Zipfovo rozdělení), obsazení má log-normální velikost, roky přibývají
+# směrem k současnosti a žánry mají různou četnost. Se stejným seed je výsledek stejný.
+
+FIRST_NAMES = [
+    'Jan', 'Petr', 'Jana', 'Eva', 'Tomáš', 'Lucie', 'Martin', 'Tereza', 'Jakub', 'Anna', 'John', 'Mary',
+    'James', 'Linda', 'Robert', 'Emma', 'Michael', 'Olivia', 'David', 'Sophie', 'Pierre', 'Marie', 'Luca',
+    'Giulia', 'Hans', 'Greta', 'Akira', 'Yuki', 'Carlos', 'Lucía',
+]
+LAST_NAMES = [
+    'Novák', 'Svoboda', 'Dvořák', 'Černá', 'Procházka', 'Kučera', 'Veselý', 'Horáková', 'Smith', 'Johnson',
+    'Williams', 'Brown', 'Jones', 'Miller', 'Davis', 'Wilson', 'Moore', 'Taylor', 'Dubois', 'Martin', 'Rossi',
+    'Bianchi', 'Müller', 'Schmidt', 'Tanaka', 'Suzuki', 'García', 'López', 'Kowalski', 'Nowak',
+]
+COUNTRIES = {'US': 30, 'GB': 10, 'CZ': 10, 'FR': 8, 'DE': 7, 'IT': 6, 'JP': 5, 'ES': 4, 'IN': 8, 'KR': 4, 'PL': 3}
+GENRES = {
+    'drama': 30, 'comedy': 20, 'action': 15, 'thriller': 12, 'romantic': 8, 'adventure': 8, 'sci-fi': 6,
+    'horror': 6, 'fantasy': 5, 'animated': 4, 'documentary': 4,
+}
+TITLE_WORDS = [
+    'Night', 'Last', 'Summer', 'River', 'Dark', 'Love', 'City', 'Road', 'Silent', 'Secret', 'Winter', 'Red',
+    'Home', 'Storm', 'Lost', 'Golden', 'Island', 'War', 'Dream', 'Star', 'Shadow', 'Fire', 'Glass', 'Heart',
+]
+
+GENRE_COUNT_WEIGHTS = [50, 35, 15]  # 1, 2 nebo 3 žánry
+MEDIAN_CAST = 6
+MAX_CAST = 30
+FIRST_YEAR, LAST_YEAR, PEAK_YEAR = 1920, 2025, 2015
+
+
+def zipf_weights(count, exponent=0.8):
+    # Kumulativní váhy pro random.choices(cum_weights=...)
+    return list(accumulate(1 / (rank + 1) ** exponent for rank in range(count)))
+
+
+class CatalogSeeder:
+    def __init__(self, seed=None, chunk_size=2000):
+        self.random = random.Random(seed)
+        self.chunk_size = chunk_size
+
+    def name(self):
+        return f'{self.random.choice(FIRST_NAMES)} {self.random.choice(LAST_NAMES)}'
+
+    def person(self, role):
+        birth = datetime.date(1930, 1, 1) + datetime.timedelta(days=self.random.randrange(70 * 365))
+        country = self.random.choices(list(COUNTRIES), weights=list(COUNTRIES.values()))[0]
+        return Person(
+            name=self.name(),
+            birthDate=birth,
+            country=country,
+            biography=f'{role.capitalize()} born in {birth.year} ({country}).',
+            role=role,
+        )
+
+    def title(self):
+        words = self.random.sample(TITLE_WORDS, self.random.choice((1, 2, 2, 3)))
+        return ' '.join(words)
+
+    def cast_size(self):
+        return max(1, min(MAX_CAST, round(self.random.lognormvariate(math.log(MEDIAN_CAST), 0.5))))
+
+    def year(self):
+        return round(self.random.triangular(FIRST_YEAR, LAST_YEAR, PEAK_YEAR))
+
+    def genres(self):
+        count = self.random.choices((1, 2, 3), weights=GENRE_COUNT_WEIGHTS)[0]
+        names = self.random.choices(list(GENRES), weights=list(GENRES.values()), k=count)
+        return list(dict.fromkeys(names))
+
+    def seed_people(self, count):
+        directors = max(1, count // 10) if count else 0
+        roles = ['director'] * directors + ['actor'] * (count - directors)
+        for start in range(0, count, self.chunk_size):
+            with transaction.atomic():
+                Person.objects.bulk_create([self.person(role) for role in roles[start:start + self.chunk_size]])
+
+    def seed_movies(self, count):
+        directors = list(Person.objects.filter(role='director').values_list('id', flat=True))
+        actors = list(Person.objects.filter(role='actor').values_list('id', flat=True))
+        if count and (not directors or not actors):
+            raise ValueError("Seeding movies needs at least one director and one actor.")
+        # Pořadí osob promícháme, aby "populární" nebyly jen ty s nejnižším id
+        self.random.shuffle(directors)
+        self.random.shuffle(actors)
+        director_weights = zipf_weights(len(directors))
+        actor_weights = zipf_weights(len(actors))
+        genre_ids = {genre.name: genre.id for genre in Genre.objects.resolve(list(GENRES))}
+
+        links = 0
+        for start in range(0, count, self.chunk_size):
+            size = min(self.chunk_size, count - start)
+            movies = [
+                Movie(
+                    name=self.title(),
+                    year=self.year(),
+                    director_id=self.random.choices(directors, cum_weights=director_weights)[0],
+                    isAvailable=self.random.random() < 0.85,
+                )
+                for _ in range(size)
+            ]
+            with transaction.atomic():
+                Movie.objects.bulk_create(movies, batch_size=500)
+                actor_links = [
+                    (movie.id, pk) for movie in movies
+                    for pk in dict.fromkeys(
+                        self.random.choices(actors, cum_weights=actor_weights, k=min(self.cast_size(), len(actors)))
+                    )
+                ]
+                insert_links(Movie.actors.through, 'movie_id', 'person_id', actor_links)
+                insert_links(MovieGenre, 'movie_id', 'genre_id', [
+                    (movie.id, genre_ids[name]) for movie in movies for name in self.genres()
+                ])
+            links += len(actor_links)
+        return links
+
+    def run(self, movies, people):
+        self.seed_people(people)
+        links = self.seed_movies(movies)
+        # bulk_create neposílá signály, souhrnné počty přepočítáme a uložené odpovědi zahodíme celé
+        stats.rebuild()
+        get_cache().clear()
+        return {'people': people, 'movies': movies, 'actorLinks': links}
@@ -10,14 +10,16 @@ class PersonSerializer(serializers.ModelSerializer):
         model = Person
         fields = '__all__'
 
-from rest_framework import serializers
-from .models import Movie
+from rest_framework import ISO_8601, serializers
+from rest_framework.settings import api_settings
+from .models import Movie, MovieGenre, group_by_movie, agroup_by_movie
 
 
 # Movie serializer
 class MovieSerializer(serializers.ModelSerializer):
     director = serializers.PrimaryKeyRelatedField(queryset=Person.objects.filter(role="director"))  # Použijte 'director' místo 'directorID'
     actors = serializers.PrimaryKeyRelatedField(queryset=Person.objects.filter(role="actor"), many=True)  # Použijte 'actors' místo 'actorIDs'
+    genres = serializers.ListField(child=serializers.CharField(max_length=100), source='genre_names')  # Seznam názvů žánrů
 
     class Meta:
         model = Movie
@@ -26,18 +28,207 @@ class MovieSerializer(serializers.ModelSerializer):
     def create(self, validated_data):
         director = validated_data.pop('director')  # Změňte na 'director'
         actors = validated_data.pop('actors')  # Změňte na 'actors'
+        genres = validated_data.pop('genre_names')
 
         # Vytvoření filmu
         movie = Movie.objects.create(director=director, **validated_data)
 
-        # Přidání herců
-        movie.actors.set(actors)
-        movie.save()
+        # Přidání herců a žánrů
+        movie.actors.add(*actors)
+        movie.set_genres(genres)
+
+        return movie
 
+    def update(self, instance, validated_data):
+        genres = validated_data.pop('genre_names', None)
+        movie = super().update(instance, validated_data)
+        if genres is not None:
+            movie.set_genres(genres)
         return movie
 
 
+# Rychlé serializery jen pro čtení seznamů. Výstup je stejný jako u PersonSerializer /
+# MovieSerializer(many=True), ale staví se přímo z řádků .values() bez instancí modelů
+# a bez průchodu poli ModelSerializeru.
+
+def datetime_formatter():
+    # Stejný výstup jako serializers.DateTimeField, časová zóna se zjistí jednou pro celý seznam
+    field = serializers.DateTimeField()
+    timezone = field.default_timezone()
+    if api_settings.DATETIME_FORMAT != ISO_8601 or timezone is None:
+        return field.to_representation
+
+    def to_representation(value):
+        if not value:
+            return None
+        value = value.astimezone(timezone).isoformat()
+        return value[:-6] + 'Z' if value.endswith('+00:00') else value
+    return to_representation
+
+
+def parse_fields(params, allowed, name='fields'):
+    # ?fields=id,name -> požadovaná pole v pořadí allowed; None = parametr chybí (všechna pole)
+    value = params.get(name)
+    if not value:
+        return None
+    requested = [field.strip() for field in value.split(',') if field.strip()]
+    unknown = [field for field in requested if field not in allowed]
+    if unknown:
+        raise ValueError(f"Unknown {name}: {', '.join(unknown)}. Allowed: {', '.join(allowed)}.")
+    return tuple(field for field in allowed if field in requested)
+
+
+def person_names(ids, batch_size=900):
+    # Vložené osoby (expand): id -> {"id", "name"}, jeden dotaz na dávku
+    ids = list(ids)
+    people = {}
+    for start in range(0, len(ids), batch_size):
+        for pk, name in Person.objects.filter(id__in=ids[start:start + batch_size]).values_list('id', 'name'):
+            people[pk] = {'id': pk, 'name': name}
+    return people
+
+
+async def aperson_names(ids, batch_size=900):
+    ids = list(ids)
+    people = {}
+    for start in range(0, len(ids), batch_size):
+        async for pk, name in Person.objects.filter(id__in=ids[start:start + batch_size]).values_list('id', 'name'):
+            people[pk] = {'id': pk, 'name': name}
+    return people
+
+
+class PersonListSerializer:
+    fields = ('id', 'name', 'birthDate', 'country', 'biography', 'role', 'updatedAt')
+    birth_date = serializers.DateField()
+
+    def __init__(self, rows, fields=None):
+        self.rows = rows
+        # id je ve výběru polí vždy
+        self.output = fields and tuple(field for field in self.fields if field in fields or field == 'id')
+
+    @classmethod
+    def columns(cls, fields=None, required=()):
+        # Sloupce pro .values(): jen požadovaná pole a pole potřebná pro stránkování
+        if fields is None:
+            return cls.fields
+        return tuple(column for column in cls.fields if column in fields or column in required or column == 'id')
 
+    @property
+    def data(self):
+        birth_date = self.birth_date.to_representation
+        updated_at = datetime_formatter()
+        if self.output is not None:
+            formatters = {'birthDate': birth_date, 'updatedAt': updated_at}
+            selected = [(field, formatters.get(field)) for field in self.output]
+            return [
+                {field: format(row[field]) if format else row[field] for field, format in selected}
+                for row in self.rows
+            ]
+        return [
+            {
+                'id': row['id'],
+                'name': row['name'],
+                'birthDate': birth_date(row['birthDate']),
+                'country': row['country'],
+                'biography': row['biography'],
+                'role': row['role'],
+                'updatedAt': updated_at(row['updatedAt']),
+            }
+            for row in self.rows
+        ]
+
+
+# Vazby v pořadí (movie_id, ...): herce dávky SQLite čte z unikátního indexu (movie_id, person_id) bez řazení
+ACTOR_LINKS = Movie.actors.through.objects.order_by('movie_id', 'person_id')
+GENRE_LINKS = MovieGenre.objects.order_by('movie_id', 'id')
+
+
+class MovieListSerializer:
+    fields = ('id', 'name', 'year', 'director_id', 'isAvailable', 'dateAdded')
+    output_fields = ('id', 'name', 'year', 'director', 'actors', 'isAvailable', 'genres', 'dateAdded')
+    expandable = ('director', 'actors')
+
+    def __init__(self, rows, fields=None, expand=None):
+        self.rows = rows
+        self.output = fields and tuple(field for field in self.output_fields if field in fields or field == 'id')
+        self.output = self.output or self.output_fields
+        # Vložené objekty místo id, jen u vybraných polí
+        self.expand = tuple(field for field in expand or () if field in self.output)
+
+    @classmethod
+    def columns(cls, fields=None, required=()):
+        if fields is None:
+            return cls.fields
+        wanted = {'id', *required, *('director_id' if field == 'director' else field for field in fields)}
+        return tuple(column for column in cls.fields if column in wanted)
+
+    def expanded_ids(self, rows, actors):
+        ids = set()
+        if 'director' in self.expand:
+            ids.update(row['director_id'] for row in rows)
+        if 'actors' in self.expand:
+            ids.update(pk for cast in actors.values() for pk in cast)
+        return ids
+
+    @property
+    def data(self):
+        rows = list(self.rows)
+        ids = [row['id'] for row in rows]
+        # Herci a žánry celé stránky: dva dotazy do vazebních tabulek bez JOINu na osoby
+        actors = genres = {}
+        if 'actors' in self.output:
+            actors = group_by_movie(ACTOR_LINKS, ids, 'person_id')
+        if 'genres' in self.output:
+            genres = group_by_movie(GENRE_LINKS, ids, 'genre__name')
+        people = person_names(self.expanded_ids(rows, actors)) if self.expand else {}
+        return self.build(rows, actors, genres, people)
+
+    async def adata(self):
+        rows = self.rows if isinstance(self.rows, list) else [row async for row in self.rows]
+        ids = [row['id'] for row in rows]
+        actors = genres = {}
+        if 'actors' in self.output:
+            actors = await agroup_by_movie(ACTOR_LINKS, ids, 'person_id')
+        if 'genres' in self.output:
+            genres = await agroup_by_movie(GENRE_LINKS, ids, 'genre__name')
+        people = await aperson_names(self.expanded_ids(rows, actors)) if self.expand else {}
+        return self.build(rows, actors, genres, people)
+
+    def build(self, rows, actors, genres, people=None):
+        date_added = datetime_formatter()
+        if self.output != self.output_fields or self.expand:
+            return self.build_selected(rows, actors, genres, people, date_added)
+        return [
+            {
+                'id': row['id'],
+                'name': row['name'],
+                'year': row['year'],
+                'director': row['director_id'],
+                'actors': actors.get(row['id'], []),
+                'isAvailable': row['isAvailable'],
+                'genres': genres.get(row['id'], []),
+                'dateAdded': date_added(row['dateAdded']),
+            }
+            for row in rows
+        ]
+
+    def build_selected(self, rows, actors, genres, people, date_added):
+        getters = {
+            'id': lambda row: row['id'],
+            'name': lambda row: row['name'],
+            'year': lambda row: row['year'],
+            'director': lambda row: row['director_id'],
+            'actors': lambda row: actors.get(row['id'], []),
+            'isAvailable': lambda row: row['isAvailable'],
+            'genres': lambda row: genres.get(row['id'], []),
+            'dateAdded': lambda row: date_added(row['dateAdded']),
+        }
+        if 'director' in self.expand:
+            getters['director'] = lambda row: people.get(row['director_id'])
+        if 'actors' in self.expand:
+            getters['actors'] = lambda row: [people[pk] for pk in actors.get(row['id'], []) if pk in people]
+        selected = [(field, getters[field]) for field in self.output]
+        return [{field: get(row) for field, get in selected} for row in rows]
 
 
 # User serializer
@@ -64,4 +255,13 @@ class RegisterSerializer(serializers.ModelSerializer):
 
 class LoginSerializer(serializers.Serializer):
     email = serializers.EmailField()
-    password = serializers.CharField()
\ No newline at end of file
+    password = serializers.CharField()
+
+# Job serializer (stav úlohy fronty, api/jobs.py)
+from .models import Job
+
+class JobSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Job
+        fields = ['id', 'kind', 'status', 'attempts', 'maxAttempts', 'result', 'error',
+                  'createdAt', 'startedAt', 'finishedAt']
@@ -0,0 +1,8 @@
+# api/signals.py
+from django.dispatch import Signal
+
+
+# Žánry filmu se mění přímo přes vazební tabulku (bulk_create/delete), takže
+# m2m_changed se neodešle. Posíláme vlastní signál s názvy starých i nových žánrů
+# a s id přidaných a odebraných žánrů.
+genres_changed = Signal()  # sender=Movie, instance, names, added, removed
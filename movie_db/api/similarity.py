@@ -0,0 +1,155 @@
+# api/similarity.py
+import heapq
+import math
+from collections import defaultdict
+from itertools import islice
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .caching import invalidate
+from .models import Movie, MovieGenre, MovieSimilarity, MovieSimilarityState
+
+
+# Podobné filmy ("more like this") z předpočítané tabulky MovieSimilarity.
+#
+# Film je řídký vektor příznaků (režisér, herci, žánry) s vahou podle typu a IDF,
+# skóre je kosinová podobnost. Součin matice příznaků se sebou samou se počítá přes
+# invertovaný index (příznak -> filmy), takže se porovnávají jen filmy, které mají
+# něco společného. Příznaky s víc než API_SIMILARITY_MAX_DF filmy (běžné žánry)
+# kandidáty nevybírají, jen přispívají ke skóre - jinak by výpočet byl kvadratický.
+#
+# manage.py build_similarity přepočítá vše, s --changed jen filmy změněné od minula
+# (updatedAt novější než MovieSimilarityState.builtAt) a filmy, jejichž sousedy mohly ovlivnit.
+
+WEIGHTS = {'director': 2.0, 'actor': 1.0, 'genre': 0.5}
+BATCH_SIZE = 900
+
+
+def load_features():
+    features = defaultdict(set)
+    for movie_id, director_id in Movie.objects.values_list('id', 'director_id').iterator(chunk_size=5000):
+        features[movie_id].add(('director', director_id))
+    for movie_id, person_id in Movie.actors.through.objects.values_list('movie_id', 'person_id').iterator(chunk_size=5000):
+        features[movie_id].add(('actor', person_id))
+    for movie_id, genre_id in MovieGenre.objects.values_list('movie_id', 'genre_id').iterator(chunk_size=5000):
+        features[movie_id].add(('genre', genre_id))
+    return features
+
+
+class SimilarityIndex:
+    def __init__(self, features, max_df=None):
+        self.max_df = max_df or getattr(settings, 'API_SIMILARITY_MAX_DF', 500)
+        self.features = features
+        self.postings = defaultdict(list)
+        for movie_id, movie_features in features.items():
+            for feature in movie_features:
+                self.postings[feature].append(movie_id)
+        count = len(features)
+        # Příznak má u všech filmů stejnou hodnotu, součin dvou vektorů je tedy součet čtverců vah společných příznaků
+        self.weights = {
+            feature: (WEIGHTS[feature[0]] * math.log(1 + count / len(ids))) ** 2 for feature, ids in self.postings.items()
+        }
+        self.norms = {
+            movie_id: math.sqrt(sum(self.weights[feature] for feature in movie_features))
+            for movie_id, movie_features in features.items()
+        }
+
+    def dot_products(self, movie_id):
+        # Řádek součinu matice příznaků s její transpozicí, jen nenulové hodnoty
+        products = defaultdict(float)
+        common = []
+        for feature in self.features.get(movie_id, ()):
+            ids = self.postings[feature]
+            if len(ids) > self.max_df:
+                common.append(feature)
+                continue
+            weight = self.weights[feature]
+            for other in ids:
+                products[other] += weight
+        products.pop(movie_id, None)
+        for feature in common:
+            weight = self.weights[feature]
+            for other in products:
+                if feature in self.features[other]:
+                    products[other] += weight
+        return products
+
+    def candidates(self, movie_id):
+        # Filmy s aspoň jedním společným (ne příliš častým) příznakem
+        return set(self.dot_products(movie_id))
+
+    def neighbours(self, movie_id, k):
+        norm = self.norms.get(movie_id)
+        # Vyšší skóre první, při shodě nižší id
+        scores = [(dot / (norm * self.norms[other]), -other) for other, dot in self.dot_products(movie_id).items()]
+        return [(score, -other) for score, other in heapq.nlargest(k, scores)]
+
+
+def insert_rows(rows):
+    # Řádků je TOP_K na film, vkládáme je bez vytváření instancí modelů (jako vazby v importu)
+    opts = MovieSimilarity._meta
+    quote = connection.ops.quote_name
+    sql = 'INSERT INTO %s (%s, %s, %s) VALUES (%%s, %%s, %%s)' % (
+        quote(opts.db_table), *(quote(opts.get_field(name).column) for name in ('movie', 'related', 'score'))
+    )
+    with connection.cursor() as cursor:
+        cursor.executemany(sql, rows)
+
+
+def write_neighbours(index, movie_ids, built_at, k):
+    movie_ids = iter(movie_ids)
+    while batch := list(islice(movie_ids, BATCH_SIZE)):
+        MovieSimilarity.objects.filter(movie_id__in=batch).delete()
+        insert_rows([
+            (movie_id, other, round(score, 6)) for movie_id in batch for score, other in index.neighbours(movie_id, k)
+        ])
+        MovieSimilarityState.objects.bulk_create(
+            [MovieSimilarityState(movie_id=movie_id, builtAt=built_at) for movie_id in batch if movie_id in index.features],
+            update_conflicts=True, unique_fields=['movie'], update_fields=['builtAt'], batch_size=500,
+        )
+
+
+@transaction.atomic
+def rebuild(k=None):
+    k = k or getattr(settings, 'API_SIMILARITY_TOP_K', 10)
+    built_at = timezone.now()
+    index = SimilarityIndex(load_features())
+    MovieSimilarity.objects.all().delete()
+    MovieSimilarityState.objects.all().delete()
+    write_neighbours(index, sorted(index.features), built_at, k)
+    invalidate('similarity')
+    return {'movies': len(index.features), 'rows': MovieSimilarity.objects.count()}
+
+
+def changed_movies():
+    stale = Q(similarity_state__isnull=True) | Q(updatedAt__gt=F('similarity_state__builtAt'))
+    return set(Movie.objects.filter(stale).values_list('id', flat=True))
+
+
+@transaction.atomic
+def refresh(k=None):
+    k = k or getattr(settings, 'API_SIMILARITY_TOP_K', 10)
+    # Čas před načtením: film změněný během výpočtu zůstane označený jako změněný
+    built_at = timezone.now()
+    changed = changed_movies()
+    if not changed:
+        return {'changed': 0, 'movies': 0}
+    index = SimilarityIndex(load_features())
+
+    # Změněný film se může dostat mezi sousedy filmů se společným příznakem
+    # a vypadnout ze seznamů filmů, které ho měly mezi sousedy dosud
+    affected = set(changed)
+    for movie_id in changed:
+        affected |= index.candidates(movie_id)
+    changed_ids = list(changed)
+    for start in range(0, len(changed_ids), BATCH_SIZE):
+        affected.update(
+            MovieSimilarity.objects.filter(related_id__in=changed_ids[start:start + BATCH_SIZE])
+            .values_list('movie_id', flat=True)
+        )
+    write_neighbours(index, sorted(affected), built_at, k)
+    invalidate('similarity')
+    return {'changed': len(changed), 'movies': len(affected)}
@@ -0,0 +1,320 @@
+# api/snapshot.py
+import datetime
+import logging
+import sys
+import threading
+from array import array
+from bisect import bisect_left, bisect_right
+from itertools import accumulate
+
+from django.db import connections
+
+from .caching import get_tag_versions, movie_list_validators
+from .filters import to_int
+from .models import Movie, MovieGenre, Person
+from .pagination import KeysetPaginator, MOVIE_ORDERING
+
+logger = logging.getLogger('api.snapshot')
+
+
+# Katalog filmů v paměti procesu pro seznam filmů (API_CATALOG_SNAPSHOT=1).
+#
+# Filmy jsou v pořadí seznamu (dateAdded DESC, id DESC) v polích array: id, rok,
+# režisér, časy v mikrosekundách; herci a žánry jako CSR (offsety + plochá pole),
+# žánry jako indexy do tabulky názvů. Filtry directorID/actorID/genre jdou přes
+# invertované indexy (osoba/žánr -> pozice filmů), rok se dofiltruje při průchodu.
+#
+# Snímek se načte při startu workeru (CatalogSnapshotMiddleware) a platí pro verzi
+# tagu 'catalog', kterou zvyšují signály při každém zápisu filmů, osob a žánrů.
+# Po změně verze se nový snímek načítá na pozadí a do té doby čte seznam z databáze.
+
+VERSION_TAG = 'catalog'
+EPOCH = datetime.datetime(1970, 1, 1, tzinfo=datetime.timezone.utc)
+
+
+def to_micros(value):
+    return (value - EPOCH) // datetime.timedelta(microseconds=1)
+
+
+def from_micros(value):
+    return EPOCH + datetime.timedelta(microseconds=value)
+
+
+class CatalogSnapshot:
+    def __init__(self, version):
+        self.version = version
+        self.ids = array('q')
+        self.names = []
+        self.years = array('i')
+        self.directors = array('q')
+        self.available = array('b')
+        self.added = array('q')
+        self.updated = array('q')
+        self.actor_offsets = array('q', [0])
+        self.actor_ids = array('q')
+        self.genre_offsets = array('q', [0])
+        self.genre_codes = array('I')
+        self.genre_names = []
+        self.person_ids = array('q')  # seřazená, jména pro expand jsou na stejných indexech
+        self.person_names = []
+        self.by_director = {}
+        self.by_actor = {}
+        self.by_genre = {}
+
+    @classmethod
+    def load(cls, version, using='default'):
+        snapshot = cls(version)
+        snapshot.load_movies(using)
+        snapshot.load_people(using)
+        snapshot.build_indexes()
+        return snapshot
+
+    def load_movies(self, using):
+        movies = Movie.objects.using(using).order_by(*MOVIE_ORDERING).values_list(
+            'id', 'name', 'year', 'director_id', 'isAvailable', 'dateAdded', 'updatedAt'
+        )
+        for pk, name, year, director_id, available, added, updated in movies.iterator(chunk_size=10000):
+            self.ids.append(pk)
+            self.names.append(name)
+            self.years.append(year)
+            self.directors.append(director_id)
+            self.available.append(available)
+            self.added.append(to_micros(added))
+            self.updated.append(to_micros(updated))
+
+        # Vazby v pořadí indexů vazebních tabulek (movie_id, ...), na pozice filmů přes binární hledání
+        order = array('q', sorted(range(len(self.ids)), key=self.ids.__getitem__))
+        sorted_ids = array('q', (self.ids[position] for position in order))
+        actors = Movie.actors.through.objects.using(using).order_by('movie_id', 'person_id') \
+            .values_list('movie_id', 'person_id')
+        self.actor_ids, self.actor_offsets = self.load_links(actors, order, sorted_ids, lambda value: value)
+
+        codes = {}
+
+        def genre_code(name):
+            if name not in codes:
+                codes[name] = len(self.genre_names)
+                self.genre_names.append(name)
+            return codes[name]
+
+        genres = MovieGenre.objects.using(using).order_by('movie_id', 'id').values_list('movie_id', 'genre__name')
+        self.genre_codes, self.genre_offsets = self.load_links(genres, order, sorted_ids, genre_code, 'I')
+
+    def load_links(self, links, order, sorted_ids, encode, typecode='q'):
+        # CSR: offsety podle pozice filmu, hodnoty každého filmu v pořadí dotazu
+        count = len(self.ids)
+        sizes = array('q', bytes(8 * (count + 1)))
+        positions, values = array('q'), array(typecode)
+        for movie_id, value in links.iterator(chunk_size=10000):
+            index = bisect_left(sorted_ids, movie_id)
+            # Vazba filmu, který při načítání filmů ještě neexistoval, se vynechá
+            if index < count and sorted_ids[index] == movie_id:
+                positions.append(order[index])
+                values.append(encode(value))
+                sizes[order[index] + 1] += 1
+        offsets = array('q', accumulate(sizes))
+        result, fill = array(typecode, values), array('q', offsets)
+        for position, value in zip(positions, values):
+            result[fill[position]] = value
+            fill[position] += 1
+        return result, offsets
+
+    def load_people(self, using):
+        for pk, name in Person.objects.using(using).order_by('id').values_list('id', 'name').iterator(chunk_size=10000):
+            self.person_ids.append(pk)
+            self.person_names.append(name)
+
+    def build_indexes(self):
+        by_director, by_actor, by_genre = {}, {}, {}
+        for position, director_id in enumerate(self.directors):
+            by_director.setdefault(director_id, array('q')).append(position)
+            for actor_id in self.actor_ids[self.actor_offsets[position]:self.actor_offsets[position + 1]]:
+                by_actor.setdefault(actor_id, array('q')).append(position)
+            for code in self.genre_codes[self.genre_offsets[position]:self.genre_offsets[position + 1]]:
+                by_genre.setdefault(self.genre_names[code], array('q')).append(position)
+        self.by_director, self.by_actor, self.by_genre = by_director, by_actor, by_genre
+
+    # Dotazy
+
+    def movie_actors(self, position):
+        return list(self.actor_ids[self.actor_offsets[position]:self.actor_offsets[position + 1]])
+
+    def movie_genres(self, position):
+        codes = self.genre_codes[self.genre_offsets[position]:self.genre_offsets[position + 1]]
+        return [self.genre_names[code] for code in codes]
+
+    def person_name(self, pk):
+        index = bisect_left(self.person_ids, pk)
+        if index < len(self.person_ids) and self.person_ids[index] == pk:
+            return self.person_names[index]
+        return None
+
+    def positions(self, params, start, limit):
+        # Pozice filmů odpovídajících filtrům (jako api/filters.filter_movies) od pozice start
+        lists = []
+        director_id, actor_id, genre = params.get('directorID'), params.get('actorID'), params.get('genre')
+        if director_id:
+            lists.append(self.by_director.get(to_int(director_id, 'directorID'), ()))
+        if actor_id:
+            actor_id = to_int(actor_id, 'actorID')
+            lists.append(self.by_actor.get(actor_id, ()))
+        if genre:
+            lists.append(self.by_genre.get(genre, ()))
+        from_year = to_int(params['fromYear'], 'fromYear') if params.get('fromYear') else None
+        to_year = to_int(params['toYear'], 'toYear') if params.get('toYear') else None
+
+        if lists:
+            # Průchod nejkratším seznamem, ostatní filtry se ověří na pozici
+            shortest = min(lists, key=len)
+            candidates = shortest[bisect_left(shortest, start):]
+            others = [other for other in lists if other is not shortest]
+        else:
+            candidates, others = range(start, len(self.ids)), []
+
+        result = []
+        for position in candidates:
+            year = self.years[position]
+            if from_year is not None and year < from_year or to_year is not None and year > to_year:
+                continue
+            if others and not all(self.contains(other, position) for other in others):
+                continue
+            result.append(position)
+            if len(result) == limit:
+                break
+        return result
+
+    @staticmethod
+    def contains(positions, position):
+        index = bisect_left(positions, position)
+        return index < len(positions) and positions[index] == position
+
+    def start_position(self, cursor):
+        # První pozice za kurzorem (dateAdded, id) v pořadí seznamu
+        if cursor is None:
+            return 0
+        key = (-to_micros(cursor[0]), -cursor[1])
+        return bisect_right(range(len(self.ids)), key, key=lambda position: (-self.added[position], -self.ids[position]))
+
+    def page_positions(self, paginator, request):
+        limit = paginator.get_limit(request)
+        cursor = request.GET.get(paginator.cursor_query_param)
+        if cursor:
+            cursor = paginator.decode_cursor(Movie.objects.all(), cursor)
+        positions = self.positions(request.GET, self.start_position(cursor or None), limit + 1)
+        return positions, limit
+
+    def movie_page(self, paginator, request):
+        # Řádky stránky ve tvaru Movie.objects.values(*MovieListSerializer.fields)
+        positions, limit = self.page_positions(paginator, request)
+        rows = [
+            {
+                'id': self.ids[position],
+                'name': self.names[position],
+                'year': self.years[position],
+                'director_id': self.directors[position],
+                'isAvailable': bool(self.available[position]),
+                'dateAdded': from_micros(self.added[position]),
+                'position': position,
+            }
+            for position in positions
+        ]
+        return paginator.get_page(rows, limit, request)
+
+    def relations(self, rows):
+        # Herci, žánry a jména osob stránky pro MovieListSerializer.build()
+        actors = {row['id']: self.movie_actors(row['position']) for row in rows}
+        genres = {row['id']: self.movie_genres(row['position']) for row in rows}
+        people = {}
+        for pk in {row['director_id'] for row in rows} | {pk for cast in actors.values() for pk in cast}:
+            name = self.person_name(pk)
+            if name is not None:
+                people[pk] = {'id': pk, 'name': name}
+        return actors, genres, people
+
+    def page_validators(self, request):
+        # Stejný obsah jako caching.page_validators, bez dotazu do databáze
+        positions, limit = self.page_positions(KeysetPaginator(MOVIE_ORDERING), request)
+        rows = [(self.ids[position], from_micros(self.updated[position])) for position in positions]
+        return (len(rows), rows), max((updated for _, updated in rows), default=None)
+
+    def nbytes(self):
+        # Přibližná velikost v paměti: buffery polí, seznamy a řetězce, indexy
+        arrays = [
+            self.ids, self.years, self.directors, self.available, self.added, self.updated,
+            self.actor_offsets, self.actor_ids, self.genre_offsets, self.genre_codes, self.person_ids,
+        ]
+        size = sum(sys.getsizeof(values) for values in arrays)
+        for values in (self.names, self.person_names, self.genre_names):
+            size += sys.getsizeof(values) + sum(sys.getsizeof(value) for value in values)
+        for index in (self.by_director, self.by_actor, self.by_genre):
+            size += sys.getsizeof(index) + sum(sys.getsizeof(key) + sys.getsizeof(value) for key, value in index.items())
+        return size
+
+    def __len__(self):
+        return len(self.ids)
+
+
+class SnapshotHolder:
+    def __init__(self):
+        self.snapshot = None
+        self.enabled = False
+        self.background = True
+        self.loading = False
+        self.lock = threading.Lock()
+
+    def start(self, background=True):
+        self.enabled = True
+        self.background = background
+        self.current()
+
+    def stop(self):
+        self.enabled = False
+        self.snapshot = None
+
+    def version(self):
+        return get_tag_versions([VERSION_TAG])[VERSION_TAG]
+
+    def current(self):
+        # Platný snímek, nebo None (vypnuto, nebo se právě načítá nový)
+        if not self.enabled:
+            return None
+        version = self.version()
+        snapshot = self.snapshot
+        if snapshot is not None and snapshot.version == version:
+            return snapshot
+        self.reload(version)
+        snapshot = self.snapshot
+        return snapshot if snapshot is not None and snapshot.version == version else None
+
+    def reload(self, version):
+        with self.lock:
+            if self.loading:
+                return
+            self.loading = True
+        if not self.background:
+            self.load(version)
+            return
+        threading.Thread(target=self.load, args=(version,), name='catalog-snapshot', daemon=True).start()
+
+    def load(self, version):
+        try:
+            # Verze se čte před daty: zápis během načítání verzi zvýší a snímek se načte znovu
+            self.snapshot = CatalogSnapshot.load(version)
+            logger.info("Loaded catalog snapshot: %d movies, %d bytes", len(self.snapshot), self.snapshot.nbytes())
+        except Exception:
+            logger.exception("Loading the catalog snapshot failed")
+        finally:
+            self.loading = False
+            if self.background:
+                connections.close_all()
+
+
+catalog_snapshot = SnapshotHolder()
+
+
+def snapshot_list_validators(request, **kwargs):
+    # Validátory seznamu filmů ze snímku, bez něj z databáze
+    snapshot = catalog_snapshot.current()
+    if snapshot is None or request.GET.get('expand'):
+        return movie_list_validators(request, **kwargs)
+    return snapshot.page_validators(request)
@@ -0,0 +1,161 @@
+# api/stats.py
+from collections import Counter
+
+from django.db import connection, transaction
+from django.db.models import Count
+from django.db.models.signals import post_save, pre_delete, pre_save, m2m_changed
+
+from .caching import invalidate
+from .models import Movie, MovieGenre, PersonStats, GenreStats, YearStats
+from .signals import genres_changed
+
+
+# Souhrnné počty (PersonStats, GenreStats, YearStats) pro filmografie a /api/stats/.
+#
+# Signály modelů počty jen přičítají a odečítají, bez přepočtu celých tabulek.
+# Hromadné zápisy bez signálů (import, seed) volají record_movies/rebuild samy.
+# Po QuerySet.update() nebo zápisu mimo Django je potřeba manage.py rebuild_stats.
+
+BATCH_SIZE = 450  # dvojice parametrů, pod limitem 999 starších SQLite
+
+
+def add_counts(model, field, counts):
+    # Přičte počty k řádkům podle primárního klíče, chybějící řádky založí
+    rows = [(key, delta) for key, delta in counts.items() if delta]
+    if not rows:
+        return
+    opts = model._meta
+    quote = connection.ops.quote_name
+    table, key, column = quote(opts.db_table), quote(opts.pk.column), quote(opts.get_field(field).column)
+    with connection.cursor() as cursor:
+        for start in range(0, len(rows), BATCH_SIZE):
+            batch = rows[start:start + BATCH_SIZE]
+            cursor.execute(
+                f'INSERT INTO {table} ({key}, {column}) VALUES {", ".join(["(%s, %s)"] * len(batch))} '
+                f'ON CONFLICT ({key}) DO UPDATE SET {column} = {table}.{column} + excluded.{column}',
+                [value for row in batch for value in row],
+            )
+    invalidate('stats')
+
+
+def movie_counts(movie_ids, batch_size=900):
+    years, directors, actors, genres = Counter(), Counter(), Counter(), Counter()
+    movie_ids = list(movie_ids)
+    for start in range(0, len(movie_ids), batch_size):
+        batch = movie_ids[start:start + batch_size]
+        for year, director_id in Movie.objects.filter(id__in=batch).values_list('year', 'director_id'):
+            years[year] += 1
+            directors[director_id] += 1
+        actors.update(dict(
+            Movie.actors.through.objects.filter(movie_id__in=batch)
+            .values('person_id').annotate(count=Count('id')).values_list('person_id', 'count')
+        ))
+        genres.update(dict(
+            MovieGenre.objects.filter(movie_id__in=batch)
+            .values('genre_id').annotate(count=Count('id')).values_list('genre_id', 'count')
+        ))
+    return years, directors, actors, genres
+
+
+def record_movies(movie_ids, sign=1):
+    # Filmy i s herci a žánry přidá (sign=1) do počtů, nebo je z nich odebere (sign=-1)
+    years, directors, actors, genres = movie_counts(movie_ids)
+    add_counts(YearStats, 'movieCount', {year: sign * n for year, n in years.items()})
+    add_counts(PersonStats, 'directedCount', {pk: sign * n for pk, n in directors.items()})
+    add_counts(PersonStats, 'actedCount', {pk: sign * n for pk, n in actors.items()})
+    add_counts(GenreStats, 'movieCount', {pk: sign * n for pk, n in genres.items()})
+
+
+@transaction.atomic
+def rebuild():
+    PersonStats.objects.all().delete()
+    GenreStats.objects.all().delete()
+    YearStats.objects.all().delete()
+
+    people = {}
+    for pk, count in Movie.objects.values('director_id').annotate(count=Count('id')).values_list('director_id', 'count'):
+        people[pk] = PersonStats(person_id=pk, directedCount=count)
+    actor_counts = Movie.actors.through.objects.values('person_id').annotate(count=Count('id'))
+    for pk, count in actor_counts.values_list('person_id', 'count'):
+        people.setdefault(pk, PersonStats(person_id=pk)).actedCount = count
+    PersonStats.objects.bulk_create(people.values(), batch_size=500)
+
+    genres = MovieGenre.objects.values('genre_id').annotate(count=Count('id')).values_list('genre_id', 'count')
+    GenreStats.objects.bulk_create([GenreStats(genre_id=pk, movieCount=count) for pk, count in genres], batch_size=500)
+    years = Movie.objects.values('year').annotate(count=Count('id')).values_list('year', 'count')
+    YearStats.objects.bulk_create([YearStats(year=year, movieCount=count) for year, count in years], batch_size=500)
+
+    invalidate('stats')
+    return {'people': len(people), 'genres': GenreStats.objects.count(), 'years': YearStats.objects.count()}
+
+
+# Průběžná aktualizace ze signálů
+
+def movie_pre_save(sender, instance, update_fields=None, **kwargs):
+    instance._old_stats = None
+    if instance._state.adding:
+        return
+    if update_fields is not None and not {'year', 'director', 'director_id'} & set(update_fields):
+        return
+    instance._old_stats = Movie.objects.filter(pk=instance.pk).values_list('year', 'director_id').first()
+
+
+def movie_saved(sender, instance, created=False, **kwargs):
+    if created:
+        add_counts(YearStats, 'movieCount', {instance.year: 1})
+        add_counts(PersonStats, 'directedCount', {instance.director_id: 1})
+        return
+    old = getattr(instance, '_old_stats', None)
+    if old is None:
+        return
+    old_year, old_director_id = old
+    if old_year != instance.year:
+        add_counts(YearStats, 'movieCount', {old_year: -1, instance.year: 1})
+    if old_director_id != instance.director_id:
+        add_counts(PersonStats, 'directedCount', {old_director_id: -1, instance.director_id: 1})
+
+
+def movie_pre_delete(sender, instance, **kwargs):
+    # Vazby na herce a žánry smaže kaskáda bez signálů, odečteme je předem
+    record_movies([instance.pk], sign=-1)
+
+
+def movie_actors_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    through = Movie.actors.through.objects
+    if action == 'pre_remove':
+        # pk_set obsahuje i neexistující vazby, odečíst se smí jen ty skutečné
+        if reverse:
+            instance._stats_removed = through.filter(person_id=instance.pk, movie_id__in=pk_set).count()
+        else:
+            instance._stats_removed = list(
+                through.filter(movie_id=instance.pk, person_id__in=pk_set).values_list('person_id', flat=True)
+            )
+    elif action == 'pre_clear':
+        if reverse:
+            instance._stats_removed = through.filter(person_id=instance.pk).count()
+        else:
+            instance._stats_removed = list(through.filter(movie_id=instance.pk).values_list('person_id', flat=True))
+    elif action in ('post_remove', 'post_clear'):
+        removed = getattr(instance, '_stats_removed', None)
+        if reverse:
+            add_counts(PersonStats, 'actedCount', {instance.pk: -(removed or 0)})
+        else:
+            add_counts(PersonStats, 'actedCount', {pk: -1 for pk in removed or ()})
+    elif action == 'post_add':
+        # pk_set u post_add obsahuje jen nově přidané vazby
+        if reverse:
+            add_counts(PersonStats, 'actedCount', {instance.pk: len(pk_set)})
+        else:
+            add_counts(PersonStats, 'actedCount', {pk: 1 for pk in pk_set})
+
+
+def movie_genres_changed(sender, instance, added=(), removed=(), **kwargs):
+    add_counts(GenreStats, 'movieCount', {**{pk: 1 for pk in added}, **{pk: -1 for pk in removed}})
+
+
+def connect_signals():
+    pre_save.connect(movie_pre_save, sender=Movie, dispatch_uid='api_stats_movie_pre_save')
+    post_save.connect(movie_saved, sender=Movie, dispatch_uid='api_stats_movie_save')
+    pre_delete.connect(movie_pre_delete, sender=Movie, dispatch_uid='api_stats_movie_pre_delete')
+    m2m_changed.connect(movie_actors_changed, sender=Movie.actors.through, dispatch_uid='api_stats_movie_actors')
+    genres_changed.connect(movie_genres_changed, sender=Movie, dispatch_uid='api_stats_movie_genres')
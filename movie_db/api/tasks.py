@@ -0,0 +1,59 @@
+# api/tasks.py
+import os
+
+from django.db import transaction
+
+from . import search, similarity, stats
+from .importer import CatalogImporter, iter_csv, iter_ndjson
+from .jobs import task
+from .models import Person
+from .serializers import MovieSerializer
+
+
+# Úlohy pro frontu api/jobs.py. Registrují se při importu modulu (ApiConfig.ready).
+
+@task('delete_person')
+def delete_person(person_id):
+    # Kaskáda smaže i všechny filmy, které osoba režírovala
+    person = Person.objects.filter(pk=person_id).first()
+    if person is None:
+        return {"deleted": False}
+    movies = person.directed_movies.count()
+    person.delete()
+    return {"deleted": True, "directedMoviesDeleted": movies}
+
+
+@task('create_movie')
+def create_movie(data):
+    # Data ověřilo už view, znovu se ověří proti aktuálnímu stavu databáze.
+    # V transakci, aby opakovaný pokus po chybě nezaložil film dvakrát.
+    serializer = MovieSerializer(data=data)
+    serializer.is_valid(raise_exception=True)
+    with transaction.atomic():
+        movie = serializer.save()
+    return {"_id": str(movie.id), "name": movie.name}
+
+
+# Dávky importu se potvrzují samostatně, opakování po chybě by zdvojilo už vložené řádky
+@task('import_catalog', max_attempts=1)
+def import_catalog(path, format='ndjson', default_type='movie'):
+    with open(path, encoding='utf-8', newline='') as stream:
+        records = iter_csv(stream) if format == 'csv' else iter_ndjson(stream)
+        result = CatalogImporter(default_type=default_type).run(records)
+    os.remove(path)
+    return result
+
+
+@task('rebuild_stats')
+def rebuild_stats():
+    return stats.rebuild()
+
+
+@task('rebuild_search')
+def rebuild_search():
+    return {"rebuilt": search.rebuild_index()}
+
+
+@task('build_similarity')
+def build_similarity(changed=True):
+    return similarity.refresh() if changed else similarity.rebuild()
@@ -1,3 +1,1299 @@
-from django.test import TestCase
+# api/tests.py
+import datetime
+import gzip
+import io
+import json
+import os
+import re
+import tempfile
+import unittest
 
-# Create your tests here.
+from asgiref.sync import iscoroutinefunction
+from django.conf import settings
+from django.core.cache import caches
+from django.core.management import call_command
+from django.db import connection
+from django.http import HttpResponse
+from django.test import AsyncClient, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.authtoken.models import Token
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+
+from .jobs import Worker
+from .models import Person, Movie, User, Genre, PersonStats, GenreStats, YearStats, Job
+from .authentication import CachedTokenAuthentication, token_cache_key, token_lru
+from .middleware import CompressionMiddleware, RequestTimer, negotiate_encoding
+from .routers import ReadWriteRouter, read_only_request
+from .renderers import FastJSONRenderer
+from .snapshot import CatalogSnapshot, catalog_snapshot
+from .serializers import PersonSerializer, MovieSerializer, PersonListSerializer, MovieListSerializer
+
+
+def make_person(name, role, **kwargs):
+    defaults = {
+        "birthDate": datetime.date(1970, 1, 1),
+        "country": "CZ",
+        "biography": "",
+    }
+    defaults.update(kwargs)
+    return Person.objects.create(name=name, role=role, **defaults)
+
+
+def make_movie(name, director, actors=(), year=2000, genres=("action",), **kwargs):
+    movie = Movie.objects.create(name=name, year=year, director=director, **kwargs)
+    movie.actors.set(actors)
+    movie.set_genres(genres)
+    return movie
+
+
+class ApiTestCase(TestCase):
+    def setUp(self):
+        # Rollback mezi testy neposílá signály, cache proto vždy začíná prázdná
+        caches["api"].clear()
+        self.user = User.objects.create_user(email="tester@example.com", password="secret")
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+
+# Počet dotazů nesmí záviset na počtu filmů
+# (validátor ETagu + filmy s režisérem + herci + žánry)
+class MovieQueryCountTests(ApiTestCase):
+    def setUp(self):
+        super().setUp()
+        self.director = make_person("Director", "director")
+        self.actors = [make_person(f"Actor {i}", "actor") for i in range(5)]
+        for i in range(12):
+            make_movie(f"Movie {i}", self.director, self.actors[:i % 5 + 1], year=1990 + i)
+
+    def test_movie_list_query_count_is_constant(self):
+        for limit in (1, 5, 12):
+            with self.assertNumQueries(4):
+                response = self.client.get("/api/api/movies/", {"limit": limit})
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(len(response.data), limit)
+
+    def test_movie_viewset_list_query_count_is_constant(self):
+        with self.assertNumQueries(3):
+            response = self.client.get("/api/movies/")
+        self.assertEqual(len(response.data), 12)
+
+    def test_movie_detail_query_count(self):
+        movie = Movie.objects.order_by("-id").first()
+        with self.assertNumQueries(4):
+            response = self.client.get(f"/api/api/movies/{movie.id}/")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["director"]["name"], "Director")
+        self.assertEqual(response.data["actorIDs"], [str(a.id) for a in movie.actors.order_by("id")])
+        self.assertEqual(len(response.data["actors"]), len(response.data["actorIDs"]))
+
+
+class ListSerializerTests(ApiTestCase):
+    def test_fast_serializers_match_model_serializers_byte_for_byte(self):
+        director = make_person("Režisér", "director", biography="Bio \"quoted\"")
+        actors = [make_person(f"Actor {i}", "actor") for i in range(4)]
+        make_movie("No cast", director, [], genres=())
+        for i in range(5):
+            make_movie(f"Movie {i}", director, reversed(actors[:i]), year=1990 + i, genres=("drama", "action")[:i % 3],
+                       isAvailable=bool(i % 2))
+
+        render = JSONRenderer().render
+        movies = Movie.objects.order_by("id")
+        self.assertEqual(
+            render(MovieListSerializer(movies.values(*MovieListSerializer.fields)).data),
+            render(MovieSerializer(movies.for_api(), many=True).data),
+        )
+        people = Person.objects.order_by("id")
+        self.assertEqual(
+            render(PersonListSerializer(people.values(*PersonListSerializer.fields)).data),
+            render(PersonSerializer(people, many=True).data),
+        )
+
+
+class MovieUpdateTests(ApiTestCase):
+    def setUp(self):
+        super().setUp()
+        self.director = make_person("Director", "director")
+        self.actors = [make_person(f"Actor {i}", "actor") for i in range(4)]
+        self.movie = make_movie("Movie", self.director, self.actors[:2], genres=("drama",))
+        self.url = f"/api/api/movies/{self.movie.id}/"
+
+    def cast(self):
+        return sorted(self.movie.actors.values_list("id", flat=True))
+
+    def test_put_applies_only_the_difference_of_the_cast(self):
+        a0, a1, a2, _ = self.actors
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.put(self.url, {"name": "Renamed", "year": 2001, "director": self.director.id,
+                                                  "actors": [a1.id, a2.id], "genres": ["drama"]}, format="json")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["actors"], [str(a1.id), str(a2.id)])
+        self.assertEqual(self.cast(), [a1.id, a2.id])
+        link_writes = [q["sql"] for q in queries if re.match(r'(INSERT .*INTO|DELETE FROM) "api_movie_actors"', q["sql"])]
+        self.assertEqual(len(link_writes), 2)  # smazání a0, vložení a2; a1 zůstává
+        self.assertEqual(self.client.get(self.url).data["name"], "Renamed")
+
+    def test_missing_actor_leaves_movie_untouched(self):
+        response = self.client.put(self.url, {"name": "Renamed", "actors": [self.actors[3].id, 999999]}, format="json")
+        self.assertEqual(response.status_code, 404)
+        self.movie.refresh_from_db()
+        self.assertEqual(self.movie.name, "Movie")
+        self.assertEqual(self.cast(), [a.id for a in self.actors[:2]])
+
+    def test_patch_touches_only_given_fields(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.patch(self.url, {"year": 1999}, format="json")
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse([q for q in queries if re.search(r'"api_movie(_actors|genre)"', q["sql"])
+                          and not q["sql"].startswith("SELECT")])
+        self.movie.refresh_from_db()
+        self.assertEqual((self.movie.name, self.movie.year), ("Movie", 1999))
+        self.assertEqual(self.cast(), [a.id for a in self.actors[:2]])
+        self.assertEqual(self.movie.genre_names, ["drama"])
+
+        self.assertEqual(self.client.patch(self.url, {"year": "soon"}, format="json").status_code, 400)
+        self.assertEqual(self.client.patch(self.url, {"actors": ["x"]}, format="json").status_code, 400)
+
+    def test_malformed_ids_are_rejected(self):
+        bodies = [{"director": [1]}, {"director": {"id": 1}}, {"actors": [{"x": 1}]}, {"actors": 5},
+                  {"actors": "12"}, {"actors": [[1]]}]
+        for body in bodies:
+            self.assertEqual(self.client.patch(self.url, body, format="json").status_code, 400, body)
+        self.assertEqual(self.client.put(self.url, {"actors": {"x": 1}}, format="json").status_code, 400)
+        self.assertEqual(self.cast(), [a.id for a in self.actors[:2]])
+
+
+class KeysetPaginationTests(ApiTestCase):
+    def setUp(self):
+        super().setUp()
+        self.director = make_person("Director", "director")
+        self.movies = [make_movie(f"Movie {i}", self.director) for i in range(7)]
+        # Stejné dateAdded u části filmů, aby se uplatnilo id jako druhý klíč
+        Movie.objects.filter(id__in=[m.id for m in self.movies[2:5]]).update(
+            dateAdded=self.movies[2].dateAdded
+        )
+        for name in ("Bob", "Alice", "Alice", "Cecil", "Dana"):
+            make_person(name, "actor")
+
+    def walk(self, url, limit):
+        seen, pages = [], 0
+        params = {"limit": limit}
+        while True:
+            response = self.client.get(url, params)
+            self.assertEqual(response.status_code, 200)
+            seen.extend(item["id"] for item in response.data)
+            pages += 1
+            link = response.get("Link")
+            if not link:
+                return seen, pages
+            next_url = link[1:link.index(">")]
+            params = None
+            url = next_url
+
+    def test_movies_are_paged_newest_first_without_gaps(self):
+        seen, pages = self.walk("/api/api/movies/", 3)
+        expected = list(Movie.objects.order_by("-dateAdded", "-id").values_list("id", flat=True))
+        self.assertEqual(seen, expected)
+        self.assertEqual(pages, 3)
+
+    def test_actors_are_paged_by_name_then_id(self):
+        seen, _ = self.walk("/api/actors/", 2)
+        expected = list(Person.objects.filter(role="actor").order_by("name", "id").values_list("id", flat=True))
+        self.assertEqual(seen, expected)
+
+    def test_deep_page_costs_the_same_queries(self):
+        response = self.client.get("/api/api/movies/", {"limit": 1})
+        next_url = response["Link"][1:response["Link"].index(">")]
+        with self.assertNumQueries(4):
+            self.client.get(next_url)
+
+    def test_limit_is_capped(self):
+        with self.settings(API_MAX_PAGE_SIZE=4):
+            response = self.client.get("/api/directors/", {"limit": 1000000})
+            self.assertEqual(len(response.data), 1)
+            response = self.client.get("/api/api/movies/", {"limit": 1000000})
+            self.assertEqual(len(response.data), 4)
+
+    def test_invalid_limit_and_cursor(self):
+        response = self.client.get("/api/api/movies/", {"limit": "abc"})
+        self.assertEqual(response.status_code, 400)
+        response = self.client.get("/api/actors/", {"cursor": "not-a-cursor"})
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data, {"error": "Invalid cursor."})
+
+
+# Žádný filtr seznamů nesmí skončit úplným průchodem tabulkou
+@unittest.skipUnless(connection.vendor == "sqlite", "EXPLAIN QUERY PLAN is SQLite specific")
+class ListFilterQueryPlanTests(ApiTestCase):
+    full_scan = re.compile(r"^SCAN \S+$")
+
+    def setUp(self):
+        super().setUp()
+        self.director = make_person("Director", "director")
+        self.actor = make_person("Actor", "actor")
+        make_movie("Movie", self.director, [self.actor], year=1995)
+
+    def query_plans(self, url, params):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(url, params)
+        self.assertEqual(response.status_code, 200)
+        plans = []
+        with connection.cursor() as cursor:
+            for query in ctx.captured_queries:
+                cursor.execute("EXPLAIN QUERY PLAN " + query["sql"])
+                plans.append([row[3] for row in cursor.fetchall()])
+        return plans
+
+    def assert_no_full_scan(self, url, params, uses=None):
+        plans = self.query_plans(url, params)
+        for plan in plans:
+            for step in plan:
+                self.assertIsNone(self.full_scan.match(step), f"{url} {params}: {plan}")
+        if uses:
+            self.assertTrue(
+                any(uses in step for step in plans[0]), f"{url} {params}: {plans[0]}"
+            )
+
+    def test_movie_list_filters_use_indexes(self):
+        url = "/api/api/movies/"
+        self.assert_no_full_scan(url, {})
+        self.assert_no_full_scan(url, {"directorID": self.director.id}, uses="(director_id=?)")
+        self.assert_no_full_scan(url, {"actorID": self.actor.id}, uses="api_movie_actors_person_movie_idx")
+        self.assert_no_full_scan(url, {"fromYear": 1990})
+        self.assert_no_full_scan(url, {"toYear": 2000})
+        self.assert_no_full_scan(url, {"fromYear": 1990, "toYear": 2000}, uses="movie_year_id_idx")
+        self.assert_no_full_scan(url, {"genre": "action"}, uses="moviegenre_genre_movie_idx")
+
+    def test_people_lists_use_role_index(self):
+        self.assert_no_full_scan("/api/directors/", {}, uses="(role=?)")
+        self.assert_no_full_scan("/api/actors/", {}, uses="(role=?)")
+
+
+class GenreTests(ApiTestCase):
+    def setUp(self):
+        super().setUp()
+        self.director = make_person("Director", "director")
+        self.actor = make_person("Actor", "actor")
+        self.scifi = make_movie("Alien", self.director, [self.actor], genres=["sci-fi", "horror"])
+        self.comedy = make_movie("Airplane!", self.director, genres=["comedy"])
+
+    def test_genres_keep_their_order_in_responses(self):
+        response = self.client.get(f"/api/api/movies/{self.scifi.id}/")
+        self.assertEqual(response.data["genres"], ["sci-fi", "horror"])
+        response = self.client.get("/api/api/movies/")
+        self.assertEqual({m["name"]: m["genres"] for m in response.data},
+                         {"Alien": ["sci-fi", "horror"], "Airplane!": ["comedy"]})
+
+    def test_filter_by_genre(self):
+        response = self.client.get("/api/api/movies/", {"genre": "horror"})
+        self.assertEqual([m["id"] for m in response.data], [self.scifi.id])
+
+    def test_create_movie_with_new_genre(self):
+        response = self.client.post("/api/movies/", {
+            "name": "Up", "year": 2009, "director": self.director.id,
+            "actors": [self.actor.id], "genres": ["animated", "adventure", "animated"],
+        }, format="json")
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data["genres"], ["animated", "adventure"])
+        self.assertEqual(Movie.objects.get(name="Up").genre_names, ["animated", "adventure"])
+
+    def test_genre_list_comes_from_table(self):
+        response = self.client.get("/api/genres/")
+        self.assertEqual(response.data, sorted(Genre.objects.values_list("name", flat=True)))
+        self.assertIn("horror", response.data)
+
+
+@unittest.skipUnless(connection.vendor == "sqlite", "Search uses SQLite FTS5")
+class SearchTests(ApiTestCase):
+    def setUp(self):
+        super().setUp()
+        self.director = make_person("Miloš Forman", "director", biography="Český režisér, autor filmu Amadeus.")
+        self.actor = make_person("Tom Hulce", "actor", biography="Played Mozart in Amadeus.")
+        self.movie = make_movie("Amadeus", self.director, [self.actor])
+        make_movie("Hair", self.director)
+
+    def search(self, **params):
+        response = self.client.get("/api/search/", params)
+        self.assertEqual(response.status_code, 200)
+        return response
+
+    def test_movie_name_ranks_above_biography_mentions(self):
+        results = self.search(q="amadeus").data
+        self.assertEqual([(r["type"], r["_id"]) for r in results][0], ("movie", str(self.movie.id)))
+        self.assertEqual(len(results), 3)
+        self.assertIn("<mark>Amadeus</mark>", results[1]["snippet"])
+
+    def test_diacritics_and_prefix(self):
+        results = self.search(q="milos form").data
+        self.assertEqual([r["_id"] for r in results], [str(self.director.id)])
+        self.assertEqual(results[0]["role"], "director")
+
+    def test_type_filter_and_pagination(self):
+        response = self.search(q="amadeus", type="person", limit=1)
+        self.assertEqual(len(response.data), 1)
+        self.assertEqual(response.data[0]["type"], "person")
+        next_url = response["Link"][1:response["Link"].index(">")]
+        response = self.client.get(next_url)
+        self.assertEqual(len(response.data), 1)
+        self.assertFalse(response.has_header("Link"))
+
+    def test_index_follows_updates_and_deletes(self):
+        Movie.objects.filter(id=self.movie.id).update(name="Salieri")
+        self.assertEqual(self.search(q="salieri").data[0]["name"], "Salieri")
+        self.director.delete()
+        self.assertEqual(self.search(q="amadeus").data[0]["_id"], str(self.actor.id))
+        self.assertEqual(self.search(q="hair").data, [])
+
+    def test_query_syntax_is_not_passed_through(self):
+        self.assertEqual(self.search(q='amadeus" NEAR(').data, [])
+        self.assertEqual(self.search(q='amadeus" (*').data[0]["name"], "Amadeus")
+        response = self.client.get("/api/search/", {"q": "  "})
+        self.assertEqual(response.status_code, 400)
+
+
+class ResponseCacheTests(ApiTestCase):
+    def setUp(self):
+        super().setUp()
+        self.director = make_person("Director", "director")
+        self.other_director = make_person("Other", "director")
+        self.actor = make_person("Actor", "actor")
+        self.movie = make_movie("Movie", self.director, [self.actor], year=1990)
+        self.other = make_movie("Other movie", self.other_director, year=2000)
+
+    def get(self, url, params=None):
+        response = self.client.get(url, params)
+        self.assertEqual(response.status_code, 200)
+        return response
+
+    def assert_cached(self, url, params=None):
+        with self.assertNumQueries(0):
+            response = self.get(url, params)
+        self.assertEqual(response["X-Cache"], "HIT")
+        return response
+
+    def assert_not_cached(self, url, params=None):
+        response = self.get(url, params)
+        self.assertEqual(response["X-Cache"], "MISS")
+        return response
+
+    def test_repeated_reads_hit_the_cache(self):
+        urls = [
+            (f"/api/api/movies/{self.movie.id}/", None),
+            ("/api/api/movies/", {"limit": 5, "genre": "action"}),
+            ("/api/directors/", None),
+            ("/api/actors/", None),
+            ("/api/genres/", None),
+            (f"/api/people/{self.actor.id}/", None),
+        ]
+        for url, params in urls:
+            self.assert_not_cached(url, params)
+            self.assert_cached(url, params)
+        # Pořadí parametrů na klíč nemá vliv
+        self.assert_cached("/api/api/movies/", {"genre": "action", "limit": 5})
+
+    def test_movie_change_evicts_only_affected_entries(self):
+        detail = f"/api/api/movies/{self.movie.id}/"
+        other_detail = f"/api/api/movies/{self.other.id}/"
+        for url, params in [(detail, None), (other_detail, None), ("/api/api/movies/", None),
+                            ("/api/api/movies/", {"directorID": self.other_director.id})]:
+            self.get(url, params)
+
+        self.movie.name = "Renamed"
+        self.movie.save()
+
+        self.assertEqual(self.assert_not_cached(detail).data["name"], "Renamed")
+        self.assert_not_cached("/api/api/movies/")
+        self.assert_cached(other_detail)
+        self.assert_cached("/api/api/movies/", {"directorID": self.other_director.id})
+
+    def test_person_detail_is_evicted_on_change(self):
+        url = f"/api/people/{self.actor.id}/"
+        self.get(url)
+        self.assert_cached(url)
+        self.actor.name = "Renamed"
+        self.actor.save()
+        self.assertEqual(self.assert_not_cached(url).data["name"], "Renamed")
+
+    def test_combined_filters_see_actor_and_genre_changes(self):
+        other_actor = make_person("Other actor", "actor")
+        by_actor = {"directorID": self.director.id, "actorID": other_actor.id}
+        by_genre = {"directorID": self.director.id, "genre": "western"}
+        self.assertEqual(self.get("/api/api/movies/", by_actor).data, [])
+        self.assertEqual(self.get("/api/api/movies/", by_genre).data, [])
+
+        self.movie.actors.add(other_actor)
+        self.assertEqual([m["id"] for m in self.assert_not_cached("/api/api/movies/", by_actor).data], [self.movie.id])
+        self.movie.set_genres(["western"])
+        self.assertEqual([m["id"] for m in self.assert_not_cached("/api/api/movies/", by_genre).data], [self.movie.id])
+
+    def test_year_change_moves_movie_into_filtered_list(self):
+        params = {"actorID": self.actor.id, "fromYear": 2000}
+        self.assertEqual(self.get("/api/api/movies/", params).data, [])
+        self.movie.year = 2005
+        self.movie.save()
+        self.assertEqual([m["id"] for m in self.get("/api/api/movies/", params).data], [self.movie.id])
+
+    def test_cast_and_person_changes_evict_movie_detail(self):
+        detail = f"/api/api/movies/{self.movie.id}/"
+        self.get(detail)
+        new_actor = make_person("New actor", "actor")
+        self.movie.actors.add(new_actor)
+        self.assertEqual(len(self.assert_not_cached(detail).data["actors"]), 2)
+
+        new_actor.name = "Renamed actor"
+        new_actor.save()
+        names = [a["name"] for a in self.assert_not_cached(detail).data["actors"]]
+        self.assertIn("Renamed actor", names)
+
+        self.get("/api/api/movies/", {"actorID": new_actor.id})
+        new_actor.delete()
+        self.assertEqual(self.assert_not_cached(detail).data["actorIDs"], [str(self.actor.id)])
+
+    def test_genre_change_evicts_genre_lists(self):
+        self.get("/api/genres/")
+        self.get("/api/api/movies/", {"genre": "noir"})
+        self.other.set_genres(["noir"])
+        self.assertIn("noir", self.assert_not_cached("/api/genres/").data)
+        self.assertEqual(len(self.assert_not_cached("/api/api/movies/", {"genre": "noir"}).data), 1)
+
+
+class ConditionalGetTests(ApiTestCase):
+    def setUp(self):
+        super().setUp()
+        self.director = make_person("Director", "director")
+        self.actor = make_person("Actor", "actor")
+        self.movie = make_movie("Movie", self.director, [self.actor])
+
+    def revalidate(self, url, response, params=None):
+        # Bez cache odpovědí, aby se ověřila cesta s validátorem v DB
+        caches["api"].clear()
+        return self.client.get(url, params, HTTP_IF_NONE_MATCH=response["ETag"])
+
+    def test_unchanged_resources_answer_304_with_one_query(self):
+        for url, params in [(f"/api/api/movies/{self.movie.id}/", None), ("/api/api/movies/", {"limit": 5}),
+                            ("/api/directors/", None), ("/api/actors/", None), (f"/api/people/{self.actor.id}/", None)]:
+            response = self.client.get(url, params)
+            self.assertTrue(response["ETag"].startswith('W/"'))
+            with self.assertNumQueries(1):
+                revalidated = self.revalidate(url, response, params)
+            self.assertEqual(revalidated.status_code, 304, url)
+            self.assertEqual(revalidated["ETag"], response["ETag"])
+
+    def test_cached_responses_answer_304_without_queries(self):
+        url = f"/api/api/movies/{self.movie.id}/"
+        response = self.client.get(url)
+        with self.assertNumQueries(0):
+            revalidated = self.client.get(url, HTTP_IF_NONE_MATCH=response["ETag"])
+        self.assertEqual(revalidated.status_code, 304)
+
+    def test_changes_produce_new_etag(self):
+        detail = f"/api/api/movies/{self.movie.id}/"
+        detail_response = self.client.get(detail)
+        list_response = self.client.get("/api/api/movies/")
+
+        self.movie.actors.add(make_person("Second actor", "actor"))
+        self.assertEqual(self.revalidate(detail, detail_response).status_code, 200)
+        self.assertEqual(self.revalidate("/api/api/movies/", list_response).status_code, 200)
+
+        detail_response = self.client.get(detail)
+        Person.objects.get(pk=self.actor.pk).save()
+        self.assertEqual(self.revalidate(detail, detail_response).status_code, 200)
+
+        list_response = self.client.get("/api/api/movies/")
+        self.movie.set_genres(["drama"])
+        self.assertEqual(self.revalidate("/api/api/movies/", list_response).status_code, 200)
+
+    def test_if_modified_since(self):
+        url = f"/api/api/movies/{self.movie.id}/"
+        response = self.client.get(url)
+        caches["api"].clear()
+        response = self.client.get(url, HTTP_IF_MODIFIED_SINCE=response["Last-Modified"])
+        self.assertEqual(response.status_code, 304)
+
+
+class BulkImportTests(ApiTestCase):
+    def ndjson(self, *records):
+        return "\n".join(r if isinstance(r, str) else json.dumps(r) for r in records) + "\n"
+
+    def test_ndjson_import_reports_row_errors_without_aborting(self):
+        body = self.ndjson(
+            {"type": "person", "id": 900, "name": "Director", "birthDate": "1950-01-01", "country": "US",
+             "biography": "Bio", "role": "director"},
+            {"type": "person", "id": 901, "name": "Actor", "birthDate": "1960-01-01", "country": "US",
+             "biography": "Bio", "role": "actor"},
+            {"type": "person", "name": "Broken", "birthDate": "not a date", "country": "US", "role": "actor"},
+            {"name": "Movie", "year": 2001, "director": 900, "actors": [901, 901], "genres": ["drama"]},
+            {"name": "Wrong director", "year": 2001, "director": 901, "actors": []},
+            "{not json",
+            {"name": "No year", "director": 900},
+        )
+        response = self.client.generic("POST", "/api/bulk/movies/?limit=1", body,
+                                       content_type="application/x-ndjson")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["created"], {"people": 2, "movies": 1, "actorLinks": 1})
+        self.assertEqual(sorted(e["line"] for e in response.data["errors"]), [3, 5, 6, 7])
+
+        movie = Movie.objects.get(name="Movie")
+        self.assertEqual(movie.director_id, 900)
+        self.assertEqual(list(movie.actors.values_list("id", flat=True)), [901])
+        self.assertEqual(movie.genre_names, ["drama"])
+        # Cache seznamů se po importu zneplatní
+        self.assertEqual(self.client.get("/api/api/movies/").data[0]["name"], "Movie")
+
+    def test_csv_import(self):
+        director = make_person("Director", "director")
+        actors = [make_person(f"Actor {i}", "actor") for i in range(2)]
+        body = (
+            "name,year,director,actors,genres,isAvailable\n"
+            f"First,1999,{director.id},{actors[0].id}|{actors[1].id},action|drama,false\n"
+            f"Second,2000,{director.id},,comedy,true\n"
+        )
+        response = self.client.generic("POST", "/api/bulk/movies/", body, content_type="text/csv")
+        self.assertEqual(response.data["created"]["movies"], 2)
+        first = Movie.objects.get(name="First")
+        self.assertFalse(first.isAvailable)
+        self.assertEqual(first.actors.count(), 2)
+        self.assertEqual(first.genre_names, ["action", "drama"])
+
+    def test_failed_chunk_does_not_stop_the_import(self):
+        director = make_person("Director", "director")
+        body = self.ndjson(
+            {"id": 77, "name": "Duplicate", "year": 2000, "director": director.id},
+            {"id": 77, "name": "Duplicate", "year": 2000, "director": director.id},
+            {"name": "Later chunk", "year": 2000, "director": director.id},
+        )
+        out = io.StringIO()
+        with tempfile.NamedTemporaryFile("w", suffix=".ndjson", delete=False) as f:
+            f.write(body)
+        try:
+            call_command("import_catalog", f.name, "--chunk-size", "2", stdout=out, stderr=io.StringIO())
+        finally:
+            os.unlink(f.name)
+        self.assertIn("Imported 0 people, 1 movies", out.getvalue())
+        self.assertEqual(list(Movie.objects.values_list("name", flat=True)), ["Later chunk"])
+
+
+class CatalogExportTests(ApiTestCase):
+    def setUp(self):
+        super().setUp()
+        self.director = make_person("Director", "director", biography="Bio")
+        self.actors = [make_person(f"Actor {i}", "actor", biography="Bio") for i in range(3)]
+        for i in range(5):
+            make_movie(f"Movie {i}", self.director, self.actors[:i % 3 + 1], year=2000 + i, genres=("drama", "action"))
+
+    def read(self, response):
+        return b"".join(response.streaming_content).decode()
+
+    def test_ndjson_export_streams_in_chunks(self):
+        # Na dávku: filmy + herci + žánry, nezávisle na počtu herců
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get("/api/export/movies.ndjson?fromYear=2001")
+            body = self.read(response)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        self.assertEqual(response["Content-Type"], "application/x-ndjson; charset=utf-8")
+        records = [json.loads(line) for line in body.splitlines()]
+        self.assertEqual([r["name"] for r in records], [f"Movie {i}" for i in range(1, 5)])
+        self.assertEqual(records[1]["actorIDs"], [str(a.id) for a in self.actors])
+        self.assertEqual(records[0]["genres"], ["drama", "action"])
+        self.assertEqual(len(queries), 3)
+
+        self.assertEqual(self.client.get("/api/export/movies.ndjson?fromYear=x").status_code, 400)
+
+    def test_export_round_trips_through_import(self):
+        out = io.StringIO()
+        call_command("export_catalog", "--chunk-size", "2", stdout=out)
+        csv_out = io.StringIO()
+        call_command("export_catalog", "--format", "csv", "--type", "movies", stdout=csv_out)
+        expected = [
+            (m.name, m.year, m.director.name, sorted(a.name for a in m.actors.all()), m.genre_names)
+            for m in Movie.objects.order_by("id")
+        ]
+
+        Movie.objects.all().delete()
+        Person.objects.all().delete()
+        people = [line for line in out.getvalue().splitlines() if '"type": "person"' in line]
+        response = self.client.generic("POST", "/api/bulk/movies/", "\n".join(people),
+                                       content_type="application/x-ndjson")
+        self.assertEqual(response.data["created"]["people"], 4)
+        response = self.client.generic("POST", "/api/bulk/movies/", csv_out.getvalue(), content_type="text/csv")
+        self.assertEqual(response.data["created"], {"people": 0, "movies": 5, "actorLinks": 9})
+        self.assertEqual(expected, [
+            (m.name, m.year, m.director.name, sorted(a.name for a in m.actors.all()), m.genre_names)
+            for m in Movie.objects.order_by("id")
+        ])
+
+
+class SeedAndBenchmarkTests(ApiTestCase):
+    def test_seed_catalog(self):
+        out = io.StringIO()
+        call_command("seed_catalog", "--movies", "200", "--people", "100", "--seed", "7", stdout=out)
+        self.assertIn("Seeded 100 people, 200 movies", out.getvalue())
+        self.assertEqual(Person.objects.filter(role="director").count(), 10)
+        movies = Movie.objects.for_api()
+        self.assertEqual(len(movies), 200)
+        for movie in movies:
+            self.assertTrue(1 <= len(movie.actors.all()) <= 30)
+            self.assertTrue(1 <= len(movie.genre_names) <= 3)
+            self.assertTrue(1920 <= movie.year <= 2025)
+
+    def test_bench_api_reports_every_reachable_route(self):
+        call_command("seed_catalog", "--movies", "20", "--people", "20", "--seed", "1", stdout=io.StringIO())
+        out = io.StringIO()
+        call_command("bench_api", "--requests", "2", "--warmup", "1", "--skip", "register", "login", "token",
+                     stdout=out)
+        report = json.loads(out.getvalue())
+        self.assertEqual(report["catalogue"], {"movies": 20, "people": 20})  # zápisy se odvolaly
+        for name, result in report["endpoints"].items():
+            self.assertEqual(result["errors"], 0, name)
+            self.assertEqual(result["count"], 2)
+            self.assertIsNotNone(result["p99_ms"])
+        self.assertEqual(report["endpoints"]["movie detail"]["queries"], 0)  # token i odpověď z cache
+        # Neměřené zůstanou jen vzory, které zastiňuje router
+        self.assertEqual(report["uncovered"], ["people/", "people/<int:pk>/", "people/<str:pk>/", "movies/"])
+
+
+class QueryTimingMiddlewareTests(ApiTestCase):
+    def test_disabled_by_default(self):
+        self.assertFalse(self.client.get("/api/genres/").has_header("Server-Timing"))
+
+    @override_settings(API_TIMING_SAMPLE_RATE=1)
+    def test_server_timing_header_and_log(self):
+        director = make_person("Director", "director")
+        make_movie("Movie", director, [make_person("Actor", "actor")])
+        client = APIClient()
+        client.force_authenticate(self.user)
+        with self.assertLogs("api.timing", "INFO") as logs:
+            response = client.get("/api/api/movies/")
+        self.assertRegex(response["Server-Timing"],
+                         r'^db;dur=[\d.]+;desc="4 queries", view;dur=[\d.]+, serialize;dur=[\d.]+, total;dur=[\d.]+$')
+        record = json.loads(logs.records[0].getMessage())
+        self.assertEqual((record["path"], record["status"], record["queries"]), ("/api/api/movies/", 200, 4))
+
+    def test_duplicate_queries_are_grouped_by_fingerprint(self):
+        people = [make_person(f"Person {i}", "actor") for i in range(6)]
+        timer = RequestTimer()
+        with connection.execute_wrapper(timer):
+            for person in people:
+                Person.objects.get(id=person.id)  # N+1
+            list(Person.objects.filter(id__in=[p.id for p in people[:2]]))
+            list(Person.objects.filter(id__in=[p.id for p in people]))
+        self.assertEqual(timer.query_count, 8)
+        duplicates = timer.duplicates(threshold=5)
+        self.assertEqual(len(duplicates), 1)
+        self.assertIn('WHERE "api_person"."id" = %s', duplicates[0][0])
+        self.assertEqual(duplicates[0][1], 6)
+        self.assertEqual(timer.duplicates(threshold=2)[1][1], 2)  # IN (...) různé délky = jeden tvar
+
+
+class AsyncViewTests(ApiTestCase):
+    def setUp(self):
+        super().setUp()
+        director = make_person("Director", "director")
+        actors = [make_person(f"Actor {i}", "actor") for i in range(3)]
+        self.movie = make_movie("Movie", director, actors, genres=("drama", "action"))
+        make_movie("Other", director, actors[:1], year=1990)
+        self.person = actors[0]
+        self.token = Token.objects.create(user=self.user)
+
+    async def test_async_views_match_sync_views(self):
+        client = AsyncClient()
+        auth = {"Authorization": f"Token {self.token.key}"}
+        paths = [
+            "api/movies/", "api/movies/?limit=1", "api/movies/?genre=drama", "api/movies/?fromYear=x",
+            f"api/movies/{self.movie.id}/", "api/movies/0/", "api/movies/abc/", "directors/", "actors/?limit=2",
+            f"people/{self.person.id}/", "genres/",
+        ]
+        for path in paths:
+            expected = await client.get(f"/api/{path}", headers=auth)
+            response = await client.get(f"/api/async/{path}", headers=auth)
+            self.assertEqual(response.status_code, expected.status_code, path)
+            self.assertEqual(response.content, expected.content, path)
+            self.assertEqual(response.get("Link", "").replace("/async/", "/"), expected.get("Link", ""), path)
+
+        # Druhý požadavek jde z cache, podmíněný GET vrátí 304
+        response = await client.get(f"/api/async/api/movies/{self.movie.id}/", headers=auth)
+        self.assertEqual(response["X-Cache"], "HIT")
+        response = await client.get(f"/api/async/api/movies/{self.movie.id}/",
+                                    headers={**auth, "If-None-Match": response["ETag"]})
+        self.assertEqual(response.status_code, 304)
+
+        self.assertEqual((await client.get("/api/async/people/0/", headers=auth)).status_code, 404)
+        for prefix in ("/api/", "/api/async/"):
+            response = await client.get(f"{prefix}api/movies/abc/", headers=auth)
+            self.assertEqual(response.status_code, 404, prefix)
+        self.assertEqual((await client.get("/api/async/genres/")).status_code, 401)
+
+
+class TokenCacheTests(ApiTestCase):
+    def setUp(self):
+        super().setUp()
+        token_lru.clear()
+        self.token = Token.objects.create(user=self.user)
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f"Token {self.token.key}")
+
+    def test_authenticated_get_costs_no_auth_queries_when_cached(self):
+        self.assertEqual(self.client.get("/api/genres/").status_code, 200)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get("/api/genres/")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(queries), 0)  # token z cache, odpověď z cache
+
+        # Bez LRU v procesu stačí sdílená cache
+        token_lru.clear()
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get("/api/genres/")
+        self.assertEqual(len(queries), 0)
+
+    def test_cache_holds_no_password_hash(self):
+        self.assertEqual(self.client.get("/api/auth/me/").data["email"], self.user.email)
+        entry = caches["api"].get(token_cache_key(self.token.key))
+        self.assertNotIn("password", entry["user"])
+        self.assertNotIn(self.user.password, repr(entry))
+        # Heslo se načte až při přístupu a uložení uživatele ho nepřepíše
+        user, token = CachedTokenAuthentication().authenticate_credentials(self.token.key)
+        self.assertEqual((user.pk, token.key), (self.user.pk, self.token.key))
+        user.is_admin = True
+        user.save()
+        self.assertTrue(User.objects.get(pk=self.user.pk).check_password("secret"))
+        self.assertTrue(user.check_password("secret"))
+
+    def test_logout_revokes_token(self):
+        self.assertEqual(self.client.get("/api/genres/").status_code, 200)
+        self.assertEqual(self.client.delete("/api/auth/logout/").status_code, 204)
+        self.assertFalse(Token.objects.filter(key=self.token.key).exists())
+        self.assertEqual(self.client.get("/api/genres/").status_code, 401)
+
+    def test_user_change_evicts_cached_tokens(self):
+        self.client.get("/api/genres/")
+        self.user.is_admin = True
+        self.user.save()
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get("/api/genres/")
+        self.assertEqual(len(queries), 1)  # token s uživatelem se načte znovu
+        self.user.delete()
+        self.assertEqual(self.client.get("/api/genres/").status_code, 401)
+
+
+@override_settings(API_PBKDF2_ITERATIONS=1000)
+class PasswordHashingTests(ApiTestCase):
+    def setUp(self):
+        super().setUp()
+        caches["default"].clear()  # počítadla throttlingu
+        self.login = User.objects.create_user(email="login@example.com", password="pass-1234")
+        self.client = APIClient()
+
+    def credentials(self, password="pass-1234", email="login@example.com"):
+        return {"email": email, "password": password}
+
+    def test_async_login_matches_sync_login(self):
+        for data in (self.credentials(), self.credentials("wrong"), self.credentials(email="nobody@example.com"),
+                     {"email": "not-an-email"}):
+            expected = self.client.post("/api/auth/", data, format="json")
+            response = self.client.post("/api/async/auth/", data, format="json")
+            self.assertEqual(response.status_code, expected.status_code, data)
+            self.assertEqual(response.content, expected.content, data)
+
+    def test_login_rehashes_password_with_current_settings(self):
+        with override_settings(API_PBKDF2_ITERATIONS=1200):
+            self.assertEqual(self.client.post("/api/auth/", self.credentials(), format="json").status_code, 200)
+        self.login.refresh_from_db()
+        self.assertTrue(self.login.password.startswith("pbkdf2_sha256$1200$"))
+
+        hashers = ["api.hashers.ScryptPasswordHasher", "api.hashers.PBKDF2PasswordHasher"]
+        with override_settings(PASSWORD_HASHERS=hashers, API_SCRYPT_WORK_FACTOR=2 ** 10):
+            self.assertEqual(self.client.post("/api/async/auth/", self.credentials(), format="json").status_code, 200)
+            self.login.refresh_from_db()
+            self.assertTrue(self.login.password.startswith("scrypt$"))
+            self.assertTrue(self.login.check_password("pass-1234"))
+
+    @override_settings(REST_FRAMEWORK={**settings.REST_FRAMEWORK,
+                                       "DEFAULT_THROTTLE_RATES": {"password": "5/min", "password_email": "2/min"}})
+    def test_login_attempts_are_throttled(self):
+        for _ in range(2):
+            self.assertEqual(self.client.post("/api/auth/", self.credentials("wrong"), format="json").status_code, 401)
+        # Další pokus na stejný účet, i přes jiný endpoint nebo s jinou velikostí písmen
+        self.assertEqual(self.client.post("/api/async/auth/", self.credentials(), format="json").status_code, 429)
+        response = self.client.post("/api/api-token-auth/", {"username": "LOGIN@example.com", "password": "x"},
+                                    format="json")
+        self.assertEqual(response.status_code, 429)
+        # Jiný účet omezí až limit na IP adresu
+        self.assertEqual(self.client.post("/api/auth/", self.credentials(email="tester@example.com"),
+                                          format="json").status_code, 401)
+        self.assertEqual(self.client.post("/api/auth/", self.credentials(email="tester@example.com"),
+                                          format="json").status_code, 429)
+
+
+class StatsTests(ApiTestCase):
+    def setUp(self):
+        super().setUp()
+        self.director = make_person("Director", "director")
+        self.other_director = make_person("Other Director", "director")
+        self.actors = [make_person(f"Actor {i}", "actor") for i in range(3)]
+        self.movie = make_movie("Movie", self.director, self.actors[:2], year=2000, genres=("drama", "action"))
+        make_movie("Second", self.director, self.actors[1:], year=2001, genres=("drama",))
+
+    def snapshot(self):
+        return (
+            sorted(PersonStats.objects.exclude(directedCount=0, actedCount=0)
+                   .values_list("person_id", "directedCount", "actedCount")),
+            sorted(GenreStats.objects.exclude(movieCount=0).values_list("genre_id", "movieCount")),
+            sorted(YearStats.objects.exclude(movieCount=0).values_list("year", "movieCount")),
+        )
+
+    def assertStatsConsistent(self):
+        incremental = self.snapshot()
+        call_command("rebuild_stats", stdout=io.StringIO())
+        self.assertEqual(incremental, self.snapshot())
+
+    def test_signals_keep_stats_equal_to_full_rebuild(self):
+        a0, a1, a2 = self.actors
+        self.assertStatsConsistent()
+        url = f"/api/api/movies/{self.movie.id}/"
+        response = self.client.put(url, {"name": "Movie", "year": 1999, "director": self.other_director.id,
+                                         "actors": [a2.id], "genres": ["comedy", "drama"]}, format="json")
+        self.assertEqual(response.status_code, 200)
+        self.assertStatsConsistent()
+        self.movie.actors.remove(a0, a1)  # a0, a1 už ve filmu nejsou
+        a0.acted_movies.add(self.movie)
+        self.assertStatsConsistent()
+        a1.acted_movies.clear()
+        self.movie.actors.clear()
+        self.assertStatsConsistent()
+        self.assertEqual(self.client.patch(url, {"year": 2001, "actors": [a0.id, a1.id]}, format="json").status_code, 200)
+        self.assertStatsConsistent()
+        self.assertEqual(self.client.delete(url).status_code, 200)
+        self.assertStatsConsistent()
+        self.director.delete()  # kaskáda smaže i jeho filmy
+        self.assertStatsConsistent()
+
+        body = json.dumps({"name": "Imported", "year": 1980, "director": self.other_director.id,
+                           "actors": [a0.id, a2.id], "genres": ["noir"]}) + "\n"
+        response = self.client.generic("POST", "/api/bulk/movies/", body, content_type="application/x-ndjson")
+        self.assertEqual(response.data["created"]["movies"], 1)
+        self.assertStatsConsistent()
+
+    def test_filmography_and_stats_endpoints(self):
+        a0, a1, a2 = self.actors
+        response = self.client.get(f"/api/people/{a1.id}/filmography/")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["actedCount"], 2)
+        self.assertEqual([movie["name"] for movie in response.data["acted"]], ["Movie", "Second"])
+        self.assertEqual(self.client.get(f"/api/people/{self.director.id}/filmography/").data["directedCount"], 2)
+        self.assertEqual(self.client.get("/api/people/0/filmography/").status_code, 404)
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get("/api/stats/")
+        self.assertFalse([q for q in queries if "api_movie" in q["sql"]])  # jen souhrnné tabulky
+        self.assertEqual(response.data["movies"], 2)
+        self.assertEqual(response.data["years"], [{"year": 2000, "count": 1}, {"year": 2001, "count": 1}])
+        self.assertEqual(response.data["genres"], [{"name": "drama", "count": 2}, {"name": "action", "count": 1}])
+        self.assertEqual(response.data["topActors"][0], {"_id": str(a1.id), "name": "Actor 1", "count": 2})
+
+        # Cache odpovědí se po změně počtů zneplatní
+        make_movie("Third", self.other_director, [a0], year=2001)
+        response = self.client.get("/api/stats/")
+        self.assertEqual(response.data["years"][-1], {"year": 2001, "count": 2})
+        self.assertEqual(self.client.get(f"/api/people/{a0.id}/filmography/").data["actedCount"], 2)
+
+
+class SQLiteProfileTests(TestCase):
+    @unittest.skipUnless(connection.vendor == "sqlite" and getattr(settings, "DB_SQLITE_PROFILE", None) == "tuned",
+                         "Tuned SQLite profile is not active")
+    def test_tuned_pragmas_are_applied_to_new_connections(self):
+        with connection.cursor() as cursor:
+            pragmas = {name: cursor.execute(f"PRAGMA {name}").fetchone()[0]
+                       for name in ("synchronous", "temp_store", "cache_size")}
+        self.assertEqual(pragmas, {"synchronous": 1, "temp_store": 2,
+                                   "cache_size": settings.SQLITE_PRAGMAS["cache_size"]})
+
+    def test_read_write_router(self):
+        router = ReadWriteRouter()
+        self.assertIsNone(router.db_for_read(Movie))
+        token = read_only_request.set(True)
+        try:
+            self.assertEqual(router.db_for_read(Movie), "read")
+            self.assertIsNone(router.db_for_write(Movie))
+        finally:
+            read_only_request.reset(token)
+        self.assertFalse(router.allow_migrate("read", "api"))
+        self.assertIsNone(router.allow_migrate("default", "api"))
+
+
+class BatchTests(ApiTestCase):
+    def setUp(self):
+        super().setUp()
+        director = make_person("Director", "director")
+        self.actors = [make_person(f"Actor {i}", "actor") for i in range(4)]
+        self.movies = [make_movie(f"Movie {i}", director, self.actors[:i + 1]) for i in range(4)]
+
+    def test_movie_batch_preserves_order_and_reports_missing(self):
+        ids = [self.movies[2].id, 999999, self.movies[0].id, self.movies[2].id]
+        response = self.client.get(f"/api/movies/batch/?ids={','.join(map(str, ids))}")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([movie["_id"] for movie in response.data["results"]],
+                         [str(self.movies[2].id), str(self.movies[0].id)])
+        self.assertEqual(response.data["missing"], ["999999"])
+        detail = self.client.get(f"/api/api/movies/{self.movies[2].id}/").data
+        self.assertEqual(response.data["results"][0], detail)
+
+        # Stejný výsledek přes POST, počet dotazů nezávisí na počtu filmů
+        caches["api"].clear()
+        with CaptureQueriesContext(connection) as one:
+            self.client.post("/api/movies/batch/", {"ids": [self.movies[0].id]}, format="json")
+        with CaptureQueriesContext(connection) as many:
+            response = self.client.post("/api/movies/batch/", {"ids": [movie.id for movie in self.movies]},
+                                        format="json")
+        self.assertEqual(len(response.data["results"]), 4)
+        self.assertEqual(len(one), len(many))
+
+    def test_person_batch(self):
+        ids = [self.actors[3].id, self.actors[1].id]
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(f"/api/people/batch/?ids={ids[0]},{ids[1]},0")
+        self.assertEqual(len(queries), 1)
+        self.assertEqual([person["id"] for person in response.data["results"]], ids)
+        self.assertEqual(response.data["missing"], ["0"])
+        self.assertEqual(response.data["results"][0], PersonSerializer(self.actors[3]).data)
+
+        # Nová osoba s dříve chybějícím id zneplatní uloženou odpověď
+        missing = self.actors[3].id + 100
+        self.assertEqual(self.client.get(f"/api/people/batch/?ids={missing}").data["missing"], [str(missing)])
+        make_person("Late", "actor", id=missing)
+        self.assertEqual(self.client.get(f"/api/people/batch/?ids={missing}").data["missing"], [])
+
+    def test_invalid_ids_and_cap(self):
+        for path in ("/api/movies/batch/", "/api/movies/batch/?ids=", "/api/movies/batch/?ids=1,x"):
+            self.assertEqual(self.client.get(path).status_code, 400, path)
+        for body in ({"ids": [True]}, {"ids": "1,2"}, {"ids": [{"id": 1}]}):
+            self.assertEqual(self.client.post("/api/people/batch/", body, format="json").status_code, 400, body)
+        with self.settings(API_BATCH_MAX_IDS=3):
+            response = self.client.post("/api/movies/batch/", {"ids": [1, 2, 3, 4]}, format="json")
+            self.assertEqual(response.status_code, 400)
+            self.assertEqual(response.data["error"], "At most 3 IDs are allowed per request.")
+
+
+class SparseFieldsTests(ApiTestCase):
+    def setUp(self):
+        super().setUp()
+        self.director = make_person("Director", "director")
+        self.actors = [make_person(f"Actor {i}", "actor") for i in range(3)]
+        self.movies = [make_movie(f"Movie {i}", self.director, self.actors[:i + 1]) for i in range(3)]
+
+    def test_movie_list_fields_narrow_query(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get("/api/api/movies/?fields=name,year")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data[0], {"id": self.movies[2].id, "name": "Movie 2", "year": 2000})
+        # Bez herců a žánrů jen validátor a stránka filmů, sloupec režiséra se nenačítá
+        self.assertEqual(len(queries), 2)
+        self.assertNotIn("director_id", queries[1]["sql"])
+        self.assertEqual(self.client.get(f"/api/api/movies/?fields=name&limit=1&cursor=x").status_code, 400)
+
+    def test_movie_list_expand(self):
+        response = self.client.get("/api/api/movies/?expand=director,actors")
+        self.assertEqual(response.data[0]["director"], {"id": self.director.id, "name": "Director"})
+        self.assertEqual(response.data[0]["actors"], [{"id": actor.id, "name": actor.name} for actor in self.actors])
+        self.assertNotIn("ETag", response)
+
+        # Jeden dotaz na osoby pro celou stránku, a změna jména zneplatní uloženou odpověď
+        caches["api"].clear()
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get("/api/api/movies/?expand=director,actors")
+        self.assertEqual(len(queries), 4)
+        self.actors[0].name = "Renamed"
+        self.actors[0].save()
+        response = self.client.get("/api/api/movies/?expand=actors")
+        self.assertEqual(response.data[0]["actors"][0]["name"], "Renamed")
+
+    def test_movie_detail_fields(self):
+        movie = self.movies[2]
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(f"/api/api/movies/{movie.id}/?fields=name,actorIDs")
+        self.assertEqual(response.data, {"_id": str(movie.id), "name": "Movie 2",
+                                         "actorIDs": [str(actor.id) for actor in self.actors]})
+        # Bez režiséra žádný JOIN, bez žánrů žádný prefetch (validátor, film, herci)
+        self.assertEqual(len(queries), 3)
+        self.assertNotIn("JOIN", queries[1]["sql"])
+        full = self.client.get(f"/api/api/movies/{movie.id}/").data
+        self.assertEqual(list(full), ["_id", "name", "year", "directorID", "actorIDs", "genres", "isAvailable",
+                                      "dateAdded", "__v", "director", "actors"])
+        batch = self.client.get(f"/api/movies/batch/?ids={movie.id}&fields=_id,director").data
+        self.assertEqual(batch["results"], [{"_id": str(movie.id), "director": full["director"]}])
+
+    def test_person_fields(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get("/api/actors/?fields=name")
+        self.assertEqual(response.data, [{"id": actor.id, "name": actor.name} for actor in self.actors])
+        self.assertNotIn("biography", queries[0]["sql"])
+
+        response = self.client.get(f"/api/people/{self.director.id}/?fields=id,name")
+        self.assertEqual(response.data, {"id": self.director.id, "name": "Director"})
+        etag = self.client.get(f"/api/people/{self.director.id}/")["ETag"]
+        self.assertNotEqual(response["ETag"], etag)
+        batch = self.client.get(f"/api/people/batch/?ids={self.director.id}&fields=role").data
+        self.assertEqual(batch["results"], [{"id": self.director.id, "role": "director"}])
+
+    def test_unknown_fields(self):
+        for path in ("/api/api/movies/?fields=name,bogus", "/api/api/movies/?expand=genres",
+                     f"/api/api/movies/{self.movies[0].id}/?fields=id", "/api/directors/?fields=password",
+                     f"/api/people/{self.director.id}/?fields=secret"):
+            response = self.client.get(path)
+            self.assertEqual(response.status_code, 400, path)
+
+
+class RelatedMoviesTests(ApiTestCase):
+    def setUp(self):
+        super().setUp()
+        self.directors = [make_person(f"Director {i}", "director") for i in range(2)]
+        self.actors = [make_person(f"Actor {i}", "actor") for i in range(4)]
+        a = self.actors
+        self.base = make_movie("Base", self.directors[0], a[:3], genres=("drama",))
+        self.close = make_movie("Close", self.directors[0], a[:2], genres=("drama",))
+        self.far = make_movie("Far", self.directors[1], a[2:3], genres=("comedy",))
+        self.unrelated = make_movie("Unrelated", self.directors[1], a[3:], genres=("comedy",))
+        call_command("build_similarity", stdout=io.StringIO())
+
+    def related(self, movie):
+        return [item["name"] for item in self.client.get(f"/api/movies/{movie.id}/related/").data["results"]]
+
+    def test_ranking_and_single_query(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(f"/api/movies/{self.base.id}/related/")
+        self.assertEqual(len(queries), 1)
+        results = response.data["results"]
+        self.assertEqual([item["name"] for item in results], ["Close", "Far"])
+        self.assertGreater(results[0]["score"], results[1]["score"])
+        self.assertEqual(self.related(self.unrelated), ["Far"])
+        self.assertEqual(self.client.get("/api/movies/999999/related/").status_code, 404)
+
+    def test_incremental_refresh(self):
+        self.unrelated.actors.add(self.actors[0], self.actors[1])
+        self.assertEqual(self.related(self.base), ["Close", "Far"])
+        out = io.StringIO()
+        call_command("build_similarity", "--changed", stdout=out)
+        self.assertIn("(1 changed)", out.getvalue())
+        # Změněný film i filmy se společnými herci mají nové sousedy
+        self.assertIn("Unrelated", self.related(self.base))
+        self.assertIn("Base", self.related(self.unrelated))
+        out = io.StringIO()
+        call_command("build_similarity", "--changed", stdout=out)
+        self.assertIn("Refreshed 0 movies", out.getvalue())
+
+
+class CatalogSnapshotTests(ApiTestCase):
+    def setUp(self):
+        super().setUp()
+        self.directors = [make_person(f"Director {i}", "director") for i in range(2)]
+        self.actors = [make_person(f"Actor {i}", "actor") for i in range(3)]
+        for i in range(8):
+            make_movie(f"Movie {i}", self.directors[i % 2], self.actors[i % 3:], year=2000 + i % 3,
+                       genres=("drama", "comedy")[:1 + i % 2])
+        self.addCleanup(catalog_snapshot.stop)
+
+    def get(self, path, snapshot):
+        caches["api"].clear()
+        if snapshot:
+            catalog_snapshot.start(background=False)
+        else:
+            catalog_snapshot.stop()
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(path)
+        return response, len(queries)
+
+    def test_list_matches_database(self):
+        director, actor = self.directors[1].id, self.actors[2].id
+        for params in ("limit=3", f"directorID={director}", f"actorID={actor}&genre=comedy", "genre=drama&fromYear=2001",
+                       "toYear=2001&limit=2", "fields=name,genres&expand=actors", "expand=director", "directorID=0"):
+            path = f"/api/api/movies/?{params}"
+            while path:
+                expected, _ = self.get(path, snapshot=False)
+                response, queries = self.get(path, snapshot=True)
+                self.assertEqual(response.status_code, 200, path)
+                self.assertEqual(response.data, expected.data, path)
+                self.assertEqual(response.get("Link"), expected.get("Link"), path)
+                self.assertEqual(response.get("ETag"), expected.get("ETag"), path)
+                # Stránka i validátory ze snímku, dotazy jen při načtení snímku
+                self.assertEqual(queries, 0, path)
+                path = response.get("Link", "")[1:].split(">")[0].replace("http://testserver", "")
+
+    def test_invalid_params(self):
+        for params in ("directorID=x", "cursor=bogus", "fromYear=x"):
+            response, _ = self.get(f"/api/api/movies/?{params}", snapshot=True)
+            self.assertEqual(response.status_code, 400, params)
+
+    def test_write_bumps_version(self):
+        catalog_snapshot.start(background=False)
+        snapshot = catalog_snapshot.current()
+        self.assertEqual(len(snapshot), 8)
+        self.client.post("/api/movies/", {"name": "New", "year": 2010, "director": self.directors[0].id,
+                                          "actors": [self.actors[0].id], "genres": ["drama"]}, format="json")
+        fresh = catalog_snapshot.current()
+        self.assertIsNot(fresh, snapshot)
+        self.assertEqual(len(fresh), 9)
+        response = self.client.get("/api/api/movies/?limit=1")
+        self.assertEqual(response.data[0]["name"], "New")
+
+    def test_memory_footprint(self):
+        snapshot = CatalogSnapshot.load(version=None)
+        # Nejnovější film (Movie 7) je první, hrají v něm dva herci
+        self.assertEqual(list(snapshot.actor_offsets[:2]), [0, 2])
+        self.assertGreater(snapshot.nbytes(), 0)
+        out = io.StringIO()
+        call_command("catalog_snapshot", stdout=out)
+        self.assertIn("per million movies", out.getvalue())
+
+
+class JobQueueTests(ApiTestCase):
+    def setUp(self):
+        super().setUp()
+        self.director = make_person("Director", "director")
+        self.actor = make_person("Actor", "actor")
+        make_movie("Directed", self.director, [self.actor])
+
+    def run_jobs(self):
+        return Worker(poll_interval=0).run(burst=True)
+
+    def test_async_person_delete(self):
+        response = self.client.delete(f"/api/people/{self.director.id}/", HTTP_PREFER="respond-async")
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(response["Location"], f"/api/jobs/{response.data['id']}/")
+        self.assertEqual(response.data["status"], "queued")
+        # Dokud worker úlohu nezpracuje, osoba i její filmy zůstávají
+        self.assertTrue(Person.objects.filter(pk=self.director.id).exists())
+
+        self.assertEqual(self.run_jobs(), 1)
+        self.assertFalse(Person.objects.filter(pk=self.director.id).exists())
+        self.assertFalse(Movie.objects.exists())
+        job = self.client.get(response["Location"]).data
+        self.assertEqual(job["status"], "done")
+        self.assertEqual(job["result"], {"deleted": True, "directedMoviesDeleted": 1})
+        self.assertEqual(self.client.delete("/api/people/999999/", HTTP_PREFER="respond-async").status_code, 404)
+
+    def test_async_movie_create_is_validated_before_enqueue(self):
+        data = {"name": "Queued", "year": 2001, "director": self.director.id, "actors": [self.actor.id],
+                "genres": ["drama"]}
+        response = self.client.post("/api/movies/", data, format="json", HTTP_PREFER="respond-async")
+        self.assertEqual(response.status_code, 202)
+        invalid = dict(data, director=self.actor.id)
+        response = self.client.post("/api/movies/", invalid, format="json", HTTP_PREFER="respond-async")
+        self.assertEqual(response.status_code, 400)
+        self.run_jobs()
+        movie = Movie.objects.get(name="Queued")
+        self.assertEqual(movie.genre_names, ["drama"])
+        self.assertEqual(list(movie.actors.values_list("id", flat=True)), [self.actor.id])
+
+    def test_failed_job_is_retried_with_backoff(self):
+        data = {"name": "Late", "year": 2001, "director": self.director.id, "actors": [], "genres": []}
+        job_id = self.client.post("/api/movies/", data, format="json", HTTP_PREFER="respond-async").data["id"]
+        # Režisér zmizí dřív, než se úloha zpracuje
+        Person.objects.filter(pk=self.director.id).delete()
+        with self.assertLogs("api.jobs", "WARNING") as logs:
+            self.run_jobs()
+            job = Job.objects.get(pk=job_id)
+            self.assertEqual((job.status, job.attempts), ("queued", 1))
+            self.assertGreater(job.runAt, job.startedAt)
+            # Odložená úloha se v tomto běhu nespustí
+            self.assertEqual(self.run_jobs(), 0)
+            for _ in range(2):
+                Job.objects.filter(pk=job_id).update(runAt=timezone.now())
+                self.run_jobs()
+        self.assertIn("failed permanently", logs.output[-1])
+        job = Job.objects.get(pk=job_id)
+        self.assertEqual((job.status, job.attempts), ("failed", 3))
+        self.assertIsNotNone(job.finishedAt)
+        self.assertIn("director", job.error)
+
+    def test_async_bulk_import(self):
+        body = json.dumps({"name": "Imported", "year": 2002, "director": self.director.id}) + "\n"
+        with tempfile.TemporaryDirectory() as directory, self.settings(API_JOB_FILES_DIR=directory):
+            response = self.client.generic("POST", "/api/bulk/movies/", body, content_type="application/x-ndjson",
+                                           HTTP_PREFER="respond-async")
+            self.assertEqual(response.status_code, 202)
+            self.assertEqual(len(os.listdir(directory)), 1)
+            self.run_jobs()
+            # Soubor s tělem po úspěšném importu zmizí
+            self.assertEqual(os.listdir(directory), [])
+        self.assertEqual(Job.objects.get().result["created"]["movies"], 1)
+        self.assertTrue(Movie.objects.filter(name="Imported").exists())
+
+    def test_maintenance_jobs_require_admin(self):
+        self.assertEqual(self.client.post("/api/jobs/", {"kind": "rebuild_stats"}, format="json").status_code, 403)
+        self.user.is_admin = True
+        self.user.save()
+        self.assertEqual(self.client.post("/api/jobs/", {"kind": "delete_person"}, format="json").status_code, 400)
+        response = self.client.post("/api/jobs/", {"kind": "rebuild_stats"}, format="json")
+        self.assertEqual(response.status_code, 202)
+        self.run_jobs()
+        self.assertEqual(self.client.get(response["Location"]).data["status"], "done")
+        self.assertEqual(PersonStats.objects.get(person=self.director).directedCount, 1)
+
+    def test_job_is_visible_only_to_its_owner(self):
+        job_id = self.client.delete(f"/api/people/{self.actor.id}/", HTTP_PREFER="respond-async").data["id"]
+        other = User.objects.create_user(email="other@example.com", password="secret")
+        client = APIClient()
+        client.force_authenticate(other)
+        self.assertEqual(client.get(f"/api/jobs/{job_id}/").status_code, 404)
+        self.assertEqual(self.client.get(f"/api/jobs/{job_id}/").status_code, 200)
+
+
+class RenderingAndCompressionTests(ApiTestCase):
+    def setUp(self):
+        super().setUp()
+        director = make_person("Director", "director", biography="Režisér\u2028" + "x" * 2000)
+        for i in range(10):
+            make_movie(f"Movie {i}", director, genres=("drama",))
+        self.director = director
+
+    def test_fast_renderer_matches_stdlib_renderer(self):
+        response = self.client.get("/api/api/movies/?expand=director")
+        data = response.data
+        self.assertEqual(FastJSONRenderer().render(data), JSONRenderer().render(data))
+        self.assertEqual(response.content, JSONRenderer().render(data))
+        person = self.client.get(f"/api/people/{self.director.id}/")
+        self.assertIn(b"\\u2028", person.content)
+        self.assertEqual(json.loads(person.content)["biography"], self.director.biography)
+
+    def test_gzip_is_negotiated_above_the_threshold(self):
+        plain = self.client.get("/api/api/movies/?limit=10")
+        response = self.client.get("/api/api/movies/?limit=10", HTTP_ACCEPT_ENCODING="gzip, deflate")
+        self.assertEqual(response["Content-Encoding"], "gzip")
+        self.assertEqual(response["Vary"], "Accept, Accept-Encoding")
+        self.assertEqual(gzip.decompress(response.content), plain.content)
+        self.assertEqual(int(response["Content-Length"]), len(response.content))
+
+        # Malá odpověď a odmítnutý gzip zůstávají beze změny
+        small = self.client.get("/api/api/movies/?limit=1", HTTP_ACCEPT_ENCODING="gzip")
+        self.assertFalse(small.has_header("Content-Encoding"))
+        refused = self.client.get("/api/api/movies/?limit=10", HTTP_ACCEPT_ENCODING="gzip;q=0, *")
+        self.assertFalse(refused.has_header("Content-Encoding"))
+
+    def test_streaming_export_is_compressed(self):
+        plain = b"".join(self.client.get("/api/export/movies.ndjson").streaming_content)
+        response = self.client.get("/api/export/movies.ndjson", HTTP_ACCEPT_ENCODING="gzip")
+        self.assertEqual(response["Content-Encoding"], "gzip")
+        self.assertEqual(gzip.decompress(b"".join(response.streaming_content)), plain)
+
+    async def test_async_requests_are_compressed_without_a_thread_hop(self):
+        async def get_response(request):
+            return HttpResponse(b"x" * 2000)
+
+        # Pod ASGI zůstává řetězec async (bez sync_to_async kolem celého požadavku)
+        self.assertTrue(iscoroutinefunction(CompressionMiddleware(get_response)))
+        token = await Token.objects.acreate(user=self.user)
+        client = AsyncClient()
+        auth = {"Authorization": f"Token {token.key}"}
+        plain = await client.get("/api/async/api/movies/", headers=auth)
+        response = await client.get("/api/async/api/movies/", headers={**auth, "Accept-Encoding": "gzip"})
+        self.assertEqual(response["Content-Encoding"], "gzip")
+        self.assertEqual(gzip.decompress(response.content), plain.content)
+
+    def test_negotiation(self):
+        encodings = ["zstd", "br", "gzip"]
+        self.assertEqual(negotiate_encoding("gzip, br", encodings), "br")
+        self.assertEqual(negotiate_encoding("gzip;q=1, br;q=0.5", encodings), "gzip")
+        self.assertEqual(negotiate_encoding("*;q=0.1", encodings), "zstd")
+        self.assertEqual(negotiate_encoding("identity", encodings), None)
+        self.assertEqual(negotiate_encoding("", encodings), None)
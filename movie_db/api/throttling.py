@@ -0,0 +1,30 @@
+# api/throttling.py
+from rest_framework.settings import api_settings
+from rest_framework.throttling import SimpleRateThrottle
+
+
+# Omezení pokusů o přihlášení a registraci: každý pokus stojí jeden výpočet hashe hesla.
+# Sazby jsou v REST_FRAMEWORK['DEFAULT_THROTTLE_RATES'] (None = bez omezení).
+
+class PasswordRateThrottle(SimpleRateThrottle):
+    # Podle IP adresy, bez ohledu na přihlášení
+    scope = 'password'
+
+    def get_rate(self):
+        # THROTTLE_RATES je v DRF načtené při importu, override_settings by se neprojevilo
+        return api_settings.DEFAULT_THROTTLE_RATES.get(self.scope)
+
+    def get_cache_key(self, request, view):
+        return self.cache_format % {'scope': self.scope, 'ident': self.get_ident(request)}
+
+
+class PasswordEmailRateThrottle(PasswordRateThrottle):
+    # Podle cílového účtu, proti útoku na jeden účet z mnoha adres
+    scope = 'password_email'
+
+    def get_cache_key(self, request, view):
+        data = request.data if hasattr(request.data, 'get') else {}
+        email = data.get('email') or data.get('username')
+        if not isinstance(email, str) or not email.strip():
+            return None
+        return self.cache_format % {'scope': self.scope, 'ident': email.strip().lower()}
@@ -1,10 +1,13 @@
 # api/urls.py
 from django.urls import path, include
-from rest_framework.authtoken.views import obtain_auth_token
 from rest_framework.routers import DefaultRouter
+from .async_views import AsyncMovieListView, AsyncMovieDetailView, AsyncDirectorListView, AsyncActorListView, \
+    AsyncPersonDetailView, AsyncGenreListView, AsyncLoginView
 from .views import PersonViewSet, MovieViewSet, PersonListCreateView, PersonDetailView, DirectorListView, \
-    ActorListView, MovieCreateView, MovieListView, MovieDetailView, MovieUpdateView, MovieDeleteView, GenreListView, \
-    RegisterView, LoginView, LogoutView, CurrentUserView
+    ActorListView, MovieCreateView, MovieListView, MovieView, GenreListView, \
+    RegisterView, LoginView, LogoutView, CurrentUserView, SearchView, BulkMovieImportView, \
+    CatalogExportView, CustomAuthToken, FilmographyView, StatsView, MovieBatchView, PersonBatchView, \
+    RelatedMoviesView, JobListView, JobDetailView
 
 router = DefaultRouter()
 router.register(r'people', PersonViewSet)
@@ -12,8 +15,12 @@ router.register(r'movies', MovieViewSet)
 
 
 urlpatterns = [
+    # Před routerem, jinak by 'batch' zachytil detail movies/<pk>/ a people/<pk>/
+    path('movies/batch/', MovieBatchView.as_view(), name='movie-batch'),
+    path('people/batch/', PersonBatchView.as_view(), name='person-batch'),
+
     path('', include(router.urls)),
-    path('api-token-auth/', obtain_auth_token),
+    path('api-token-auth/', CustomAuthToken.as_view()),
 
     path('people/', PersonListCreateView.as_view(), name='person-list-create'),
     path('people/<int:pk>/', PersonDetailView.as_view(), name='person-detail'),
@@ -24,12 +31,35 @@ urlpatterns = [
 
     path('movies/', MovieCreateView.as_view(), name='movie-create'),  # Cesta pro vytváření filmu
     path('api/movies/', MovieListView.as_view(), name='movie-list'),
-    path('api/movies/<str:movie_id>/', MovieDetailView.as_view(), name='movie-detail'),
-    path('api/movies/<str:movie_id>/', MovieUpdateView.as_view(), name='movie-update'),
-    path('api/movies/<str:movie_id>/', MovieDeleteView.as_view(), name='movie-delete'),
+    path('api/movies/<str:movie_id>/', MovieView.as_view(), name='movie-detail'),  # GET, PUT, PATCH, DELETE
 
     path('genres/', GenreListView.as_view(), name='genre-list'),  # Odkazuje na URL
 
+    path('people/<int:pk>/filmography/', FilmographyView.as_view(), name='person-filmography'),
+    path('movies/<int:pk>/related/', RelatedMoviesView.as_view(), name='movie-related'),  # Podobné filmy
+    path('stats/', StatsView.as_view(), name='stats'),
+
+    path('bulk/movies/', BulkMovieImportView.as_view(), name='bulk-movies'),  # Hromadný import
+
+    path('jobs/', JobListView.as_view(), name='job-list'),  # Údržbové úlohy na pozadí (admin)
+    path('jobs/<int:pk>/', JobDetailView.as_view(), name='job-detail'),  # Stav úlohy fronty
+
+    path('export/movies.ndjson', CatalogExportView.as_view(), {'kind': 'movies', 'fmt': 'ndjson'}, name='export-movies-ndjson'),
+    path('export/movies.csv', CatalogExportView.as_view(), {'kind': 'movies', 'fmt': 'csv'}, name='export-movies-csv'),
+    path('export/people.ndjson', CatalogExportView.as_view(), {'kind': 'people', 'fmt': 'ndjson'}, name='export-people-ndjson'),
+    path('export/people.csv', CatalogExportView.as_view(), {'kind': 'people', 'fmt': 'csv'}, name='export-people-csv'),
+
+    path('search/', SearchView.as_view(), name='search'),  # Fulltextové vyhledávání
+
+    # Async verze čtecích endpointů (pro nasazení pod ASGI)
+    path('async/api/movies/', AsyncMovieListView.as_view(), name='async-movie-list'),
+    path('async/api/movies/<str:movie_id>/', AsyncMovieDetailView.as_view(), name='async-movie-detail'),
+    path('async/directors/', AsyncDirectorListView.as_view(), name='async-director-list'),
+    path('async/actors/', AsyncActorListView.as_view(), name='async-actor-list'),
+    path('async/people/<int:pk>/', AsyncPersonDetailView.as_view(), name='async-person-detail'),
+    path('async/genres/', AsyncGenreListView.as_view(), name='async-genre-list'),
+    path('async/auth/', AsyncLoginView.as_view(), name='async-login'),  # Hash hesla v hash_executor
+
     path('user/', RegisterView.as_view(), name='register'),
     path('auth/', LoginView.as_view(), name='login'),
     path('auth/logout/', LogoutView.as_view(), name='logout'),  # Nová URL pro odhlášení
@@ -1,12 +1,58 @@
-from django.contrib.auth import authenticate
+import os
+import uuid
+
+from django.conf import settings
+from django.contrib.auth import authenticate, logout
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.http import StreamingHttpResponse
+from django.urls import reverse
 from rest_framework import viewsets, generics, status
+from rest_framework.generics import get_object_or_404
 from rest_framework.permissions import IsAuthenticatedOrReadOnly, IsAdminUser, AllowAny, IsAuthenticated
 from rest_framework.views import APIView
 from rest_framework.response import Response
 
 
-from .models import Person, Movie, User
-from .serializers import PersonSerializer, MovieSerializer, LoginSerializer, RegisterSerializer
+from .models import Person, Movie, User, Genre, PersonStats, GenreStats, YearStats, MovieSimilarity, Job
+from .filters import filter_movies, to_int, parse_ids, query_ids
+from .importer import CatalogImporter, iter_csv, iter_ndjson
+from .exporter import export_lines
+from .throttling import PasswordRateThrottle, PasswordEmailRateThrottle
+from .pagination import KeysetPaginator, OffsetPaginator, MOVIE_ORDERING, PERSON_ORDERING
+from . import jobs, search
+from .caching import cache_response, conditional_response, movie_list_scope, movie_list_content, \
+    movie_detail_scope, movie_detail_content, person_detail_scope, people_scope, genre_list_scope, \
+    movie_detail_validators, person_detail_validators, people_validators, \
+    filmography_scope, stats_scope, stats_content, batch_scope, movie_batch_content, related_scope, related_content
+from .snapshot import catalog_snapshot, snapshot_list_validators
+from .serializers import PersonSerializer, MovieSerializer, LoginSerializer, RegisterSerializer, \
+    PersonListSerializer, MovieListSerializer, JobSerializer, parse_fields
+
+
+# Hlavička Prefer: respond-async (RFC 7240) - práci udělá worker fronty (api/jobs.py),
+# odpověď je hned 202 se stavem úlohy a odkazem na /api/jobs/<id>/
+def prefers_async(request):
+    return 'respond-async' in request.headers.get('Prefer', '')
+
+
+def job_accepted(job):
+    response = Response(JobSerializer(job).data, status=status.HTTP_202_ACCEPTED)
+    response['Location'] = reverse('job-detail', args=[job.pk])
+    response['Preference-Applied'] = 'respond-async'
+    return response
+
+
+def enqueue_movie_create(request, serializer):
+    # Do fronty jdou jen id a hodnoty z ověřených dat, worker je ověří znovu
+    data = dict(serializer.validated_data)
+    payload = {
+        'director': data.pop('director').pk,
+        'actors': [actor.pk for actor in data.pop('actors')],
+        'genres': list(data.pop('genre_names')),
+        **data,
+    }
+    return job_accepted(jobs.enqueue('create_movie', {'data': payload}, user=request.user))
 
 
 class PersonViewSet(viewsets.ModelViewSet):
@@ -14,14 +60,46 @@ class PersonViewSet(viewsets.ModelViewSet):
     serializer_class = PersonSerializer
     permission_classes = [IsAuthenticatedOrReadOnly]
 
+    @cache_response(person_detail_scope)
+    @conditional_response(person_detail_validators)
+    def retrieve(self, request, *args, **kwargs):
+        try:
+            fields = parse_fields(request.GET, PersonListSerializer.fields)
+        except ValueError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        if fields is None:
+            return super().retrieve(request, *args, **kwargs)
+        # Jen vybrané sloupce (např. bez biografie)
+        person = get_object_or_404(self.get_queryset().values(*PersonListSerializer.columns(fields)), pk=kwargs['pk'])
+        return Response(PersonListSerializer([person], fields).data[0])
+
+    def destroy(self, request, *args, **kwargs):
+        # Smazání osoby smaže kaskádou i všechny filmy, které režírovala
+        if not prefers_async(request):
+            return super().destroy(request, *args, **kwargs)
+        person = self.get_object()
+        return job_accepted(jobs.enqueue('delete_person', {'person_id': person.pk}, user=request.user))
+
 class MovieViewSet(viewsets.ModelViewSet):
-    queryset = Movie.objects.all()
+    queryset = Movie.objects.for_api()
     serializer_class = MovieSerializer
     permission_classes = [IsAuthenticatedOrReadOnly]
 
+    def list(self, request, *args, **kwargs):
+        # Seznam jen pro čtení bez ModelSerializeru (stejný výstup)
+        movies = Movie.objects.values(*MovieListSerializer.fields)
+        return Response(MovieListSerializer(movies).data)
+
+    def create(self, request, *args, **kwargs):
+        if not prefers_async(request):
+            return super().create(request, *args, **kwargs)
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        return enqueue_movie_create(request, serializer)
+
 
 class MovieCreateView(generics.CreateAPIView):
-    queryset = Movie.objects.all()
+    queryset = Movie.objects.for_api()
     serializer_class = MovieSerializer
     permission_classes = [IsAuthenticatedOrReadOnly]  # Zajistí, že pouze přihlášení uživatelé mohou vytvářet filmy
 
@@ -30,19 +108,21 @@ class MovieCreateView(generics.CreateAPIView):
 
         # Ověření dat
         if serializer.is_valid():
+            if prefers_async(request):
+                return enqueue_movie_create(request, serializer)
             movie = serializer.save()  # Uložení filmu
 
-            # Příprava dat pro odpověď
+            # Příprava dat pro odpověď (herce a žánry už známe z ověřených dat, bez dalších dotazů)
             movie_data = {
                 "_id": str(movie.id),
                 "name": movie.name,
                 "year": movie.year,
-                "directorID": str(movie.director.id),
-                "actorIDs": [str(actor.id) for actor in movie.actors.all()],
-                "genres": movie.genres,
+                "directorID": str(movie.director_id),
+                "actorIDs": [str(actor.id) for actor in serializer.validated_data['actors']],
+                "genres": list(dict.fromkeys(serializer.validated_data['genre_names'])),
                 "isAvailable": movie.isAvailable,
                 "dateAdded": movie.dateAdded.isoformat(),  # ISO formát pro datum
-                "__v": movie.__v,  # Pokud nemáte skutečné pole __v, můžete ponechat 0 nebo ho odstranit
+                "__v": 0,  # Pokud nemáte skutečné pole __v, můžete ponechat 0 nebo ho odstranit
             }
             return Response(movie_data, status=status.HTTP_201_CREATED)  # Vraťte data nově vytvořeného filmu
 
@@ -54,6 +134,8 @@ from rest_framework.authtoken.models import Token
 from rest_framework.response import Response
 
 class CustomAuthToken(ObtainAuthToken):
+    throttle_classes = [PasswordRateThrottle, PasswordEmailRateThrottle]
+
     def post(self, request, *args, **kwargs):
         serializer = self.serializer_class(data=request.data)
         serializer.is_valid(raise_exception=True)
@@ -72,42 +154,41 @@ class PersonDetailView(generics.RetrieveUpdateDestroyAPIView):
 
 
 class DirectorListView(APIView):
+    @cache_response(people_scope('director'))
+    @conditional_response(people_validators('director'))
     def get(self, request):
-        limit = request.GET.get('limit')  # Získání parametru limit
-        directors = Person.objects.filter(role='director')
-
-        # Použijeme limit, pokud je zadán a je platný
-        if limit:
-            try:
-                limit = int(limit)
-                directors = directors[:limit]
-            except ValueError:
-                return Response({"error": "Limit must be an integer."}, status=status.HTTP_400_BAD_REQUEST)
+        # Stránkování podle (name, id), parametry limit a cursor
+        paginator = KeysetPaginator(PERSON_ORDERING)
+        try:
+            fields = parse_fields(request.GET, PersonListSerializer.fields)
+            directors = Person.objects.filter(role='director').values(*PersonListSerializer.columns(fields, paginator.fields))
+            directors = paginator.paginate_queryset(directors, request)
+        except ValueError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
 
-        serializer = PersonSerializer(directors, many=True)
-        return Response(serializer.data)
+        return paginator.get_paginated_response(PersonListSerializer(directors, fields).data)
 
 
 
 class ActorListView(APIView):
+    @cache_response(people_scope('actor'))
+    @conditional_response(people_validators('actor'))
     def get(self, request):
-        limit = request.GET.get('limit')  # Získání parametru limit
-        actors = Person.objects.filter(role='actor')
-
-        # Použijeme limit, pokud je zadán a je platný
-        if limit:
-            try:
-                limit = int(limit)
-                actors = actors[:limit]
-            except ValueError:
-                return Response({"error": "Limit must be an integer."}, status=status.HTTP_400_BAD_REQUEST)
+        # Stránkování podle (name, id), parametry limit a cursor
+        paginator = KeysetPaginator(PERSON_ORDERING)
+        try:
+            fields = parse_fields(request.GET, PersonListSerializer.fields)
+            actors = Person.objects.filter(role='actor').values(*PersonListSerializer.columns(fields, paginator.fields))
+            actors = paginator.paginate_queryset(actors, request)
+        except ValueError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
 
-        serializer = PersonSerializer(actors, many=True)
-        return Response(serializer.data)
+        return paginator.get_paginated_response(PersonListSerializer(actors, fields).data)
 
 
 class PersonDetailView(APIView):
     # GET požadavek pro ziskani detailu cloveka
+    @conditional_response(person_detail_validators)
     def get(self, request, pk):
         try:
             person = Person.objects.get(pk=pk)
@@ -135,6 +216,8 @@ class PersonDetailView(APIView):
     def delete(self, request, pk):
         try:
             person = Person.objects.get(pk=pk)
+            if prefers_async(request):
+                return job_accepted(jobs.enqueue('delete_person', {'person_id': person.pk}, user=request.user))
 
             # Data o osobě před smazáním
             person_data = {
@@ -157,135 +240,188 @@ class PersonDetailView(APIView):
 
 # Movies views
 class MovieListView(APIView):
+    @cache_response(movie_list_scope, movie_list_content)
+    @conditional_response(snapshot_list_validators)
     def get(self, request):
-        # Získání filtrů z query parametrů
-        director_id = request.GET.get('directorID')
-        actor_id = request.GET.get('actorID')
-        genre = request.GET.get('genre')
-        from_year = request.GET.get('fromYear')
-        to_year = request.GET.get('toYear')
-        limit = request.GET.get('limit', 10)  # výchozí limit 10
-
-        # Získání všech filmů
-        movies = Movie.objects.all()
-
-        # Aplikace filtrů
-        if director_id:
-            movies = movies.filter(director_id=director_id)
-        if actor_id:
-            movies = movies.filter(actors__id=actor_id)  # ManyToManyField
-        if genre:
-            movies = movies.filter(genres__contains=[genre])  # JSONField
-        if from_year:
-            movies = movies.filter(year__gte=int(from_year))
-        if to_year:
-            movies = movies.filter(year__lte=int(to_year))
-
-        # Omezit počet výsledků
-        movies = movies[:int(limit)]
+        # Stránkování od nejnovějších podle (dateAdded, id), výchozí limit 10
+        paginator = KeysetPaginator(MOVIE_ORDERING)
+        try:
+            # Výběr polí (?fields=) a vložení režiséra/herců (?expand=)
+            fields = parse_fields(request.GET, MovieListSerializer.output_fields)
+            expand = parse_fields(request.GET, MovieListSerializer.expandable, 'expand')
+            snapshot = catalog_snapshot.current()
+            if snapshot is not None:
+                # Filtry i stránka ze snímku katalogu v paměti, bez dotazů do databáze
+                movies = snapshot.movie_page(paginator, request)
+                data = MovieListSerializer(movies, fields, expand).build(movies, *snapshot.relations(movies))
+                return paginator.get_paginated_response(data, status=status.HTTP_200_OK)
+            # Získání filmů podle filtrů z query parametrů (jen řádky, herci a žánry se načtou dávkově)
+            columns = MovieListSerializer.columns(fields, paginator.fields)
+            movies = filter_movies(Movie.objects.values(*columns), request.GET)
+            movies = paginator.paginate_queryset(movies, request)
+        except ValueError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
 
         # Serializace dat
-        serializer = MovieSerializer(movies, many=True)
-        return Response(serializer.data, status=status.HTTP_200_OK)
+        serializer = MovieListSerializer(movies, fields, expand)
+        return paginator.get_paginated_response(serializer.data, status=status.HTTP_200_OK)
+
+
+# Detail filmu s režisérem a herci (film načtený přes movie_detail_queryset)
+MOVIE_DETAIL_FIELDS = (
+    "_id", "name", "year", "directorID", "actorIDs", "genres", "isAvailable", "dateAdded", "__v", "director", "actors",
+)
+
+
+def movie_detail_queryset(fields=None):
+    # ?fields= zúží SELECT na potřebné sloupce a vynechá nepotřebný JOIN i prefetch
+    if fields is None:
+        return Movie.objects.for_api()
+    columns = {'name': 'name', 'year': 'year', 'isAvailable': 'isAvailable', 'dateAdded': 'dateAdded',
+               'directorID': 'director', 'director': 'director'}
+    only = ['id', *dict.fromkeys(columns[field] for field in fields if field in columns)]
+    if 'director' in fields:
+        only += ['director__id', 'director__name']
+    return Movie.objects.for_api(
+        director='director' in fields,
+        actors='actorIDs' in fields or 'actors' in fields,
+        genres='genres' in fields,
+    ).only(*only)
+
+
+def movie_detail_data(movie, fields=None):
+    getters = {
+        "_id": lambda: str(movie.id),
+        "name": lambda: movie.name,
+        "year": lambda: movie.year,
+        "directorID": lambda: str(movie.director_id),
+        "actorIDs": lambda: [str(actor.id) for actor in movie.actors.all()],
+        "genres": lambda: movie.genre_names,
+        "isAvailable": lambda: movie.isAvailable,
+        "dateAdded": lambda: movie.dateAdded.isoformat(),
+        "__v": lambda: 0,
+        # Režisér a herci jako vložené objekty
+        "director": lambda: {"_id": str(movie.director.id), "name": movie.director.name},
+        "actors": lambda: [{"_id": str(actor.id), "name": actor.name} for actor in movie.actors.all()],
+    }
+    fields = fields or MOVIE_DETAIL_FIELDS
+    return {field: getters[field]() for field in MOVIE_DETAIL_FIELDS if field in fields or field == "_id"}
 
 
 class MovieDetailView(APIView):
+    @cache_response(movie_detail_scope, movie_detail_content)
+    @conditional_response(movie_detail_validators)
     def get(self, request, movie_id):
         try:
-            # Získání filmu podle ID
-            movie = Movie.objects.get(id=movie_id)
-
-            # Získání režiséra a herců
-            director = {
-                "_id": str(movie.director.id),
-                "name": movie.director.name
-            }
-            actors = [
-                {
-                    "_id": str(actor.id),
-                    "name": actor.name
-                } for actor in movie.actors.all()
-            ]
-
-            # Serializace dat
-            movie_data = {
-                "_id": str(movie.id),
-                "name": movie.name,
-                "year": movie.year,
-                "directorID": str(movie.director.id),
-                "actorIDs": [str(actor.id) for actor in movie.actors.all()],
-                "genres": movie.genres,
-                "isAvailable": movie.isAvailable,
-                "dateAdded": movie.dateAdded.isoformat(),
-                "__v": movie.__v,
-                "director": director,
-                "actors": actors
-            }
-
-            return Response(movie_data, status=status.HTTP_200_OK)
-        except Movie.DoesNotExist:
+            fields = parse_fields(request.GET, MOVIE_DETAIL_FIELDS)
+        except ValueError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            # Získání filmu podle ID (nečíselné id je také 404, jako u async verze)
+            movie = movie_detail_queryset(fields).get(id=movie_id)
+        except (Movie.DoesNotExist, ValueError):
             return Response({"detail": "Movie not found."}, status=status.HTTP_404_NOT_FOUND)
+        return Response(movie_detail_data(movie, fields), status=status.HTTP_200_OK)
 
 
 
 
 class MovieUpdateView(APIView):
+    # PUT nahradí herce seznamem z požadavku (chybějící seznam = žádní herci),
+    # PATCH mění jen pole, která v požadavku jsou. Nezměněné hodnoty se nezapisují.
     def put(self, request, movie_id):
+        return self.update(request, movie_id, partial=False)
+
+    def patch(self, request, movie_id):
+        return self.update(request, movie_id, partial=True)
+
+    def update(self, request, movie_id, partial):
         try:
-            # Získání filmu podle ID
             movie = Movie.objects.get(id=movie_id)
+        except (Movie.DoesNotExist, ValueError):
+            return Response({"detail": "Movie not found."}, status=status.HTTP_404_NOT_FOUND)
+        data = request.data
 
-            # Načtení dat z požadavku
-            data = request.data
-
-            # Aktualizace filmu
-            movie.name = data.get("name", movie.name)
-            movie.year = data.get("year", movie.year)
-            movie.isAvailable = data.get("isAvailable", movie.isAvailable)
-            movie.genres = data.get("genres", movie.genres)
+        # Jednoduchá pole
+        changed = [
+            field for field in ("name", "year", "isAvailable")
+            if field in data and data[field] != getattr(movie, field)
+        ]
+        for field in changed:
+            setattr(movie, field, data[field])
+        try:
+            movie.clean_fields(exclude=[f.name for f in Movie._meta.fields if f.name not in changed])
+        except ValidationError as e:
+            return Response(e.message_dict, status=status.HTTP_400_BAD_REQUEST)
 
-            # Zpracování režiséra
+        try:
+            # Režisér
             director_id = data.get("director")  # Použijte 'director' místo 'directorID'
-            if director_id:
-                try:
-                    movie.director = Person.objects.get(id=director_id)
-                except Person.DoesNotExist:
+            if director_id and to_int(director_id, "director") != movie.director_id:
+                director_id = to_int(director_id, "director")
+                if not Person.objects.filter(id=director_id, role='director').exists():
                     return Response({"detail": "Director not found."}, status=status.HTTP_404_NOT_FOUND)
-
-            # Zpracování herců
-            actor_ids = data.get("actors", [])  # Použijte 'actors' místo 'actorIDs'
-            movie.actors.clear()  # Odstraní předchozí herce
-            for actor_id in actor_ids:
-                try:
-                    actor = Person.objects.get(id=actor_id)
-                    movie.actors.add(actor)
-                except Person.DoesNotExist:
-                    return Response({"detail": f"Actor with ID {actor_id} not found."}, status=status.HTTP_404_NOT_FOUND)
-
-            # Uložení změn do databáze
-            movie.save()
-
-            # Příprava odpovědi
-            movie_data = {
-                "id": str(movie.id),  # Změněno na 'id'
-                "name": movie.name,
-                "year": movie.year,
-                "director": str(movie.director.id),  # Změněno na 'director'
-                "actors": [str(actor.id) for actor in movie.actors.all()],  # Změněno na 'actors'
-                "genres": movie.genres,
-                "isAvailable": movie.isAvailable,
-                "dateAdded": movie.dateAdded.isoformat(),
-            }
-
-            return Response(movie_data, status=status.HTTP_200_OK)
-        except Movie.DoesNotExist:
-            return Response({"detail": "Movie not found."}, status=status.HTTP_404_NOT_FOUND)
+                movie.director_id = director_id
+                changed.append("director")
+
+            # Herci: všechna id ověříme jedním dotazem ještě před zápisem
+            actor_ids = None
+            if "actors" in data or not partial:
+                actors = data.get("actors") or []
+                if not isinstance(actors, list):
+                    raise ValueError("actors must be a list of IDs.")
+                actor_ids = list(dict.fromkeys(to_int(pk, "actors") for pk in actors))
+                found = set(Person.objects.filter(id__in=actor_ids, role='actor').values_list('id', flat=True))
+                missing = [pk for pk in actor_ids if pk not in found]
+                if missing:
+                    return Response({"detail": f"Actor with ID {missing[0]} not found."},
+                                    status=status.HTTP_404_NOT_FOUND)
+        except ValueError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        genres = data.get("genres")
+        if genres is not None:
+            if not isinstance(genres, list) or not all(isinstance(name, str) and name for name in genres):
+                return Response({"error": "Genres must be a list of names."}, status=status.HTTP_400_BAD_REQUEST)
+            if genres == movie.genre_names:
+                genres = None
+
+        # Všechny zápisy v jedné transakci, do vazební tabulky jen rozdíl
+        with transaction.atomic():
+            if changed:
+                movie.save(update_fields=[*changed, "updatedAt"])
+            if actor_ids is not None:
+                current = set(movie.actors.through.objects.filter(movie_id=movie.id).values_list('person_id', flat=True))
+                removed = current - set(actor_ids)
+                added = [pk for pk in actor_ids if pk not in current]
+                if removed:
+                    movie.actors.remove(*removed)
+                if added:
+                    movie.actors.add(*added)
+            if genres is not None:
+                movie.set_genres(genres)
+
+        if actor_ids is None:
+            actor_ids = movie.actors.through.objects.filter(movie_id=movie.id).values_list('person_id', flat=True)
+
+        # Příprava odpovědi
+        movie_data = {
+            "id": str(movie.id),  # Změněno na 'id'
+            "name": movie.name,
+            "year": movie.year,
+            "director": str(movie.director_id),  # Změněno na 'director'
+            "actors": [str(pk) for pk in sorted(actor_ids)],  # Změněno na 'actors'
+            "genres": movie.genre_names,
+            "isAvailable": movie.isAvailable,
+            "dateAdded": movie.dateAdded.isoformat(),
+        }
+        return Response(movie_data, status=status.HTTP_200_OK)
 
 class MovieDeleteView(APIView):
     def delete(self, request, movie_id):
         try:
             # Získání filmu podle ID
-            movie = Movie.objects.get(id=movie_id)
+            movie = Movie.objects.for_api().get(id=movie_id)
 
             # Uložení dat pro odpověď
             movie_data = {
@@ -294,10 +430,10 @@ class MovieDeleteView(APIView):
                 "year": movie.year,
                 "directorID": str(movie.director.id),
                 "actorIDs": [str(actor.id) for actor in movie.actors.all()],
-                "genres": movie.genres,
+                "genres": movie.genre_names,
                 "isAvailable": movie.isAvailable,
                 "dateAdded": movie.dateAdded.isoformat(),
-                "__v": movie.__v,
+                "__v": 0,
             }
 
             # Odstranění filmu
@@ -312,28 +448,259 @@ class MovieDeleteView(APIView):
             return Response({"detail": str(e)}, status=status.HTTP_400_BAD_REQUEST)
 
 
+# Detail, úprava i smazání filmu sdílí jednu URL, Django by jinak použil jen první view
+class MovieView(MovieDetailView, MovieUpdateView, MovieDeleteView):
+    pass
+
+
 # Genre views
 class GenreListView(APIView):
+    @cache_response(genre_list_scope)
+    def get(self, request):
+        genres = Genre.objects.order_by('name').values_list('name', flat=True)
+        return Response(list(genres), status=status.HTTP_200_OK)
+
+
+
+# Více filmů nebo osob podle id najednou: GET ?ids=1,2,3 nebo POST {"ids": [...]} pro dlouhé seznamy.
+# Výsledky jsou v pořadí požadavku, neexistující id jsou v "missing".
+class BatchView(APIView):
+    def get(self, request):
+        return self.batch(query_ids(request.GET))
+
+    def post(self, request):
+        data = request.data
+        return self.batch(data.get('ids') if isinstance(data, dict) else data)
+
+    def batch(self, ids):
+        try:
+            ids = parse_ids(ids, getattr(settings, 'API_BATCH_MAX_IDS', 100))
+            fields = parse_fields(self.request.GET, self.output_fields)
+        except ValueError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        found = self.fetch(ids, fields)
+        return Response({
+            "results": self.serialize([found[pk] for pk in ids if pk in found], fields),
+            "missing": [str(pk) for pk in ids if pk not in found],
+        }, status=status.HTTP_200_OK)
+
+
+class MovieBatchView(BatchView):
+    output_fields = MOVIE_DETAIL_FIELDS
+
+    @cache_response(batch_scope('movie'), movie_batch_content)
+    def get(self, request):
+        return super().get(request)
+
+    def fetch(self, ids, fields):
+        # Jeden dotaz id__in s režisérem přes JOIN, herci a žánry dávkově
+        return movie_detail_queryset(fields).in_bulk(ids)
+
+    def serialize(self, movies, fields):
+        return [movie_detail_data(movie, fields) for movie in movies]
+
+
+class PersonBatchView(BatchView):
+    output_fields = PersonListSerializer.fields
+
+    @cache_response(batch_scope('person'))
     def get(self, request):
-        genres = [
-            "sci-fi",
-            "adventure",
-            "action",
-            "romantic",
-            "animated",
-            "comedy"
+        return super().get(request)
+
+    def fetch(self, ids, fields):
+        people = Person.objects.filter(id__in=ids).values(*PersonListSerializer.columns(fields))
+        return {person['id']: person for person in people}
+
+    def serialize(self, people, fields):
+        return PersonListSerializer(people, fields).data
+
+
+# Filmografie osoby: počty ze souhrnné tabulky PersonStats, filmy přes indexy vazeb
+class FilmographyView(APIView):
+    @cache_response(filmography_scope)
+    def get(self, request, pk):
+        person = Person.objects.filter(pk=pk).values(
+            'id', 'name', 'role', 'stats__directedCount', 'stats__actedCount'
+        ).first()
+        if person is None:
+            return Response({"error": "Person not found."}, status=status.HTTP_404_NOT_FOUND)
+
+        def movies(queryset):
+            return [
+                {"_id": str(movie_id), "name": name, "year": year}
+                for movie_id, name, year in queryset.order_by('year', 'id').values_list('id', 'name', 'year')
+            ]
+
+        return Response({
+            "_id": str(person['id']),
+            "name": person['name'],
+            "role": person['role'],
+            "directedCount": person['stats__directedCount'] or 0,
+            "actedCount": person['stats__actedCount'] or 0,
+            "directed": movies(Movie.objects.filter(director_id=pk)),
+            "acted": movies(Movie.objects.filter(actors=pk)),
+        }, status=status.HTTP_200_OK)
+
+
+# Podobné filmy z předpočítané tabulky (api/similarity.py): jeden dotaz nad indexem (movie, score)
+class RelatedMoviesView(APIView):
+    @cache_response(related_scope, related_content)
+    def get(self, request, pk):
+        related = MovieSimilarity.objects.filter(movie_id=pk).order_by('-score', 'related_id') \
+            .values_list('related_id', 'related__name', 'related__year', 'score')
+        results = [
+            {"_id": str(movie_id), "name": name, "year": year, "score": score}
+            for movie_id, name, year, score in related
         ]
-        return Response(genres, status=status.HTTP_200_OK)
+        if not results and not Movie.objects.filter(pk=pk).exists():
+            return Response({"detail": "Movie not found."}, status=status.HTTP_404_NOT_FOUND)
+        return Response({"results": results}, status=status.HTTP_200_OK)
+
+
+# Souhrnné statistiky katalogu, jen ze souhrnných tabulek (api/stats.py)
+class StatsView(APIView):
+    TOP = 10
+
+    @cache_response(stats_scope, stats_content)
+    def get(self, request):
+        years = YearStats.objects.filter(movieCount__gt=0).order_by('year').values_list('year', 'movieCount')
+        genres = GenreStats.objects.filter(movieCount__gt=0).order_by('-movieCount', 'genre__name') \
+            .values_list('genre__name', 'movieCount')
+
+        def top(field):
+            people = PersonStats.objects.filter(**{f'{field}__gt': 0}).order_by(f'-{field}', '-person_id') \
+                .values_list('person_id', 'person__name', field)[:self.TOP]
+            return [{"_id": str(pk), "name": name, "count": count} for pk, name, count in people]
+
+        years = [{"year": year, "count": count} for year, count in years]
+        return Response({
+            "movies": sum(year['count'] for year in years),
+            "years": years,
+            "genres": [{"name": name, "count": count} for name, count in genres],
+            "topDirectors": top('directedCount'),
+            "topActors": top('actedCount'),
+        }, status=status.HTTP_200_OK)
+
+
+# Hromadný import filmů a osob (NDJSON nebo CSV v těle požadavku)
+class BulkMovieImportView(APIView):
+    def post(self, request):
+        # Tělo čteme po řádcích přímo ze streamu, request.data by ho celé načetlo do paměti
+        stream = request.stream or []
+        format = 'csv' if request.content_type.startswith('text/csv') else 'ndjson'
+        if prefers_async(request):
+            return job_accepted(self.enqueue(request, stream, format))
+        if format == 'csv':
+            records = iter_csv(stream)
+        else:
+            records = iter_ndjson(stream)
+
+        result = CatalogImporter(default_type=request.GET.get('type', 'movie')).run(records)
+        return Response(result, status=status.HTTP_200_OK)
+
+    def enqueue(self, request, stream, format):
+        # Tělo se po blocích uloží do souboru pro worker, ten ho po úspěšném importu smaže
+        os.makedirs(settings.API_JOB_FILES_DIR, exist_ok=True)
+        path = os.path.join(settings.API_JOB_FILES_DIR, f'import-{uuid.uuid4().hex}.{format}')
+        with open(path, 'wb') as file:
+            while stream and (chunk := stream.read(64 * 1024)):
+                file.write(chunk)
+        payload = {'path': path, 'format': format, 'default_type': request.GET.get('type', 'movie')}
+        return jobs.enqueue('import_catalog', payload, user=request.user)
+
+
+# Stav úlohy fronty - jen pro uživatele, který ji založil, a pro administrátory
+class JobDetailView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, pk):
+        job = get_object_or_404(Job, pk=pk)
+        if job.user_id != request.user.pk and not request.user.is_admin:
+            return Response({"error": "Job not found."}, status=status.HTTP_404_NOT_FOUND)
+        return Response(JobSerializer(job).data)
+
+
+# Údržba na pozadí (přepočet statistik, vyhledávacího indexu, podobných filmů)
+class JobListView(APIView):
+    permission_classes = [IsAuthenticated]
+    maintenance_kinds = ['rebuild_stats', 'rebuild_search', 'build_similarity']
+
+    def post(self, request):
+        if not request.user.is_admin:
+            return Response({"error": "Only administrators can start maintenance jobs."},
+                            status=status.HTTP_403_FORBIDDEN)
+        kind = request.data.get('kind')
+        if kind not in self.maintenance_kinds:
+            return Response({"error": f"Unknown job kind, use one of: {', '.join(self.maintenance_kinds)}."},
+                            status=status.HTTP_400_BAD_REQUEST)
+        payload = {}
+        if kind == 'build_similarity':
+            # Výchozí je jen přepočet změněných filmů, celý výpočet s changed=false
+            payload['changed'] = str(request.data.get('changed', True)).lower() not in ('false', '0')
+        return job_accepted(jobs.enqueue(kind, payload, user=request.user))
+
+
+# Export katalogu - streamuje se po řádcích, odpověď se nikdy nesestavuje celá v paměti
+class CatalogExportView(APIView):
+    CONTENT_TYPES = {'ndjson': 'application/x-ndjson', 'csv': 'text/csv'}
+
+    def get(self, request, kind, fmt):
+        movies = people = None
+        try:
+            if kind == 'movies':
+                # Stejné filtry jako seznam filmů
+                movies = filter_movies(Movie.objects.all(), request.GET)
+            elif request.GET.get('role'):
+                people = Person.objects.filter(role=request.GET['role'])
+        except ValueError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        response = StreamingHttpResponse(
+            export_lines(kind, fmt, movies=movies, people=people),
+            content_type=f'{self.CONTENT_TYPES[fmt]}; charset=utf-8',
+        )
+        response['Content-Disposition'] = f'attachment; filename="{kind}.{fmt}"'
+        return response
+
+
+# Fulltextové vyhledávání
+class SearchView(APIView):
+    TYPES = ('movie', 'person', 'director', 'actor')
+
+    def get(self, request):
+        if not search.is_supported():
+            return Response({"error": "Search is not available on this database backend."},
+                            status=status.HTTP_501_NOT_IMPLEMENTED)
+
+        text = request.GET.get('q', '').strip()
+        if not text:
+            return Response({"error": "Query parameter q is required."}, status=status.HTTP_400_BAD_REQUEST)
+        kind = request.GET.get('type')
+        if kind and kind not in self.TYPES:
+            return Response({"error": f"Type must be one of: {', '.join(self.TYPES)}."},
+                            status=status.HTTP_400_BAD_REQUEST)
+
+        # Výsledky jsou seřazené podle relevance (bm25), stránkujeme přes limit/offset
+        paginator = OffsetPaginator()
+        try:
+            results = paginator.paginate(
+                lambda limit, offset: search.search(text, kind=kind, limit=limit, offset=offset), request
+            )
+        except ValueError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        return paginator.get_paginated_response(results, status=status.HTTP_200_OK)
 
 
 
 # User views
 class RegisterView(generics.CreateAPIView):
     permission_classes = [AllowAny]
+    throttle_classes = [PasswordRateThrottle]
     serializer_class = RegisterSerializer
 
 class LoginView(generics.GenericAPIView):
     permission_classes = [AllowAny]
+    throttle_classes = [PasswordRateThrottle, PasswordEmailRateThrottle]
     serializer_class = LoginSerializer
 
     def post(self, request, *args, **kwargs):
@@ -356,13 +723,12 @@ class LogoutView(generics.GenericAPIView):
     permission_classes = [IsAuthenticated]
 
     def delete(self, request):
-        # Získání tokenu
-        try:
-            # Tady můžete provést další operace, jako např. blacklist token
-            # V tomto příkladu jednoduše vracíme úspěšnou odpověď
-            return Response({"detail": "Uživatel odhlášen"}, status=status.HTTP_204_NO_CONTENT)
-        except Exception as e:
-            return Response({"detail": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        # Token se smaže (signál ho vyhodí i z cache autentizace), session se ukončí
+        if isinstance(request.auth, Token):
+            request.auth.delete()
+        else:
+            logout(request)
+        return Response({"detail": "Uživatel odhlášen"}, status=status.HTTP_204_NO_CONTENT)
 
 
 class CurrentUserView(generics.RetrieveAPIView):
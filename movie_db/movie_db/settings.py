@@ -10,8 +10,14 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.1/ref/settings/
 """
 
+import hashlib
+import importlib.util
+import os
+import tempfile
 from pathlib import Path
 
+from django.core.exceptions import ImproperlyConfigured
+
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
@@ -48,16 +54,62 @@ INSTALLED_APPS = [
 
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework.authentication.TokenAuthentication',  # Token Authentication
+        'api.authentication.CachedTokenAuthentication',  # Token Authentication (s cache, api/authentication.py)
         'rest_framework.authentication.SessionAuthentication', # (volitelné) pro session-based autentizaci
     ],
+    # JSON přes orjson, pokud je nainstalovaný (api/renderers.py), jinak stdlib jako JSONRenderer
+    'DEFAULT_RENDERER_CLASSES': [
+        'api.renderers.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated',  # Ověření, že uživatel je přihlášen
     ],
+    # Přihlášení, token a registrace (api/throttling.py): podle IP a podle e-mailu
+    'DEFAULT_THROTTLE_RATES': {
+        'password': os.environ.get('API_PASSWORD_THROTTLE_RATE', '30/min'),
+        'password_email': os.environ.get('API_PASSWORD_EMAIL_THROTTLE_RATE', '10/min'),
+    },
 }
 
+# Stránkování seznamů (filmy, režiséři, herci)
+API_PAGE_SIZE = 10
+API_MAX_PAGE_SIZE = 100
+# Nejvýš id v jednom požadavku na /api/movies/batch/ a /api/people/batch/
+API_BATCH_MAX_IDS = 100
+
+# Podobné filmy (api/similarity.py, manage.py build_similarity): počet sousedů na film a četnost
+# příznaku (např. žánru), nad kterou už příznak nevybírá kandidáty
+API_SIMILARITY_TOP_K = 10
+API_SIMILARITY_MAX_DF = 500
+
+# Seznam filmů ze snímku katalogu v paměti každého workeru (api/snapshot.py). Verzi snímku
+# sdílí procesy přes cache API_CACHE_ALIAS, pro více procesů je proto potřeba sdílená cache.
+API_CATALOG_SNAPSHOT = os.environ.get('API_CATALOG_SNAPSHOT', '') == '1'
+
+# Fronta úloh na pozadí (api/jobs.py, manage.py run_worker): počet pokusů, exponenciální odklad
+# opakování v sekundách (základ a strop), po kolika sekundách běhu se úloha považuje za ztracenou
+# a adresář pro těla hromadných importů čekajících ve frontě (sdílený s workerem)
+API_JOB_MAX_ATTEMPTS = 3
+API_JOB_RETRY_DELAY = 10
+API_JOB_RETRY_MAX_DELAY = 600
+API_JOB_TIMEOUT = int(os.environ.get('API_JOB_TIMEOUT', 3600))
+API_JOB_FILES_DIR = os.environ.get('API_JOB_FILES_DIR', os.path.join(tempfile.gettempdir(), 'movie_db-jobs'))
+
+# Komprese odpovědí (api/middleware.CompressionMiddleware): minimální velikost těla v bajtech,
+# pořadí kódování při stejné q-hodnotě v Accept-Encoding a úrovně komprese. br a zstd
+# vyžadují balíčky brotli a zstandard, bez nich se nabízí jen gzip.
+API_COMPRESSION = os.environ.get('API_COMPRESSION', '1') == '1'
+API_COMPRESSION_MIN_SIZE = int(os.environ.get('API_COMPRESSION_MIN_SIZE', 1024))
+API_COMPRESSION_ENCODINGS = ['zstd', 'br', 'gzip']
+API_COMPRESSION_LEVELS = {'zstd': 3, 'br': 4, 'gzip': 6}
+
 
 MIDDLEWARE = [
+    'api.middleware.QueryTimingMiddleware',  # Vypnutý, dokud není API_TIMING_SAMPLE_RATE > 0
+    'api.middleware.CompressionMiddleware',  # gzip/br/zstd podle Accept-Encoding, vypíná API_COMPRESSION=0
+    'api.middleware.ReadOnlyRequestMiddleware',  # Vypnutý bez spojení 'read' (DB_SQLITE_READ_CONNECTION)
+    'api.middleware.CatalogSnapshotMiddleware',  # Vypnutý, dokud není API_CATALOG_SNAPSHOT=1
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -91,12 +143,116 @@ WSGI_APPLICATION = 'movie_db.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/5.1/ref/settings/#databases
 
-DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+# Výchozí je SQLite v db.sqlite3. PostgreSQL (psycopg 3) se zapne proměnnou DB_ENGINE=postgresql,
+# připojení se nastaví proměnnými DB_NAME, DB_USER, DB_PASSWORD, DB_HOST a DB_PORT.
+DB_ENGINE = os.environ.get('DB_ENGINE', 'sqlite')
+
+if DB_ENGINE == 'sqlite':
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': os.environ.get('DB_NAME', BASE_DIR / 'db.sqlite3'),
+            'OPTIONS': {},
+        }
+    }
+    # Profil 'tuned' (výchozí): WAL, aby čtení nečekalo na zápis, synchronous=NORMAL (ve WAL
+    # bezpečné, při pádu OS lze přijít jen o poslední commity), mmap a větší cache stránek.
+    # Transakce začínají rovnou zámkem pro zápis (IMMEDIATE), takže souběžné zápisy čekají
+    # až timeout sekund místo okamžité chyby "database is locked". 'default' = výchozí SQLite.
+    DB_SQLITE_PROFILE = os.environ.get('DB_SQLITE_PROFILE', 'tuned')
+    if DB_SQLITE_PROFILE == 'tuned':
+        SQLITE_PRAGMAS = {
+            'journal_mode': 'WAL',
+            'synchronous': 'NORMAL',
+            'mmap_size': int(os.environ.get('DB_SQLITE_MMAP_SIZE', 256 * 1024 * 1024)),
+            'cache_size': -int(os.environ.get('DB_SQLITE_CACHE_SIZE_KB', 64 * 1024)),  # záporné = KiB
+            'temp_store': 'MEMORY',
+        }
+        DATABASES['default']['OPTIONS'] = {
+            'init_command': ''.join(f'PRAGMA {name}={value};' for name, value in SQLITE_PRAGMAS.items()),
+            'transaction_mode': 'IMMEDIATE',
+            'timeout': float(os.environ.get('DB_SQLITE_BUSY_TIMEOUT', 5)),  # busy_timeout v sekundách
+        }
+    elif DB_SQLITE_PROFILE != 'default':
+        raise ImproperlyConfigured("DB_SQLITE_PROFILE must be 'tuned' or 'default'.")
+
+    # Samostatné spojení pro čtení v GET požadavcích (api/routers.py), jen pro čtení
+    # (query_only) a bez zámku pro zápis na začátku transakce. Jen pro nasazení, testy
+    # běží v transakcích na 'default' a druhé spojení by jejich data nevidělo.
+    if os.environ.get('DB_SQLITE_READ_CONNECTION', '') == '1':
+        read_options = {**DATABASES['default']['OPTIONS'], 'transaction_mode': None}
+        read_options['init_command'] = read_options.get('init_command', '') + 'PRAGMA query_only=ON;'
+        DATABASES['read'] = {**DATABASES['default'], 'OPTIONS': read_options, 'TEST': {'MIRROR': 'default'}}
+        DATABASE_ROUTERS = ['api.routers.ReadWriteRouter']
+elif DB_ENGINE == 'postgresql':
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.postgresql',
+            'NAME': os.environ.get('DB_NAME', 'movie_db'),
+            'USER': os.environ.get('DB_USER', ''),
+            'PASSWORD': os.environ.get('DB_PASSWORD', ''),
+            'HOST': os.environ.get('DB_HOST', ''),
+            'PORT': os.environ.get('DB_PORT', ''),
+            # Ověření spojení před použitím v novém požadavku (po restartu serveru apod.)
+            'CONN_HEALTH_CHECKS': True,
+            # Za PgBouncerem v režimu transaction nelze používat serverové kurzory (iterator())
+            'DISABLE_SERVER_SIDE_CURSORS': os.environ.get('DB_DISABLE_SERVER_SIDE_CURSORS', '') == '1',
+            'OPTIONS': {},
+        }
     }
+    # Pool spojení v procesu (psycopg_pool): DB_POOL_MAX_SIZE > 0. Pool a trvalá spojení
+    # (CONN_MAX_AGE) nejdou kombinovat, bez poolu se spojení drží DB_CONN_MAX_AGE sekund.
+    DB_POOL_MAX_SIZE = int(os.environ.get('DB_POOL_MAX_SIZE', 0))
+    if DB_POOL_MAX_SIZE:
+        DATABASES['default']['CONN_MAX_AGE'] = 0
+        DATABASES['default']['OPTIONS']['pool'] = {
+            'min_size': int(os.environ.get('DB_POOL_MIN_SIZE', 2)),
+            'max_size': DB_POOL_MAX_SIZE,
+            'timeout': int(os.environ.get('DB_POOL_TIMEOUT', 10)),
+        }
+    else:
+        DATABASES['default']['CONN_MAX_AGE'] = int(os.environ.get('DB_CONN_MAX_AGE', 60))
+else:
+    raise ImproperlyConfigured("DB_ENGINE must be 'sqlite' or 'postgresql'.")
+
+
+# Cache
+# https://docs.djangoproject.com/en/5.1/topics/cache/
+# Výchozí je lokální paměť, backend lze změnit proměnnými prostředí, např.
+# API_CACHE_BACKEND=django.core.cache.backends.filebased.FileBasedCache API_CACHE_LOCATION=/var/tmp/movie_db
+# API_CACHE_BACKEND=django.core.cache.backends.redis.RedisCache API_CACHE_LOCATION=redis://127.0.0.1:6379
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'api': {
+        'BACKEND': os.environ.get('API_CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': os.environ.get('API_CACHE_LOCATION', 'api-responses'),
+    },
 }
+# MAX_ENTRIES znají jen backendy Djanga s vlastním mazáním (locmem, filebased, db),
+# Redis/Memcached by OPTIONS předaly klientovi jako neznámé argumenty
+if CACHES['api']['BACKEND'].rsplit('.', 1)[0] in (
+    'django.core.cache.backends.locmem', 'django.core.cache.backends.filebased', 'django.core.cache.backends.db',
+):
+    CACHES['api']['OPTIONS'] = {'MAX_ENTRIES': 10000}
+
+# Cache odpovědí čtecích endpointů (api/caching.py)
+API_CACHE_ALIAS = 'api'
+API_CACHE_TIMEOUT = int(os.environ.get('API_CACHE_TIMEOUT', 300))
+
+# Měření požadavků (api/middleware.py): hlavička Server-Timing a log api.timing.
+# Podíl měřených požadavků 0-1, v produkci stačí např. 0.01. Tvar dotazu, který se
+# v jednom požadavku opakuje aspoň API_TIMING_DUPLICATE_THRESHOLD krát, se hlásí jako N+1.
+API_TIMING_SAMPLE_RATE = float(os.environ.get('API_TIMING_SAMPLE_RATE', 0))
+API_TIMING_DUPLICATE_THRESHOLD = 5
+
+# Cache tokenů (api/authentication.py): sdílená cache API_CACHE_ALIAS a LRU v paměti procesu.
+# Po smazání tokenu ho jiné procesy mohou přijímat ještě API_TOKEN_LRU_TTL sekund (0 = LRU vypnuto).
+API_TOKEN_CACHE_TTL = int(os.environ.get('API_TOKEN_CACHE_TTL', 300))
+API_TOKEN_LRU_TTL = int(os.environ.get('API_TOKEN_LRU_TTL', 30))
+API_TOKEN_LRU_SIZE = 1024
 
 
 # Password validation
@@ -118,6 +274,36 @@ AUTH_PASSWORD_VALIDATORS = [
 ]
 
 
+# Hashování hesel (api/hashers.py). API_PASSWORD_HASHER vybírá algoritmus pro nové hashe,
+# ostatní zůstávají pro ověření starých; po přihlášení se hash přepočítá na aktuální
+# algoritmus a cenu. argon2 vyžaduje balíček argon2-cffi, scrypt OpenSSL s podporou scrypt.
+PASSWORD_HASHER_CHOICES = {
+    'pbkdf2': 'api.hashers.PBKDF2PasswordHasher',
+    'scrypt': 'api.hashers.ScryptPasswordHasher',
+    'argon2': 'api.hashers.Argon2PasswordHasher',
+}
+if not hasattr(hashlib, 'scrypt'):
+    del PASSWORD_HASHER_CHOICES['scrypt']
+if importlib.util.find_spec('argon2') is None:
+    del PASSWORD_HASHER_CHOICES['argon2']
+API_PASSWORD_HASHER = os.environ.get('API_PASSWORD_HASHER', 'pbkdf2')
+if API_PASSWORD_HASHER not in PASSWORD_HASHER_CHOICES:
+    raise ImproperlyConfigured(f"API_PASSWORD_HASHER must be one of: {', '.join(PASSWORD_HASHER_CHOICES)}.")
+PASSWORD_HASHERS = [PASSWORD_HASHER_CHOICES[API_PASSWORD_HASHER]] + [
+    hasher for name, hasher in PASSWORD_HASHER_CHOICES.items() if name != API_PASSWORD_HASHER
+]
+
+# Cena hashe: vyšší = pomalejší přihlášení i útok hrubou silou. Výchozí hodnoty odpovídají Djangu.
+API_PBKDF2_ITERATIONS = int(os.environ.get('API_PBKDF2_ITERATIONS', 1_000_000))
+API_SCRYPT_WORK_FACTOR = int(os.environ.get('API_SCRYPT_WORK_FACTOR', 2 ** 14))
+API_SCRYPT_BLOCK_SIZE = int(os.environ.get('API_SCRYPT_BLOCK_SIZE', 8))
+API_ARGON2_TIME_COST = int(os.environ.get('API_ARGON2_TIME_COST', 2))
+API_ARGON2_MEMORY_COST = int(os.environ.get('API_ARGON2_MEMORY_COST', 102400))  # KiB
+API_ARGON2_PARALLELISM = int(os.environ.get('API_ARGON2_PARALLELISM', 8))
+# Vlákna pro hashování v async view (0 = počet jader)
+API_PASSWORD_HASH_WORKERS = int(os.environ.get('API_PASSWORD_HASH_WORKERS', 0))
+
+
 # Internationalization
 # https://docs.djangoproject.com/en/5.1/topics/i18n/
 
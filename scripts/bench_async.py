@@ -0,0 +1,83 @@
+# Propustnost čtecích endpointů při souběžných požadavcích: synchronní view (WSGI, vlákna)
+# vs. async view (ASGI, jedna smyčka událostí). Bez cache odpovědí, měří se samotná view.
+# Spuštění: python scripts/bench_async.py [počet požadavků] [souběžnost ...]
+import asyncio
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'movie_db'))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'movie_db.settings')
+
+import django
+
+django.setup()
+
+from django.conf import settings
+from django.db import connection
+from django.test import AsyncClient, Client
+from django.test.utils import override_settings, setup_test_environment
+
+REQUESTS = int(sys.argv[1]) if len(sys.argv) > 1 else 400
+CONCURRENCY = [int(value) for value in sys.argv[2:]] or [1, 8, 32]
+
+
+def run_wsgi(path, headers, concurrency):
+    def fetch(_):
+        response = Client(headers=headers).get(path)
+        assert response.status_code == 200, response.content
+
+    with ThreadPoolExecutor(concurrency) as pool:
+        start = time.perf_counter()
+        list(pool.map(fetch, range(REQUESTS)))
+        return time.perf_counter() - start
+
+
+def run_asgi(path, headers, concurrency):
+    async def worker(count):
+        client = AsyncClient()
+        for _ in range(count):
+            response = await client.get(path, headers=headers)
+            assert response.status_code == 200, response.content
+
+    async def main():
+        start = time.perf_counter()
+        await asyncio.gather(*(worker(REQUESTS // concurrency) for _ in range(concurrency)))
+        return time.perf_counter() - start
+
+    return asyncio.run(main())
+
+
+def main():
+    setup_test_environment()
+    connection.creation.create_test_db(verbosity=0)
+
+    from rest_framework.authtoken.models import Token
+    from api.models import Movie, Person, User
+    from api.seeding import CatalogSeeder
+
+    CatalogSeeder(seed=1).run(movies=5000, people=2000)
+    user = User.objects.create_user(email='bench@example.com', password='bench-password')
+    headers = {'Authorization': f'Token {Token.objects.create(user=user).key}'}
+    movie = Movie.objects.order_by('id').values_list('id', flat=True).first()
+    person = Person.objects.order_by('id').values_list('id', flat=True).first()
+    paths = ['api/movies/', f'api/movies/{movie}/', 'actors/', f'people/{person}/', 'genres/']
+
+    caches = {**settings.CACHES, 'api': {'BACKEND': 'django.core.cache.backends.dummy.DummyCache'}}
+    with override_settings(CACHES=caches):
+        print(f'{REQUESTS} requests per run, requests/s (higher is better)')
+        print(f'{"endpoint":26}' + ''.join(f'{f"c={c} wsgi":>12}{f"c={c} asgi":>12}' for c in CONCURRENCY))
+        for path in paths:
+            row = f'{path:26}'
+            for concurrency in CONCURRENCY:
+                wsgi = run_wsgi(f'/api/{path}', headers, concurrency)
+                asgi = run_asgi(f'/api/async/{path}', headers, concurrency)
+                row += f'{REQUESTS / wsgi:12.0f}{REQUESTS / asgi:12.0f}'
+            print(row)
+
+    connection.creation.destroy_test_db(':memory:', verbosity=0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,84 @@
+# Přihlášení za sekundu na jádro pro každý dostupný hasher hesel při nastavené ceně
+# (API_PBKDF2_ITERATIONS, API_SCRYPT_*, API_ARGON2_*). Měří samotné ověření hesla,
+# synchronní LoginView a async login s hash_executor při souběžných požadavcích.
+# Spuštění: python scripts/bench_login.py [počet přihlášení] [souběžnost]
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'movie_db'))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'movie_db.settings')
+
+import django
+
+django.setup()
+
+from django.conf import settings
+from django.contrib.auth.hashers import check_password, get_hasher, make_password
+from django.db import connection
+from django.test import AsyncClient, Client
+from django.test.utils import override_settings, setup_test_environment
+
+LOGINS = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+CONCURRENCY = int(sys.argv[2]) if len(sys.argv) > 2 else 2 * (os.cpu_count() or 1)
+CORES = os.cpu_count() or 1
+PASSWORD = 'bench-password'
+
+
+def verify_rate(encoded):
+    start = time.perf_counter()
+    for _ in range(LOGINS):
+        assert check_password(PASSWORD, encoded)
+    return LOGINS / (time.perf_counter() - start)
+
+
+def sync_rate(data):
+    client = Client()
+    start = time.perf_counter()
+    for _ in range(LOGINS):
+        response = client.post('/api/auth/', data, content_type='application/json')
+        assert response.status_code == 200, response.content
+    return LOGINS / (time.perf_counter() - start)
+
+
+def async_rate(data):
+    async def login(client):
+        response = await client.post('/api/async/auth/', data, content_type='application/json')
+        assert response.status_code == 200, response.content
+
+    async def main():
+        client = AsyncClient()
+        start = time.perf_counter()
+        for offset in range(0, LOGINS, CONCURRENCY):
+            await asyncio.gather(*(login(client) for _ in range(min(CONCURRENCY, LOGINS - offset))))
+        return LOGINS / (time.perf_counter() - start)
+
+    return asyncio.run(main())
+
+
+def main():
+    setup_test_environment()
+    connection.creation.create_test_db(verbosity=0)
+
+    from api.models import User
+
+    no_throttle = {**settings.REST_FRAMEWORK, 'DEFAULT_THROTTLE_RATES': {}}
+    print(f'{LOGINS} logins per run, {CORES} cores, async concurrency {CONCURRENCY}')
+    print(f'{"hasher":10}{"verify/s/core":>16}{"sync/s/core":>14}{"async/s":>10}{"async/s/core":>14}')
+    for name, hasher in settings.PASSWORD_HASHER_CHOICES.items():
+        with override_settings(PASSWORD_HASHERS=[hasher], REST_FRAMEWORK=no_throttle):
+            encoded = make_password(PASSWORD)
+            assert get_hasher().algorithm in encoded
+            user = User.objects.create_user(email=f'{name}@example.com', password=PASSWORD)
+            data = {'email': user.email, 'password': PASSWORD}
+            verify = verify_rate(encoded)
+            sync = sync_rate(data)
+            concurrent = async_rate(data)
+            print(f'{name:10}{verify:16.1f}{sync:14.1f}{concurrent:10.1f}{concurrent / CORES:14.1f}')
+
+    connection.creation.destroy_test_db(':memory:', verbosity=0)
+
+
+if __name__ == '__main__':
+    main()
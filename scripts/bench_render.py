@@ -0,0 +1,79 @@
+# Render a velikost odpovědí se stránkami po 1000 filmech / osobách: JSONRenderer (stdlib json)
+# vs. FastJSONRenderer (orjson, api/renderers.py) a bajty po kompresi gzip/br/zstd
+# (api/middleware.CompressionMiddleware, br a zstd jen s nainstalovanými balíčky).
+# Běží nad novou dočasnou databází naplněnou seed_catalog.
+# Spuštění: python scripts/bench_render.py [opakování] [velikost stránky]
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+MOVIE_DB = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'movie_db')
+
+
+def timed(func, repeat):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        times.append(time.perf_counter() - start)
+    return result, statistics.median(times) * 1000
+
+
+def main():
+    repeat = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    page_size = int(sys.argv[2]) if len(sys.argv) > 2 else 1000
+
+    sys.path.insert(0, MOVIE_DB)
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'movie_db.settings')
+    directory = tempfile.TemporaryDirectory()
+    os.environ['DB_NAME'] = os.path.join(directory.name, 'bench.sqlite3')
+
+    import django
+
+    django.setup()
+
+    from django.conf import settings
+    from django.core.management import call_command
+    from rest_framework.renderers import JSONRenderer
+
+    from api.middleware import COMPRESSORS
+    from api.models import Movie, Person
+    from api.renderers import FastJSONRenderer, orjson
+    from api.seeding import CatalogSeeder
+    from api.serializers import MovieListSerializer, PersonListSerializer
+
+    call_command('migrate', verbosity=0)
+    CatalogSeeder(seed=1).run(movies=page_size, people=page_size)
+
+    movies = list(Movie.objects.order_by('id').values(*MovieListSerializer.fields)[:page_size])
+    people = list(Person.objects.order_by('id').values(*PersonListSerializer.fields)[:page_size])
+    pages = [
+        (f'{len(movies)} movies', MovieListSerializer(movies).data),
+        (f'{len(movies)} movies, expand', MovieListSerializer(movies, expand=['director', 'actors']).data),
+        (f'{len(people)} people', PersonListSerializer(people).data),
+    ]
+    encodings = [encoding for encoding in settings.API_COMPRESSION_ENCODINGS if encoding in COMPRESSORS]
+    levels = settings.API_COMPRESSION_LEVELS
+
+    print(f'median of {repeat} runs, orjson {"installed" if orjson else "not installed"}, '
+          f'compression: {", ".join(f"{encoding} {levels.get(encoding, 6)}" for encoding in encodings)}')
+    print(f'{"page":24}{"stdlib ms":>11}{"fast ms":>10}{"speedup":>9}{"encoding":>10}{"bytes":>10}{"ratio":>8}{"ms":>8}')
+    for name, data in pages:
+        body, stdlib_ms = timed(lambda: JSONRenderer().render(data), repeat)
+        fast_body, fast_ms = timed(lambda: FastJSONRenderer().render(data), repeat)
+        assert body == fast_body, name
+        print(f'{name:24}{stdlib_ms:11.2f}{fast_ms:10.2f}{stdlib_ms / fast_ms:8.1f}x{"identity":>10}{len(body):10}'
+              f'{1:8.2f}{0:8.2f}')
+        for encoding in encodings:
+            def compress():
+                compress_chunk, flush = COMPRESSORS[encoding](levels.get(encoding, 6))
+                return compress_chunk(body) + flush()
+            compressed, compress_ms = timed(compress, repeat)
+            print(f'{"":54}{encoding:>10}{len(compressed):10}{len(body) / len(compressed):8.2f}{compress_ms:8.2f}')
+    directory.cleanup()
+
+
+if __name__ == '__main__':
+    main()
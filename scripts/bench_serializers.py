@@ -0,0 +1,96 @@
+# Porovnání rychlosti serializace stránky filmů/osob: ModelSerializer vs. rychlé serializery
+# Spuštění: python scripts/bench_serializers.py [počet řádků]
+import datetime
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'movie_db'))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'movie_db.settings')
+
+import django
+
+django.setup()
+
+from django.db import connection
+from django.test.utils import setup_test_environment
+
+ROWS = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+REPEAT = 5
+
+
+def best_of(fn):
+    times = []
+    for _ in range(REPEAT):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def main():
+    # Měříme nad testovací databází, data projektu zůstanou beze změny
+    setup_test_environment()
+    connection.creation.create_test_db(verbosity=0)
+
+    from rest_framework.renderers import JSONRenderer
+    from api.models import Person, Movie, Genre, MovieGenre, group_by_movie
+    from api.serializers import PersonSerializer, MovieSerializer, PersonListSerializer, MovieListSerializer, \
+        ACTOR_LINKS, GENRE_LINKS
+
+    birth = datetime.date(1970, 1, 1)
+    directors = Person.objects.bulk_create([
+        Person(name=f'Director {i}', birthDate=birth, country='CZ', biography='Bio', role='director')
+        for i in range(50)
+    ])
+    actors = Person.objects.bulk_create([
+        Person(name=f'Actor {i}', birthDate=birth, country='CZ', biography='Bio', role='actor')
+        for i in range(ROWS)
+    ])
+    movies = Movie.objects.bulk_create([
+        Movie(name=f'Movie {i}', year=1950 + i % 70, director=directors[i % 50]) for i in range(ROWS)
+    ])
+    Movie.actors.through.objects.bulk_create([
+        Movie.actors.through(movie_id=movie.id, person_id=actors[(i + k) % ROWS].id)
+        for i, movie in enumerate(movies) for k in range(5)
+    ])
+    genres = Genre.objects.resolve(['action', 'drama', 'comedy'])
+    MovieGenre.objects.bulk_create([
+        MovieGenre(movie=movie, genre=genres[k]) for i, movie in enumerate(movies) for k in range(i % 3 + 1)
+    ])
+
+    render = JSONRenderer().render
+    movie_instances = list(Movie.objects.for_api()[:ROWS])
+    movie_rows = list(Movie.objects.values(*MovieListSerializer.fields)[:ROWS])
+    person_instances = list(Person.objects.all()[:ROWS])
+    person_rows = list(Person.objects.values(*PersonListSerializer.fields)[:ROWS])
+    serializer = MovieListSerializer(movie_rows)
+    ids = [row['id'] for row in movie_rows]
+    movie_actors = group_by_movie(ACTOR_LINKS, ids, 'person_id')
+    movie_genres = group_by_movie(GENRE_LINKS, ids, 'genre__name')
+    cases = [
+        # Samotná serializace už načtených dat: instance s prefetchem vs. řádky a vazby načtené předem
+        ('movies build', lambda: MovieSerializer(movie_instances, many=True).data,
+         lambda: serializer.build(movie_rows, movie_actors, movie_genres)),
+        # Rychlá cesta včetně dvou dotazů na herce a žánry, ModelSerializer s prefetchem načteným předem
+        ('movies serialize', lambda: MovieSerializer(movie_instances, many=True).data,
+         lambda: MovieListSerializer(movie_rows).data),
+        ('people serialize', lambda: PersonSerializer(person_instances, many=True).data,
+         lambda: PersonListSerializer(person_rows).data),
+        # Načtení i serializace
+        ('movies end-to-end', lambda: MovieSerializer(list(Movie.objects.for_api()[:ROWS]), many=True).data,
+         lambda: MovieListSerializer(Movie.objects.values(*MovieListSerializer.fields)[:ROWS]).data),
+        ('people end-to-end', lambda: PersonSerializer(list(Person.objects.all()[:ROWS]), many=True).data,
+         lambda: PersonListSerializer(Person.objects.values(*PersonListSerializer.fields)[:ROWS]).data),
+    ]
+    for name, slow, fast in cases:
+        assert render(slow()) == render(fast()), f'{name}: output differs'
+        slow_time, fast_time = best_of(slow), best_of(fast)
+        print(f'{name:18} {ROWS} rows  ModelSerializer {slow_time * 1000:7.1f} ms  '
+              f'fast {fast_time * 1000:6.1f} ms  speedup {slow_time / fast_time:4.1f}x')
+
+    connection.creation.destroy_test_db(':memory:', verbosity=0)
+
+
+if __name__ == '__main__':
+    main()
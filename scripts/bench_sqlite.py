@@ -0,0 +1,120 @@
+# Propustnost čtení při souběžném zápisu nad SQLite souborem: výchozí SQLite (rollback journal)
+# vs. profil 'tuned' (WAL, synchronous=NORMAL, mmap, ...) vs. 'tuned' se samostatným spojením
+# pro čtení. Každá varianta běží v samostatném procesu nad novou dočasnou databází.
+# Spuštění: python scripts/bench_sqlite.py [sekund na variantu] [čtecích vláken] [zapisovacích vláken]
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+MOVIE_DB = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'movie_db')
+
+VARIANTS = [
+    ('default', {'DB_SQLITE_PROFILE': 'default'}),
+    ('tuned', {'DB_SQLITE_PROFILE': 'tuned'}),
+    ('tuned + read conn', {'DB_SQLITE_PROFILE': 'tuned', 'DB_SQLITE_READ_CONNECTION': '1'}),
+]
+
+
+def child(duration, readers, writers):
+    sys.path.insert(0, MOVIE_DB)
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'movie_db.settings')
+
+    import django
+
+    django.setup()
+
+    from django.conf import settings
+    from django.core.management import call_command
+    from django.db import DatabaseError, connections, transaction
+    from django.test import Client
+    from django.test.utils import override_settings, setup_test_environment
+    from rest_framework.authtoken.models import Token
+
+    from api.models import Movie, Person, User
+    from api.seeding import CatalogSeeder
+
+    setup_test_environment()
+    call_command('migrate', verbosity=0)
+    CatalogSeeder(seed=1).run(movies=3000, people=1000)
+    user = User.objects.create_user(email='bench@example.com', password='bench-password')
+    headers = {'Authorization': f'Token {Token.objects.create(user=user).key}'}
+    movie_ids = list(Movie.objects.order_by('id').values_list('id', flat=True)[:200])
+    director = Person.objects.filter(role='director').values_list('id', flat=True).first()
+    actors = list(Person.objects.filter(role='actor').values_list('id', flat=True)[:5])
+
+    stop = threading.Event()
+    counts = {'reads': 0, 'read_errors': 0, 'writes': 0, 'write_errors': 0}
+    lock = threading.Lock()
+
+    def add(key):
+        with lock:
+            counts[key] += 1
+
+    def read_loop(offset):
+        client = Client(headers=headers)
+        i = offset
+        while not stop.is_set():
+            path = '/api/api/movies/?limit=20' if i % 2 else f'/api/api/movies/{movie_ids[i % len(movie_ids)]}/'
+            try:
+                ok = client.get(path).status_code == 200
+            except DatabaseError:
+                ok = False
+            add('reads' if ok else 'read_errors')
+            i += 1
+        connections.close_all()
+
+    def write_loop():
+        i = 0
+        while not stop.is_set():
+            try:
+                with transaction.atomic():
+                    movie = Movie.objects.create(name=f'Burst {i}', year=2000 + i % 20, director_id=director)
+                    movie.actors.set(actors)
+                    movie.set_genres(['drama'])
+                add('writes')
+            except DatabaseError:
+                add('write_errors')
+            i += 1
+        connections.close_all()
+
+    caches = {**settings.CACHES, 'api': {'BACKEND': 'django.core.cache.backends.dummy.DummyCache'}}
+    with override_settings(CACHES=caches, DEBUG=False):
+        threads = [threading.Thread(target=read_loop, args=(n,)) for n in range(readers)]
+        threads += [threading.Thread(target=write_loop) for _ in range(writers)]
+        for thread in threads:
+            thread.start()
+        time.sleep(duration)
+        stop.set()
+        for thread in threads:
+            thread.join()
+
+    print(json.dumps({key: value / duration if key in ('reads', 'writes') else value for key, value in counts.items()}))
+
+
+def main():
+    duration = float(sys.argv[1]) if len(sys.argv) > 1 else 10
+    readers = int(sys.argv[2]) if len(sys.argv) > 2 else 8
+    writers = int(sys.argv[3]) if len(sys.argv) > 3 else 2
+    print(f'{duration:g} s per variant, {readers} reader threads, {writers} writer threads')
+    print(f'{"variant":20}{"reads/s":>10}{"writes/s":>10}{"read err":>10}{"write err":>10}')
+    for name, env in VARIANTS:
+        with tempfile.TemporaryDirectory() as directory:
+            env = {**os.environ, **env, 'DB_NAME': os.path.join(directory, 'bench.sqlite3')}
+            output = subprocess.run(
+                [sys.executable, __file__, '--child', str(duration), str(readers), str(writers)],
+                env=env, check=True, capture_output=True, text=True,
+            ).stdout
+        result = json.loads(output.strip().splitlines()[-1])
+        print(f'{name:20}{result["reads"]:10.0f}{result["writes"]:10.0f}'
+              f'{result["read_errors"]:10}{result["write_errors"]:10}')
+
+
+if __name__ == '__main__':
+    if sys.argv[1:2] == ['--child']:
+        child(float(sys.argv[2]), int(sys.argv[3]), int(sys.argv[4]))
+    else:
+        main()
@@ -0,0 +1,27 @@
+#!/bin/sh
+# Testy proti dočasnému PostgreSQL (vedle výchozího běhu nad SQLite).
+# Použije lokální pg_ctl/initdb, pokud jsou v PATH, jinak kontejner postgres:16 v Dockeru.
+# Databáze po doběhu zmizí. Vyžaduje psycopg 3 (pip install "psycopg[binary,pool]").
+# Spuštění: scripts/test_postgres.sh [argumenty pro manage.py test]
+set -eu
+
+cd "$(dirname "$0")/../movie_db"
+PORT=${DB_PORT:-55432}
+
+if command -v pg_ctl >/dev/null 2>&1 && command -v initdb >/dev/null 2>&1; then
+    DATA=$(mktemp -d)
+    trap 'pg_ctl -D "$DATA" -m immediate stop >/dev/null 2>&1 || true; rm -rf "$DATA"' EXIT
+    initdb -D "$DATA" -U postgres --auth=trust >/dev/null
+    pg_ctl -D "$DATA" -o "-p $PORT -k $DATA -c fsync=off" -l "$DATA/server.log" -w start >/dev/null
+    HOST=127.0.0.1
+else
+    NAME=movie-db-test-$$
+    trap 'docker rm -f "$NAME" >/dev/null 2>&1 || true' EXIT
+    docker run -d --rm --name "$NAME" -p "$PORT:5432" -e POSTGRES_HOST_AUTH_METHOD=trust \
+        postgres:16 -c fsync=off >/dev/null
+    until docker exec "$NAME" pg_isready -U postgres >/dev/null 2>&1; do sleep 1; done
+    HOST=127.0.0.1
+fi
+
+DB_ENGINE=postgresql DB_NAME=movie_db DB_USER=postgres DB_HOST=$HOST DB_PORT=$PORT \
+    python manage.py test "$@"